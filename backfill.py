@@ -0,0 +1,85 @@
+# 文件名: backfill.py
+"""
+历史回填脚本
+沿各目标的列表分页（如 tzgg/N.htm）抓取历史通知，批量写入已见表，不发送任何通知
+新建数据库后先回填一次，第一次启动 --loop 时就不会把列表上已有的通知当作新文章推送，
+更早的通知也能用 search_announcements.py 检索
+每个分页的完成状态记录在数据库中，中断（Ctrl+C）后再次运行从断点继续
+
+使用方法:
+    python backfill.py
+    python backfill.py --college 数学与统计学院 --max-pages 20
+    python backfill.py --workers 32 --rate 10 --per-host 8
+    python backfill.py --replan --json
+"""
+
+import argparse
+import json
+import os
+import threading
+
+from bugs.backfill import Backfiller, HostRateLimiter
+from bugs.config import (
+    TARGETS_COLLEGE,
+    TARGET_JWC_PAGE,
+    BACKFILL_MAX_WORKERS,
+    BACKFILL_MAX_PER_HOST,
+    BACKFILL_RATE_PER_HOST
+)
+from bugs.database import DatabaseManager
+from bugs.targets import register_targets
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="沿列表分页回填历史通知")
+    parser.add_argument('--college', action='append', help="只回填某个学院（完整名称），可重复指定")
+    parser.add_argument('--max-pages', type=int, help="每个目标本次最多抓取的分页数（由新到旧）")
+    parser.add_argument('--workers', type=int, default=BACKFILL_MAX_WORKERS, help="同时抓取的分页数")
+    parser.add_argument('--rate', type=float, default=BACKFILL_RATE_PER_HOST, help="每个主机每秒最多请求数，0 表示不限")
+    parser.add_argument('--per-host', type=int, default=BACKFILL_MAX_PER_HOST, help="每个主机同时进行的请求数")
+    parser.add_argument('--replan', action='store_true', help="重新抓取列表首页规划分页（站点新增了分页时使用）")
+    parser.add_argument('--json', action='store_true', help="以 JSON 输出结果")
+    args = parser.parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    if script_dir:
+        os.chdir(script_dir)
+
+    targets = [target for target in TARGET_JWC_PAGE + TARGETS_COLLEGE
+               if args.college is None or target['college'] in args.college]
+    if not targets:
+        parser.error("没有匹配的目标")
+    register_targets(targets)
+
+    # 回填的旧文章不进入发件箱和详情页队列
+    db_manager = DatabaseManager(enable_outbox=False, enable_details=False)
+    db_manager.init_db()
+    backfiller = Backfiller(db_manager, print_lock=threading.Lock(), max_workers=args.workers,
+                            limiter=HostRateLimiter(args.rate, args.per_host))
+    stats = backfiller.run(targets, max_pages=args.max_pages, replan=args.replan,
+                           progress_seconds=None if args.json else 5)
+    backfiller.close()
+    progress = db_manager.get_backfill_progress()
+    db_manager.close()
+
+    if args.json:
+        print(json.dumps({'stats': stats, 'targets': progress}, ensure_ascii=False, indent=2))
+        return
+
+    print(f"{'已中断' if stats['interrupted'] else '回填完成'}: 抓取 {stats['pages']} 页、{stats['items']} 条，"
+          f"新增 {stats['added']} 条，失败 {stats['failed']} 页，"
+          f"耗时 {stats['elapsed_seconds']} 秒，{stats['pages_per_second']} 页/秒")
+    for target in targets:
+        target_progress = progress.get(target['url'])
+        if target_progress is None:
+            continue
+        remaining = target_progress['pages'] - target_progress['done']
+        print(f"  {target['college']} - {target['category']}: {target_progress['done']}/{target_progress['pages']} 页"
+              f"，新增 {target_progress['added']} 条" + (f"，剩余 {remaining} 页" if remaining else ""))
+    if stats['interrupted'] or stats['failed']:
+        print("再次运行 python backfill.py 从断点继续")
+
+
+if __name__ == "__main__":
+    main()
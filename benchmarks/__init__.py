@@ -0,0 +1,4 @@
+"""
+fzu-bugs 性能基准脚本
+在仓库根目录用 python -m benchmarks.<脚本名> 运行
+"""
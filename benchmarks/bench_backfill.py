@@ -0,0 +1,172 @@
+"""历史回填基准
+
+夹具服务器（子进程）为 TARGET_JWC_PAGE 和 TARGETS_COLLEGE 的每个目标提供若干历史分页，
+在新数据库上用 Backfiller 回填：先运行若干秒后中断，再新建 Backfiller 从断点继续。
+
+输出 JSON：两段运行各自的分页数、每秒分页数，以及一致性检查——
+已见记录数等于全部历史条目数、续跑没有重复抓取已完成的分页（服务器请求数等于分页数）、
+回填期间没有触发提交回调、没有写入通知发件箱，并且全程连着的一个 SSE 订阅者
+（推送服务使用另一个 DatabaseManager，与 --loop 进程相同）没有收到任何 article 事件。
+
+使用方法:
+    python -m benchmarks.bench_backfill
+    python -m benchmarks.bench_backfill --history-pages 200 --latency 0.05 --rate 10
+    python -m benchmarks.bench_backfill --interrupt-after 0 --output result.json
+"""
+
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from bugs.backfill import Backfiller, HostRateLimiter
+from bugs.config import OUTBOX_TABLE_NAME, TABLE_NAME, TARGETS_COLLEGE, TARGET_JWC_PAGE
+from bugs.database import DatabaseManager
+from bugs.http_client import HttpClient
+from bugs.push import PushServer
+from bugs.targets import TargetRegistry
+
+from .fixtures import FixtureProcess, HostProfile
+
+
+class Subscriber:
+    """在后台线程连着 /events，统计收到的 article 事件数"""
+
+    def __init__(self, address):
+        self.events = 0
+        self.connected = threading.Event()
+        self._stop = threading.Event()
+        self._conn = http.client.HTTPConnection(*address, timeout=1)
+        self._thread = threading.Thread(target=self._read, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        if not self.connected.wait(5):
+            raise RuntimeError("无法连接推送服务")
+        return self
+
+    def _read(self):
+        self._conn.request('GET', '/events')
+        response = self._conn.getresponse()
+        self.connected.set()
+        while not self._stop.is_set():
+            try:
+                line = response.fp.readline()
+            except OSError:
+                continue
+            if not line:
+                break
+            if line.startswith(b'event: article'):
+                self.events += 1
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._conn.close()
+
+
+def run_backfill(db_path, targets, registry, args, stop_after=None):
+    """运行一次回填，stop_after 秒后中断（None 表示运行到结束），返回统计字典"""
+    db_manager = DatabaseManager(db_path, enable_outbox=False, enable_details=False)
+    commits = []
+    db_manager.add_commit_listener(commits.append)
+    http_client = HttpClient(pool_maxsize=max(4, args.per_host))
+    backfiller = Backfiller(db_manager, http_client=http_client, max_workers=args.workers,
+                            limiter=HostRateLimiter(args.rate, args.per_host), registry=registry)
+    timer = None
+    if stop_after is not None:
+        timer = threading.Timer(stop_after, backfiller.stop)
+        timer.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        db_manager.init_db()
+        stats = backfiller.run(targets, progress_seconds=None)
+    if timer is not None:
+        timer.cancel()
+    stats['commit_callbacks'] = len(commits)
+    http_client.close()
+    db_manager.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="历史回填基准")
+    parser.add_argument('--history-pages', type=int, default=100, help="每个目标的历史分页数")
+    parser.add_argument('--items-per-page', type=int, default=20, help="每页条目数")
+    parser.add_argument('--latency', type=float, default=0.02, help="每次请求的响应延迟（秒）")
+    parser.add_argument('--workers', type=int, default=32, help="同时抓取的分页数")
+    parser.add_argument('--rate', type=float, default=20, help="每个主机每秒最多请求数，0 表示不限")
+    parser.add_argument('--per-host', type=int, default=4, help="每个主机同时进行的请求数")
+    parser.add_argument('--interrupt-after', type=float, default=5, help="第一段运行多少秒后中断，0 表示不中断")
+    parser.add_argument('--output', help="结果写入文件，默认输出到标准输出")
+    args = parser.parse_args()
+
+    targets = TARGET_JWC_PAGE + TARGETS_COLLEGE
+    server = FixtureProcess(targets, items_per_page=args.items_per_page, history_pages=args.history_pages,
+                            default_profile=HostProfile(latency=args.latency)).start()
+    targets = server.localize(targets)
+    registry = TargetRegistry(targets)
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'backfill.db')
+        push_db = DatabaseManager(db_path, enable_outbox=False, enable_details=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            push_db.init_db()
+        # 心跳间隔很短，订阅者在回填期间反复从数据库读取新文章
+        push_server = PushServer(push_db, port=0, heartbeat=0.2).start()
+        subscriber = Subscriber(push_server.address).start()
+        if args.interrupt_after:
+            runs.append(run_backfill(db_path, targets, registry, args, stop_after=args.interrupt_after))
+        runs.append(run_backfill(db_path, targets, registry, args))
+        # 再等过几个心跳，确保订阅者读过回填结束后的数据库
+        time.sleep(1)
+        subscriber.stop()
+        push_server.stop()
+        push_db.close()
+
+        conn = sqlite3.connect(db_path)
+        seen_rows = conn.execute(f"SELECT COUNT(*) FROM {TABLE_NAME}").fetchone()[0]
+        outbox_rows = conn.execute(f"SELECT COUNT(*) FROM {OUTBOX_TABLE_NAME}").fetchone()[0]
+        conn.close()
+    requests = server.stats()['requests']
+    server.stop()
+
+    pages = len(targets) * (args.history_pages + 1)
+    expected_items = pages * args.items_per_page
+    fetched = sum(run['pages'] for run in runs) + len(targets)
+    elapsed = sum(run['elapsed_seconds'] for run in runs)
+    report = {
+        'targets': len(targets),
+        'hosts': len({target['url'].split('/')[2] for target in targets}),
+        'pages': pages,
+        'expected_items': expected_items,
+        'rate_per_host': args.rate,
+        'latency': args.latency,
+        'runs': runs,
+        'total_seconds': round(elapsed, 3),
+        'pages_per_second': round(fetched / elapsed, 2) if elapsed else 0.0,
+        'seen_rows': seen_rows,
+        'complete': seen_rows == expected_items,
+        'no_refetch': requests == pages,
+        'pushed_events': subscriber.events,
+        'no_notifications': (outbox_rows == 0 and subscriber.events == 0
+                             and all(run['commit_callbacks'] == 0 for run in runs)),
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    if subscriber.events:
+        raise AssertionError(f"回填期间订阅者收到了 {subscriber.events} 个 article 事件")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""离线爬取基准
+
+在子进程中启动夹具服务器，为 TARGET_JWC_PAGE 和 TARGETS_COLLEGE 的每个目标提供页面
+（有录制文件时返回录制内容），然后：
+
+- crawl 模式：连续执行若干轮 WebCrawler.crawl_all_targets，第一轮为冷启动（全部是新文章）
+- loop 模式：用 run_crawler 的调度器以缩短的间隔运行 --loop 监控若干秒
+
+输出 JSON：每轮耗时、每秒请求数、CPU 时间和峰值内存（只统计基准进程，不含夹具服务器）。
+
+使用方法:
+    python -m benchmarks.bench_crawl
+    python -m benchmarks.bench_crawl --cycles 10 --concurrent --latency 0.05 --new-items 1
+    python -m benchmarks.bench_crawl --mode loop --seconds 30 --jwc-interval 2 --college-interval 5
+    python -m benchmarks.bench_crawl --hosts hosts.json --recorded benchmarks/recorded --output result.json
+
+hosts.json 按主机名覆盖网络条件，例如:
+    {"med.fzu.edu.cn": {"latency": 2.0, "error_rate": 0.5}}
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import tempfile
+import threading
+import time
+
+from bugs.circuit_breaker import CircuitBreaker
+from bugs.config import TARGETS_COLLEGE, TARGET_JWC_PAGE
+from bugs.crawler import WebCrawler
+from bugs.database import DatabaseManager
+from bugs.http_client import HttpClient
+
+from .fixtures import FixtureProcess, HostProfile
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _summarize(durations):
+    return {
+        'count': len(durations),
+        'min': round(min(durations, default=0), 4),
+        'p50': round(_percentile(durations, 50), 4),
+        'p95': round(_percentile(durations, 95), 4),
+        'max': round(max(durations, default=0), 4),
+        'mean': round(sum(durations) / len(durations), 4) if durations else 0.0,
+    }
+
+
+def _resource_usage():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime, usage.ru_maxrss
+
+
+def run_crawl(args, server, db_manager):
+    """连续执行 args.cycles 轮完整爬取，返回结果字典"""
+    targets = server.localize(TARGET_JWC_PAGE + TARGETS_COLLEGE)
+    http_client = HttpClient()
+    # 独立的熔断器，避免错误注入的影响跨运行累积
+    breaker = CircuitBreaker()
+    durations = []
+    new_articles = []
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.cycles):
+            crawler = WebCrawler(db_manager, http_client=http_client, breaker=breaker)
+            start = time.perf_counter()
+            articles = crawler.crawl_all_targets(targets, concurrent=args.concurrent)
+            durations.append(time.perf_counter() - start)
+            new_articles.append(len(articles))
+    http_client.close()
+
+    return {
+        'targets': len(targets),
+        'cold_cycle_seconds': round(durations[0], 4),
+        'warm_cycle_seconds': _summarize(durations[1:]),
+        'new_articles_per_cycle': new_articles,
+        'http': http_client.get_stats(),
+    }
+
+
+def run_loop(args, server, db_manager):
+    """以缩短的间隔运行 --loop 监控 args.seconds 秒，返回结果字典"""
+    import run_crawler
+
+    groups = [(policy, label, server.localize(targets)) for policy, label, targets in run_crawler.MONITOR_GROUPS]
+    policies = {
+        'jwc': {'default_interval': args.jwc_interval},
+        'college': {'default_interval': args.college_interval},
+    }
+    http_client = HttpClient()
+    scheduler = run_crawler._build_scheduler(db_manager, http_client, groups, policies)
+    thread = threading.Thread(target=scheduler.run_forever, name="BenchScheduler")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        thread.start()
+        time.sleep(args.seconds)
+        scheduler.stop()
+        thread.join()
+        # 等待最后一轮结束，保证统计完整
+        while any(job.running for job in scheduler.jobs):
+            time.sleep(0.05)
+    http_client.close()
+
+    return {
+        'jobs': scheduler.report(),
+        'cycles': db_manager.get_cycle_summary(),
+        'http': http_client.get_stats(),
+    }
+
+
+def _load_profiles(path):
+    if not path:
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return {host: HostProfile.from_dict(config) for host, config in json.load(f).items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线爬取基准")
+    parser.add_argument('--mode', choices=('crawl', 'loop'), default='crawl', help="基准模式")
+    parser.add_argument('--cycles', type=int, default=5, help="crawl 模式的轮数（含第一轮冷启动）")
+    parser.add_argument('--concurrent', action='store_true', help="crawl 模式使用并发爬取")
+    parser.add_argument('--seconds', type=float, default=20, help="loop 模式的运行时长")
+    parser.add_argument('--jwc-interval', type=float, default=2, help="loop 模式教务处监控间隔")
+    parser.add_argument('--college-interval', type=float, default=5, help="loop 模式学院监控间隔")
+    parser.add_argument('--latency', type=float, default=0.0, help="默认每次请求的响应延迟（秒）")
+    parser.add_argument('--bandwidth', type=int, default=None, help="默认响应带宽（字节/秒）")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="默认返回 503 的概率")
+    parser.add_argument('--new-items', type=int, default=0, help="默认每次请求注入的新文章数")
+    parser.add_argument('--hosts', help="按主机覆盖网络条件的 JSON 文件")
+    parser.add_argument('--recorded', help="录制页面目录")
+    parser.add_argument('--seed', type=int, default=0, help="错误注入的随机种子")
+    parser.add_argument('--output', help="结果写入文件，默认输出到标准输出")
+    args = parser.parse_args()
+
+    default_profile = HostProfile(args.latency, args.bandwidth, args.error_rate, args.new_items)
+    profiles = _load_profiles(args.hosts)
+    server = FixtureProcess(TARGET_JWC_PAGE + TARGETS_COLLEGE, default_profile=default_profile,
+                            profiles=profiles, recorded_dir=args.recorded, seed=args.seed).start()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # loop 模式会把新文章写入当前目录下的输出目录
+        os.chdir(tmp)
+        try:
+            db_manager = DatabaseManager(os.path.join(tmp, 'bench.db'))
+            with contextlib.redirect_stdout(io.StringIO()):
+                db_manager.init_db()
+
+            cpu_before, _ = _resource_usage()
+            server_before = server.stats()
+            start = time.perf_counter()
+            if args.mode == 'crawl':
+                result = run_crawl(args, server, db_manager)
+            else:
+                result = run_loop(args, server, db_manager)
+            wall = time.perf_counter() - start
+            cpu_after, peak_rss_kb = _resource_usage()
+            server_after = server.stats()
+
+            result['writer'] = db_manager.get_writer_stats()
+            db_manager.close()
+        finally:
+            os.chdir(cwd)
+    server.stop()
+
+    requests = server_after['requests'] - server_before['requests']
+    report = {
+        'mode': args.mode,
+        'concurrent': args.concurrent if args.mode == 'crawl' else None,
+        'fixture': {'default': default_profile.to_dict(),
+                    'hosts': {host: profile.to_dict() for host, profile in profiles.items()},
+                    'recorded': args.recorded},
+        'wall_seconds': round(wall, 4),
+        'requests': requests,
+        'requests_per_second': round(requests / wall, 2) if wall else 0.0,
+        'injected_errors': server_after['errors'] - server_before['errors'],
+        'bytes_served': server_after['bytes'] - server_before['bytes'],
+        'cpu_seconds': round(cpu_after - cpu_before, 4),
+        'peak_rss_mb': round(peak_rss_kb / 1024, 1),
+    }
+    report.update(result)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""页面解码基准
+
+比较 fetch_page 升级前后把响应字节变成文档树的 CPU 耗时：
+
+- detect: 升级前的写法，response.apparent_encoding 统计检测整页，再 response.text 解码、lxml 解析 str
+- resolve: 按响应头/<meta> 声明确定编码并按主机缓存（bugs/encoding.py），lxml 直接解析字节
+
+有录制目录（见 benchmarks/record_fixtures.py）时使用录制页面，响应头与录制时一样不带 charset；
+否则使用夹具生成的页面，一半目标转为 GBK 编码并声明 <meta charset="gbk">。
+同时确认两种方式取出的标题完全一致。
+
+使用方法:
+    python -m benchmarks.bench_encoding
+    python -m benchmarks.bench_encoding --recorded benchmarks/recorded --rounds 50
+    python -m benchmarks.bench_encoding --padding 2000 --output result.json
+"""
+
+import argparse
+import json
+import os
+import time
+
+import requests
+from lxml import html
+
+from bugs.config import TARGETS_COLLEGE, TARGET_JWC_PAGE
+from bugs.encoding import EncodingResolver, parse_html
+from bugs.targets import TargetRegistry
+
+from .fixtures import FixtureSite, recorded_path, render_page
+
+
+def load_pages(targets, recorded_dir, padding):
+    """返回 [(目标, 原始字节, Content-Type)]"""
+    pages = []
+    if recorded_dir:
+        for target in targets:
+            path = recorded_path(recorded_dir, target['url'])
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    pages.append((target, f.read(), 'text/html'))
+        return pages
+
+    site = FixtureSite(targets)
+    for i, page in enumerate(site.pages.values()):
+        content = render_page(page['target'], page['articles'], padding=padding)
+        if i % 2:
+            content = content.decode('utf-8').replace('charset="utf-8"', 'charset="gbk"').encode('gbk')
+        pages.append((page['target'], content, 'text/html'))
+    return pages
+
+
+def decode_detect(target, content, content_type):
+    """升级前：统计检测编码后解码为 str 再解析"""
+    response = requests.Response()
+    response._content = content
+    response.headers['Content-Type'] = content_type
+    response.encoding = response.apparent_encoding
+    return html.fromstring(response.text)
+
+
+def titles(tree, target, registry):
+    title_xpath = registry.xpath(target, 'title_xpath')
+    return [title_xpath(item)[0].strip() for item in registry.xpath(target, 'list_xpath')(tree)]
+
+
+def _cpu_per_page(func, pages, rounds):
+    started = time.process_time()
+    for _ in range(rounds):
+        for target, content, content_type in pages:
+            func(target, content, content_type)
+    return (time.process_time() - started) / (rounds * len(pages)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="页面解码基准")
+    parser.add_argument('--rounds', type=int, default=20, help="每个页面的重复次数")
+    parser.add_argument('--recorded', help="录制页面目录，未指定时使用夹具页面")
+    parser.add_argument('--padding', type=int, default=800, help="夹具页面导航和页脚的链接数（控制页面大小）")
+    parser.add_argument('--output', help="结果写入文件，默认输出到标准输出")
+    args = parser.parse_args()
+
+    targets = TARGETS_COLLEGE + TARGET_JWC_PAGE
+    registry = TargetRegistry(targets)
+    pages = load_pages(targets, args.recorded, args.padding)
+    if not pages:
+        parser.error("录制目录中没有页面")
+
+    resolver = EncodingResolver()
+
+    def decode_resolve(target, content, content_type):
+        return parse_html(content, resolver.resolve(target['url'], content, content_type))
+
+    for target, content, content_type in pages:
+        expected = titles(decode_detect(target, content, content_type), target, registry)
+        if titles(decode_resolve(target, content, content_type), target, registry) != expected:
+            raise AssertionError(f"两种解码方式的结果不一致: {target['college']} {target['url']}")
+
+    detect_ms = _cpu_per_page(decode_detect, pages, args.rounds)
+    resolve_ms = _cpu_per_page(decode_resolve, pages, args.rounds)
+    report = {
+        'pages': len(pages),
+        'source': 'recorded' if args.recorded else 'fixture',
+        'avg_page_bytes': sum(len(content) for _, content, _ in pages) // len(pages),
+        'rounds': args.rounds,
+        'cpu_ms_per_page': {'detect': round(detect_ms, 3), 'resolve': round(resolve_ms, 3)},
+        'cpu_saved_ratio': round(1 - resolve_ms / detect_ms, 3) if detect_ms else None,
+        'speedup': round(detect_ms / resolve_ms, 2) if resolve_ms else None,
+        'resolver': resolver.get_stats(),
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
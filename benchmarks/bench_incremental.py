@@ -0,0 +1,140 @@
+"""增量解析（高水位）基准与回归检查
+
+对一个目标的夹具页面依次模拟若干轮列表变化，每轮用 WebCrawler._collect_incremental 解析并入库，
+统计每轮求值链接 XPath 的次数，并检查：
+
+- steady: 页面不变时每轮的解析量不随轮数增长
+- pinned-N: 列表开头有 N 条置顶（N 不小于 HIGH_WATER_STOP_RUN 时置顶区会让扫描提前结束），
+  新条目插在置顶区下面时必须被发现，之后页面不变时解析量只与置顶数和停止条件有关
+- known-first: 第一次扫描时列表已全部入库（如回填之后），随后插在置顶区下面的新条目必须被发现
+
+任何一项检查失败时以状态码 1 退出。
+
+使用方法:
+    python -m benchmarks.bench_incremental
+    python -m benchmarks.bench_incremental --items 40 --cycles 10
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+from urllib.parse import urljoin
+
+from bugs.config import HIGH_WATER_STOP_RUN, TARGETS_COLLEGE
+from bugs.crawler import WebCrawler
+from bugs.database import DatabaseManager
+from bugs.encoding import parse_html
+from bugs.targets import TargetRegistry
+
+from .fixtures import render_page
+
+
+class CountingCrawler(WebCrawler):
+    """统计链接 XPath 求值次数的爬虫"""
+
+    href_evaluations = 0
+
+    def _extract_url(self, item, target):
+        self.href_evaluations += 1
+        return super()._extract_url(item, target)
+
+
+class Scenario:
+    """在独立的临时数据库上逐轮解析页面"""
+
+    def __init__(self, tmp, name, target):
+        self.target = target
+        self.registry = TargetRegistry([target])
+        self.db_manager = DatabaseManager(os.path.join(tmp, f'{name}.db'), enable_outbox=False,
+                                          enable_details=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.db_manager.init_db()
+        self.crawler = CountingCrawler(self.db_manager, registry=self.registry)
+
+    def cycle(self, articles):
+        """解析一轮页面，返回 (链接求值次数, 新文章 URL 列表)"""
+        root = parse_html(render_page(self.target, articles, padding=0), 'utf-8')
+        items = self.registry.xpath(self.target, 'list_xpath')(root)
+        self.crawler.href_evaluations = 0
+        candidates, mark = self.crawler._collect_incremental(items, self.target)
+        new_articles = self.db_manager.check_and_add_articles(candidates)
+        self.db_manager.save_high_water_mark(self.target['url'], mark)
+        return self.crawler.href_evaluations, [article['url'] for article in new_articles]
+
+    def close(self):
+        self.db_manager.close()
+
+
+def _articles(numbers):
+    return [(f"通知 {n}", f"info/1/{n}.htm") for n in numbers]
+
+
+def _pinned(count):
+    return [(f"置顶通知 {n}", f"info/9/{n}.htm") for n in range(count)]
+
+
+def run_steady(scenario, items, cycles):
+    page = _articles(range(items, 0, -1))
+    counts = [scenario.cycle(page)[0] for _ in range(cycles)]
+    return {'href_evaluations': counts, 'ok': max(counts[1:]) <= counts[1] and counts[-1] <= counts[0]}
+
+
+def run_pinned(scenario, items, cycles, pinned, known_first=False):
+    pins = _pinned(pinned)
+    if known_first:
+        # 模拟回填：列表中的文章已全部入库，但还没有高水位记录
+        scenario.db_manager.check_and_add_articles([
+            (urljoin(scenario.target['base_url'], href), title, scenario.target['college'], '通知公告')
+            for title, href in pins + _articles(range(items, 0, -1))
+        ])
+    scenario.cycle(pins + _articles(range(items, 0, -1)))
+    report = {'missed': []}
+    newest = items
+    for _ in range(2):
+        newest += 1
+        _, found = scenario.cycle(pins + _articles(range(newest, 0, -1)))
+        if not any(url.endswith(f"/{newest}.htm") for url in found):
+            report['missed'].append(newest)
+    page = pins + _articles(range(newest, 0, -1))
+    counts = [scenario.cycle(page)[0] for _ in range(cycles)]
+    report['href_evaluations'] = counts
+    # 页面不变时只需扫过置顶区、上一轮的新条目和停止条件
+    report['bound'] = pinned + 1 + HIGH_WATER_STOP_RUN
+    report['ok'] = not report['missed'] and max(counts) <= report['bound']
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="增量解析基准与回归检查")
+    parser.add_argument('--items', type=int, default=20, help="列表中的普通条目数")
+    parser.add_argument('--cycles', type=int, default=5, help="页面不变时的轮数")
+    args = parser.parse_args()
+
+    target = TARGETS_COLLEGE[0]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        scenario = Scenario(tmp, 'steady', target)
+        results['steady'] = run_steady(scenario, args.items, args.cycles)
+        scenario.close()
+        for pinned in (2, HIGH_WATER_STOP_RUN, HIGH_WATER_STOP_RUN + 2):
+            scenario = Scenario(tmp, f'pinned-{pinned}', target)
+            results[f'pinned-{pinned}'] = run_pinned(scenario, args.items, args.cycles, pinned)
+            scenario.close()
+        scenario = Scenario(tmp, 'known-first', target)
+        results['known-first'] = run_pinned(scenario, args.items, args.cycles, HIGH_WATER_STOP_RUN + 2,
+                                            known_first=True)
+        scenario.close()
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    failed = [name for name, report in results.items() if not report['ok']]
+    if failed:
+        print(f"检查失败: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""已见 URL 索引基准
+
+生成含大量合成记录的数据库，测量各索引类型的启动加载时间、内存占用和查询耗时。
+
+使用方法:
+    python -m benchmarks.bench_seen_index            # 默认 100 万行
+    python -m benchmarks.bench_seen_index --rows 200000
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+from bugs.database import DatabaseManager
+
+
+def build_database(path, rows):
+    """生成包含 rows 条合成公告的数据库"""
+    db_manager = DatabaseManager(path, seen_index_mode=None)
+    db_manager.init_db()
+    db_manager.close()
+
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO seen_announcements (url, title, college, category) VALUES (?, ?, ?, ?)",
+        ((f"https://jwch.fzu.edu.cn/info/{i // 1000}/{i}.htm", f"合成通知 {i}", '教务处', '教务通知')
+         for i in range(rows))
+    )
+    conn.commit()
+    conn.close()
+
+
+def measure(path, mode, rows, lookups):
+    """测量一种索引模式的加载时间、内存和查询耗时"""
+    db_manager = DatabaseManager(path, seen_index_mode=mode)
+
+    # tracemalloc 会显著拖慢加载，因此计时和内存分两次测量
+    start = time.perf_counter()
+    if mode:
+        db_manager.load_seen_index()
+    load_seconds = time.perf_counter() - start
+
+    peak = 0
+    if mode:
+        tracemalloc.start()
+        DatabaseManager(path, seen_index_mode=mode).load_seen_index()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    seen_urls = [f"https://jwch.fzu.edu.cn/info/{i // 1000}/{i}.htm" for i in range(0, rows, rows // lookups)]
+    start = time.perf_counter()
+    for url in seen_urls:
+        db_manager.is_article_seen(url)
+    lookup_seconds = time.perf_counter() - start
+
+    # 未见过的 URL：布隆过滤器可直接否定，无需访问 SQLite
+    new_urls = [f"https://jwch.fzu.edu.cn/info/new/{i}.htm" for i in range(len(seen_urls))]
+    start = time.perf_counter()
+    for url in new_urls:
+        db_manager.is_article_seen(url)
+    miss_seconds = time.perf_counter() - start
+
+    result = {
+        'mode': mode or 'sqlite',
+        'load_seconds': round(load_seconds, 3),
+        'load_peak_mb': round(peak / 2 ** 20, 1),
+        'index_mb': round(db_manager.seen_index.memory_bytes() / 2 ** 20, 1) if mode else 0,
+        'seen_lookup_us': round(lookup_seconds / len(seen_urls) * 1e6, 2),
+        'new_lookup_us': round(miss_seconds / len(new_urls) * 1e6, 2),
+    }
+    db_manager.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="已见 URL 索引基准")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="合成记录数")
+    parser.add_argument('--lookups', type=int, default=10_000, help="查询次数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        start = time.perf_counter()
+        build_database(path, args.rows)
+        build_seconds = time.perf_counter() - start
+
+        results = [measure(path, mode, args.rows, args.lookups) for mode in (None, 'hash', 'bloom')]
+
+    print(json.dumps({'rows': args.rows, 'build_seconds': round(build_seconds, 1), 'results': results},
+                     ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""分片爬取基准
+
+把 TARGET_JWC_PAGE 和 TARGETS_COLLEGE 的列表页复制扩展到数百个（路径后加 _<序号>），
+由子进程中的夹具服务器提供，然后分别用 1、2、4 个工作进程（可配置）共享同一个数据库，
+通过租约表（bugs/leases.py）分配目标并连续爬取若干秒。
+
+输出 JSON：每种进程数下的每秒页面数、相对单进程的加速比、各进程持有的目标数，
+以及一致性检查——租约互不重叠且覆盖全部目标、各进程返回的新文章总数等于已见记录数
+（同一篇文章只被通知一次）。
+
+使用方法:
+    python -m benchmarks.bench_sharding
+    python -m benchmarks.bench_sharding --pages 400 --workers 1 2 4 8 --seconds 10 --latency 0.05
+    python -m benchmarks.bench_sharding --new-items 1 --concurrent --output result.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from bugs.circuit_breaker import CircuitBreaker
+from bugs.config import TABLE_NAME, TARGETS_COLLEGE, TARGET_JWC_PAGE
+from bugs.crawler import WebCrawler
+from bugs.database import DatabaseManager
+from bugs.http_client import HttpClient
+from bugs.leases import LeaseManager
+
+from .fixtures import FixtureProcess, HostProfile, localize_targets
+
+
+def expand_targets(targets, pages):
+    """把目标复制到至少 pages 个，副本的路径为 <原路径>_<序号>.<扩展名>"""
+    copies = max(1, math.ceil(pages / len(targets)))
+    expanded = []
+    for i in range(copies):
+        for target in targets:
+            if i == 0:
+                expanded.append(target)
+                continue
+            root, ext = os.path.splitext(target['url'])
+            expanded.append(dict(target, url=f"{root}_{i}{ext}"))
+    return expanded[:max(pages, len(targets))]
+
+
+def _worker(index, targets, port, db_path, args, barrier, results):
+    """单个工作进程：登记、等待全部进程可见后分配租约，然后只爬取自己持有的目标"""
+    targets = localize_targets(targets, port)
+    db_manager = DatabaseManager(db_path, enable_outbox=False)
+    leases = LeaseManager(db_manager, [target['url'] for target in targets], f"bench-{index}",
+                          ttl=args.lease_ttl, heartbeat=args.heartbeat)
+    http_client = HttpClient()
+    breaker = CircuitBreaker()
+    pages = new_articles = cycles = 0
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        leases.register()
+        barrier.wait()
+        leases.start()
+        # 所有进程都完成第一次分配后再平衡一次，让先启动的进程让出多领的目标
+        barrier.wait()
+        leases.rebalance()
+        barrier.wait()
+        owned = sorted(leases.owned())
+
+        start = time.perf_counter()
+        while time.perf_counter() - start < args.seconds:
+            owned_targets = [target for target in targets if leases.owns(target['url'])]
+            crawler = WebCrawler(db_manager, http_client=http_client, breaker=breaker)
+            new_articles += len(crawler.crawl_all_targets(owned_targets, concurrent=args.concurrent))
+            pages += len(owned_targets)
+            cycles += 1
+        elapsed = time.perf_counter() - start
+
+        leases.stop()
+    http_client.close()
+    db_manager.close()
+    results.put({'worker': index, 'owned': owned, 'pages': pages, 'cycles': cycles,
+                 'new_articles': new_articles, 'elapsed': elapsed})
+
+
+def run_workers(count, targets, server, args, directory):
+    """用 count 个工作进程在新数据库上运行一次，返回结果字典"""
+    db_path = os.path.join(directory, f'sharding_{count}.db')
+    db_manager = DatabaseManager(db_path, enable_outbox=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        db_manager.init_db()
+    db_manager.close()
+
+    barrier = multiprocessing.Barrier(count)
+    results = multiprocessing.Queue()
+    requests_before = server.stats()['requests']
+    processes = [
+        multiprocessing.Process(target=_worker, args=(i, targets, server.port, db_path, args, barrier, results),
+                                name=f"BenchWorker-{i}")
+        for i in range(count)
+    ]
+    for process in processes:
+        process.start()
+    workers = sorted((results.get() for _ in processes), key=lambda result: result['worker'])
+    for process in processes:
+        process.join()
+    requests = server.stats()['requests'] - requests_before
+
+    conn = sqlite3.connect(db_path)
+    seen_rows = conn.execute(f"SELECT COUNT(*) FROM {TABLE_NAME}").fetchone()[0]
+    conn.close()
+
+    owned = [url for worker in workers for url in worker['owned']]
+    localized_urls = {target['url'] for target in localize_targets(targets, server.port)}
+    pages = sum(worker['pages'] for worker in workers)
+    new_articles = sum(worker['new_articles'] for worker in workers)
+    wall = max(worker['elapsed'] for worker in workers)
+    return {
+        'workers': count,
+        'pages': pages,
+        'requests': requests,
+        'wall_seconds': round(wall, 4),
+        'pages_per_second': round(pages / wall, 2) if wall else 0.0,
+        'owned_per_worker': [len(worker['owned']) for worker in workers],
+        'cycles_per_worker': [worker['cycles'] for worker in workers],
+        'leases_disjoint': len(owned) == len(set(owned)),
+        'leases_cover_all': set(owned) == localized_urls,
+        'new_articles': new_articles,
+        'seen_rows': seen_rows,
+        'exactly_once': new_articles == seen_rows,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分片爬取基准")
+    parser.add_argument('--pages', type=int, default=300, help="扩展后的列表页数")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help="依次测试的工作进程数")
+    parser.add_argument('--seconds', type=float, default=10, help="每种进程数的爬取时长")
+    parser.add_argument('--concurrent', action='store_true', help="每个进程内使用并发爬取")
+    parser.add_argument('--latency', type=float, default=0.05, help="每次请求的响应延迟（秒）")
+    parser.add_argument('--new-items', type=int, default=0, help="每次请求注入的新文章数")
+    parser.add_argument('--lease-ttl', type=float, default=30, help="租约有效期（秒）")
+    parser.add_argument('--heartbeat', type=float, default=5, help="租约心跳间隔（秒）")
+    parser.add_argument('--output', help="结果写入文件，默认输出到标准输出")
+    args = parser.parse_args()
+
+    targets = expand_targets(TARGET_JWC_PAGE + TARGETS_COLLEGE, args.pages)
+    default_profile = HostProfile(latency=args.latency, new_items=args.new_items)
+    server = FixtureProcess(targets, default_profile=default_profile).start()
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.workers:
+            runs.append(run_workers(count, targets, server, args, tmp))
+    server.stop()
+
+    baseline = runs[0]['pages_per_second']
+    for run in runs:
+        run['speedup'] = round(run['pages_per_second'] / baseline, 2) if baseline else None
+
+    report = {
+        'pages': len(targets),
+        'hosts': len({target['url'].split('/')[2] for target in targets}),
+        'seconds': args.seconds,
+        'concurrent': args.concurrent,
+        'fixture': default_profile.to_dict(),
+        'runs': runs,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
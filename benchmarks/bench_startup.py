@@ -0,0 +1,101 @@
+"""快速单次模式的启动耗时基准
+
+反复以子进程运行 python run_crawler.py --fast --all --timing（使用临时数据库和输出目录），
+统计脚本开始执行到第一个请求交给连接池发送的耗时（run_crawler 自己计时，不含解释器启动，
+首次请求时才做的导入和准备工作都计入），以及整个进程的耗时（含解释器启动和退出）。
+第一次运行需要建表和校验目标，单独列出。
+
+请求经 HTTP(S)_PROXY 发往本机一个只绑定、不监听的端口，连接立即被拒绝：
+不会访问真实站点，也不会因等待网络而拉长进程耗时。
+
+另外测一次“没有到期目标”的运行：先把全部目标记为刚检查过，此时不会加载 requests 和 lxml。
+
+热启动的中位数超过 FAST_START_BUDGET_MS 时以状态码 1 退出，可用于检查启动耗时是否退化。
+
+使用方法:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 20 --output result.json
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from bugs.config import FAST_START_BUDGET_MS, TARGETS_COLLEGE, TARGET_JWC_PAGE
+from bugs.database import DatabaseManager
+
+_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'run_crawler.py')
+_STARTUP_RE = re.compile(r"启动耗时 (\d+) 毫秒")
+
+
+def _run(db_path, *extra, env=None):
+    """运行一次快速模式，返回 (脚本内计时的启动毫秒数或 None, 进程总毫秒数)
+
+    输出目录放在数据库所在的临时目录中，不在仓库里留下 output/。
+    """
+    output_dir = os.path.join(os.path.dirname(db_path), 'output')
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, _SCRIPT, '--fast', '--db', db_path, '--output-dir', output_dir, *extra],
+                            capture_output=True, text=True, check=True, env=env)
+    wall_ms = (time.perf_counter() - started) * 1000
+    match = _STARTUP_RE.search(result.stdout)
+    return (int(match.group(1)) if match else None), wall_ms
+
+
+def _median(values):
+    values = sorted(values)
+    return round(values[len(values) // 2], 1) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="快速单次模式的启动耗时基准")
+    parser.add_argument('--runs', type=int, default=10, help="热启动运行次数")
+    parser.add_argument('--output', help="结果写入文件，默认输出到标准输出")
+    args = parser.parse_args()
+
+    # 只绑定不监听的端口：连接会被立即拒绝，且测量期间不会被其他程序占用
+    refuser = socket.socket()
+    refuser.bind(('127.0.0.1', 0))
+    proxy = f"http://127.0.0.1:{refuser.getsockname()[1]}"
+    env = dict(os.environ, HTTP_PROXY=proxy, HTTPS_PROXY=proxy, NO_PROXY='')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'startup.db')
+        cold_startup, cold_wall = _run(db_path, '--all', '--timing', env=env)
+        warm = [_run(db_path, '--all', '--timing', env=env) for _ in range(args.runs)]
+
+        db_manager = DatabaseManager(db_path, seen_index_mode=None)
+        db_manager.mark_checked([target['url'] for target in TARGET_JWC_PAGE + TARGETS_COLLEGE], time.time())
+        db_manager.close()
+        idle = [_run(db_path)[1] for _ in range(args.runs)]
+    refuser.close()
+
+    warm_startup = _median([startup for startup, _ in warm])
+    report = {
+        'budget_ms': FAST_START_BUDGET_MS,
+        'cold': {'startup_ms': cold_startup, 'process_ms': round(cold_wall, 1)},
+        'warm': {'runs': args.runs,
+                 'startup_ms_median': warm_startup,
+                 'startup_ms_max': max(startup for startup, _ in warm),
+                 'process_ms_median': _median([wall for _, wall in warm])},
+        'nothing_due': {'process_ms_median': _median(idle)},
+        'within_budget': warm_startup <= FAST_START_BUDGET_MS,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    if not report['within_budget']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
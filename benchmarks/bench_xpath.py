@@ -0,0 +1,82 @@
+"""XPath 解析基准
+
+对每个配置目标的夹具页面分别用原始 XPath 字符串和预编译的 etree.XPath 执行
+parse_section 中的列表/标题/链接提取，比较每页耗时。
+
+使用方法:
+    python -m benchmarks.bench_xpath
+    python -m benchmarks.bench_xpath --rounds 500
+"""
+
+import argparse
+import json
+import time
+
+from lxml import html
+
+from bugs.config import TARGETS_COLLEGE, TARGET_JWC_PAGE
+from bugs.targets import TargetRegistry
+
+from .fixtures import FixtureSite, render_page
+
+
+def parse_with_strings(tree, target):
+    """升级前的写法：每次调用都传入 XPath 字符串"""
+    results = []
+    for item in tree.xpath(target['list_xpath']):
+        titles = item.xpath(target['title_xpath'])
+        hrefs = item.xpath(target.get('href_xpath', './a/@href'))
+        results.append((titles[0].strip(), hrefs[0]))
+    return results
+
+
+def parse_with_registry(tree, target, registry):
+    """使用注册表中预编译的 XPath 对象"""
+    title_xpath = registry.xpath(target, 'title_xpath')
+    href_xpath = registry.xpath(target, 'href_xpath')
+    results = []
+    for item in registry.xpath(target, 'list_xpath')(tree):
+        titles = title_xpath(item)
+        hrefs = href_xpath(item)
+        results.append((titles[0].strip(), hrefs[0]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="XPath 解析基准")
+    parser.add_argument('--rounds', type=int, default=200, help="每个页面的重复次数")
+    args = parser.parse_args()
+
+    targets = TARGETS_COLLEGE + TARGET_JWC_PAGE
+    site = FixtureSite(targets)
+    trees = [(page['target'], html.fromstring(render_page(page['target'], page['articles'])))
+             for page in site.pages.values()]
+
+    start = time.perf_counter()
+    registry = TargetRegistry(targets)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    timings = {}
+    for name, parse in (('strings', parse_with_strings),
+                        ('compiled', lambda tree, target: parse_with_registry(tree, target, registry))):
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for target, tree in trees:
+                parse(tree, target)
+        elapsed = time.perf_counter() - start
+        timings[name] = round(elapsed / (args.rounds * len(trees)) * 1e6, 1)
+
+    for target, tree in trees:
+        assert parse_with_strings(tree, target) == parse_with_registry(tree, target, registry)
+
+    print(json.dumps({
+        'pages': len(trees),
+        'distinct_expressions': len(registry),
+        'compile_all_ms': round(compile_ms, 2),
+        'per_page_us': timings,
+        'speedup': round(timings['strings'] / timings['compiled'], 2),
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
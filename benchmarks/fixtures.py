@@ -0,0 +1,477 @@
+"""本地夹具站点
+
+按 bugs/config.py 中每个目标的 XPath 生成结构匹配的列表页面，并用本地 HTTP 服务器
+按 Host 头分发，使爬虫无需校园网即可运行。目标 URL 改写为
+http://<原主机名>:<端口>/<原路径>，再通过 DNS 缓存的覆盖表解析到 127.0.0.1，
+因此按主机区分的连接池、并发限制等逻辑与线上一致。
+
+若提供了录制目录（见 benchmarks/record_fixtures.py），有录制文件的目标直接返回录制的
+原始页面，新文章注入到录制页面的列表开头。每个主机的延迟、带宽、错误率和新文章注入数
+可通过 HostProfile 单独配置。
+"""
+
+import copy
+import html as html_escape
+import multiprocessing
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from lxml import etree, html
+
+from bugs.http_client import get_dns_cache
+
+_STEP_RE = re.compile(r"^(?P<tag>[\w*]+)(?:\[(?P<pred>.*)\])?$")
+_CLASS_EQ_RE = re.compile(r"^@class='(?P<cls>[^']*)'$")
+_CLASS_CONTAINS_RE = re.compile(r"^contains\(@class,\s*'(?P<cls>[^']*)'\)$")
+_INDEX_RE = re.compile(r"^\d+$")
+_HISTORY_RE = re.compile(r"^(?P<listing>.+)/(?P<page>\d+)\.htm$")
+
+# 限速时每次写出的字节数
+_THROTTLE_CHUNK = 4096
+
+# 模拟真实页面中列表以外的导航、页脚和脚本
+_PAGE_HEAD = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<script>var _hmt = _hmt || [];{script}</script></head>
+<body><div class="header"><ul class="nav">{nav}</ul></div>
+<div class="banner"><img src="/images/banner.jpg"></div>
+"""
+_PAGE_TAIL = """<div class="footer"><p>版权所有 福州大学</p>{footer}</div>
+<script>{script}</script></body></html>
+"""
+
+
+def _split_steps(xpath):
+    """将简单 XPath 拆成步骤，忽略方括号内的斜杠"""
+    steps, depth, current = [], 0, ''
+    for ch in xpath:
+        if ch == '[':
+            depth += 1
+        elif ch == ']':
+            depth -= 1
+        if ch == '/' and depth == 0:
+            steps.append(current)
+            current = ''
+        else:
+            current += ch
+    steps.append(current)
+    return [step for step in steps if step not in ('', '.')]
+
+
+def _apply_predicate(element, pred):
+    """让元素满足步骤上的谓词"""
+    if not pred:
+        return
+    match = _CLASS_EQ_RE.match(pred) or _CLASS_CONTAINS_RE.match(pred)
+    if match:
+        element.set('class', match.group('cls'))
+        return
+    # 形如 span[@class='ovh'] 的子元素谓词
+    _ensure_path(element, _split_steps(pred))
+
+
+def _ensure_path(parent, steps):
+    """沿步骤创建（或复用）子元素，返回最后一个元素"""
+    element = parent
+    for step in steps:
+        match = _STEP_RE.match(step)
+        tag, pred = match.group('tag'), match.group('pred')
+        index = 1
+        if pred and _INDEX_RE.match(pred):
+            index, pred = int(pred), None
+        children = [child for child in element if child.tag == tag]
+        while len(children) < index:
+            child = etree.SubElement(element, tag)
+            # 占位兄弟元素（如日期链接）带上内容，更接近真实页面
+            if len(children) < index - 1:
+                child.text = '2024-01-01'
+            children.append(child)
+        element = children[index - 1]
+        _apply_predicate(element, pred)
+    return element
+
+
+def _set_value(item, xpath, value):
+    """按 ./a/@title、./a/text()[1] 之类的相对 XPath 写入属性或文本"""
+    steps = _split_steps(xpath)
+    leaf = steps.pop()
+    element = _ensure_path(item, steps)
+    if leaf.startswith('@'):
+        element.set(leaf[1:], value)
+    else:
+        element.text = value
+        # text()[1] 后面跟一个日期元素，确认只取第一段文本
+        if leaf.startswith('text()['):
+            span = etree.SubElement(element, 'span')
+            span.text = '2024-01-01'
+
+
+def build_item(target, title, href):
+    """生成一个满足目标 title_xpath/href_xpath 的列表项元素"""
+    steps = _split_steps(target['list_xpath'])
+    match = _STEP_RE.match(steps[-1])
+    item = etree.Element(match.group('tag'))
+    _apply_predicate(item, match.group('pred'))
+    _set_value(item, target.get('href_xpath', './a/@href'), href)
+    _set_value(item, target['title_xpath'], title)
+    return item
+
+
+def build_container(target):
+    """生成列表项的祖先容器，返回 (最外层元素, 直接父元素)"""
+    steps = _split_steps(target['list_xpath'])[:-1]
+    root = etree.Element('div', {'class': 'main'})
+    parent = _ensure_path(root, steps)
+    return root, parent
+
+
+def render_page(target, articles, padding=40, pager=''):
+    """渲染完整列表页面
+
+    参数:
+        target: 目标配置字典
+        articles: (title, href) 列表，最新的在前
+        padding: 导航和页脚的链接数，模拟列表以外的页面内容
+        pager: 列表后的分页链接 HTML
+
+    返回:
+        UTF-8 编码的页面字节串
+    """
+    root, parent = build_container(target)
+    for title, href in articles:
+        parent.append(build_item(target, title, href))
+    body = etree.tostring(root, encoding='unicode', method='html')
+
+    nav = ''.join(f'<li><a href="/nav/{i}.htm">栏目{i}</a></li>' for i in range(padding))
+    footer = ''.join(f'<a href="/links/{i}.htm">友情链接{i}</a>' for i in range(padding))
+    script = 'var x = 0;' * padding
+    page = (_PAGE_HEAD.format(title=html_escape.escape(target['college']), nav=nav, script=script)
+            + body + pager + _PAGE_TAIL.format(footer=footer, script=script))
+    return page.encode('utf-8')
+
+
+def verify_page(target, content, expected):
+    """用目标自己的 XPath 解析生成的页面，确认能取回全部条目"""
+    tree = html.fromstring(content)
+    items = tree.xpath(target['list_xpath'])
+    got = []
+    for item in items:
+        titles = item.xpath(target['title_xpath'])
+        hrefs = item.xpath(target.get('href_xpath', './a/@href'))
+        got.append((titles[0].strip(), hrefs[0]))
+    if got != list(expected):
+        raise AssertionError(f"夹具页面与目标 XPath 不匹配: {target['college']} {target['url']}")
+
+
+def recorded_path(directory, url):
+    """录制文件路径：<目录>/<主机名>/<原路径>"""
+    parts = urlsplit(url)
+    return os.path.join(directory, parts.hostname, parts.path.lstrip('/') or 'index.html')
+
+
+class HostProfile:
+    """单个主机的模拟网络条件
+
+    参数:
+        latency: 返回响应头之前的延迟（秒）
+        bandwidth: 响应体发送速率（字节/秒），None 表示不限速
+        error_rate: 返回 503 的概率
+        new_items: 每次请求前为该主机的页面注入的新文章数
+    """
+
+    def __init__(self, latency=0.0, bandwidth=None, error_rate=0.0, new_items=0):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.new_items = new_items
+
+    @classmethod
+    def from_dict(cls, config):
+        return cls(**config)
+
+    def to_dict(self):
+        return {'latency': self.latency, 'bandwidth': self.bandwidth,
+                'error_rate': self.error_rate, 'new_items': self.new_items}
+
+
+class FixtureSite:
+    """夹具站点数据：每个目标一份文章列表，可按请求注入新文章
+
+    参数:
+        targets: 目标配置列表（原始线上 URL）
+        items_per_page: 每个列表页的条目数
+        new_items_per_request: 未单独配置的主机每次请求前注入的新文章数
+        profiles: {主机名: HostProfile}，按主机覆盖网络条件
+        default_profile: 未单独配置的主机使用的 HostProfile
+        recorded_dir: 录制页面目录，有录制文件的目标返回录制内容
+        seed: 错误注入使用的随机种子，保证多次运行结果可比
+        history_pages: 每个目标的历史分页数，按博达站群的格式提供 <列表>/N.htm（N 从最旧的 1 开始），
+            列表首页带指向这些分页的“下页”“尾页”链接
+    """
+
+    def __init__(self, targets, items_per_page=20, new_items_per_request=0, profiles=None,
+                 default_profile=None, recorded_dir=None, seed=0, history_pages=0):
+        self.items_per_page = items_per_page
+        self.history_pages = history_pages
+        self.profiles = dict(profiles or {})
+        self.default_profile = default_profile or HostProfile(new_items=new_items_per_request)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'bytes': 0}
+        self.pages = {}
+        for target in targets:
+            parts = urlsplit(target['url'])
+            key = (parts.hostname, parts.path)
+            # rendered: 渲染结果缓存，注入新文章时失效，避免服务器在多进程基准中成为瓶颈
+            self.pages[key] = {'target': target, 'counter': 0, 'articles': [], 'recorded': None,
+                               'rendered': None}
+            if recorded_dir and os.path.exists(recorded_path(recorded_dir, target['url'])):
+                with open(recorded_path(recorded_dir, target['url']), 'rb') as f:
+                    self.pages[key]['recorded'] = f.read()
+            else:
+                self._add_articles(key, items_per_page)
+
+    def profile(self, host):
+        """返回主机的网络条件"""
+        return self.profiles.get(host, self.default_profile)
+
+    def _add_articles(self, key, count):
+        page = self.pages[key]
+        slug = page['target']['url'].rsplit('/', 1)[-1].split('.')[0]
+        for _ in range(count):
+            page['counter'] += 1
+            n = page['counter']
+            page['articles'].insert(0, (f"{page['target']['college']}关于{slug}的通知（第{n}号）",
+                                        f"info/{slug}/{n}.htm"))
+        del page['articles'][self.items_per_page:]
+        page['rendered'] = None
+
+    def should_fail(self, host):
+        """按主机错误率决定本次请求是否返回错误，并计入统计"""
+        error_rate = self.profile(host).error_rate
+        with self._lock:
+            self.stats['requests'] += 1
+            if error_rate and self._random.random() < error_rate:
+                self.stats['errors'] += 1
+                return True
+        return False
+
+    def _pager(self, target):
+        if not self.history_pages:
+            return ''
+        slug = os.path.splitext(target['url'].rsplit('/', 1)[-1])[0]
+        return (f'<div class="pb_sys_common"><span>共{self.history_pages + 1}页 1/{self.history_pages + 1}</span>'
+                f'<a href="{slug}/{self.history_pages}.htm" class="Next">下页</a>'
+                f'<a href="{slug}/1.htm" class="Next">尾页</a></div>')
+
+    def render_history(self, host, path):
+        """返回历史分页的页面字节串，不是历史分页时返回 None
+
+        第 N 页是第 (N-1)*items_per_page+1 到 N*items_per_page 号历史通知，每页内新的在前。
+        """
+        match = _HISTORY_RE.match(path)
+        if not match or not self.history_pages:
+            return None
+        page = self.pages.get((host, match.group('listing') + '.htm'))
+        number = int(match.group('page'))
+        if page is None or not 1 <= number <= self.history_pages:
+            return None
+        target = page['target']
+        slug = os.path.splitext(target['url'].rsplit('/', 1)[-1])[0]
+        first = (number - 1) * self.items_per_page + 1
+        articles = [(f"{target['college']}关于{slug}的历史通知（第{n}号）", f"info/{slug}/h{n}.htm")
+                    for n in range(first + self.items_per_page - 1, first - 1, -1)]
+        return render_page(target, articles)
+
+    def render(self, host, path):
+        """返回页面字节串，未知路径返回 None"""
+        key = (host, path)
+        if key not in self.pages:
+            # 历史分页内容固定，不需要加锁
+            return self.render_history(host, path)
+        with self._lock:
+            page = self.pages[key]
+            new_items = self.profile(host).new_items
+            if new_items:
+                self._add_articles(key, new_items)
+            rendered = page['rendered']
+            articles = list(page['articles'])
+        if rendered is not None:
+            return rendered
+        if page['recorded'] is not None:
+            rendered = _inject_recorded(page['target'], page['recorded'], articles)
+        else:
+            rendered = render_page(page['target'], articles, pager=self._pager(page['target']))
+        with self._lock:
+            # 渲染期间若又注入了新文章，缓存已失效，不能写回旧结果
+            if page['articles'] == articles:
+                page['rendered'] = rendered
+        return rendered
+
+    def content_type(self, host, path):
+        """录制页面不声明字符集，与真实服务器一样交给页面内的 <meta> 决定"""
+        page = self.pages.get((host, path))
+        if page is not None and page['recorded'] is not None:
+            return 'text/html'
+        return 'text/html; charset=utf-8'
+
+    def record_sent(self, count):
+        with self._lock:
+            self.stats['bytes'] += count
+
+    def verify(self):
+        """校验所有目标的夹具页面都能被其 XPath 正确解析"""
+        for page in self.pages.values():
+            if page['recorded'] is not None:
+                if not html.fromstring(page['recorded']).xpath(page['target']['list_xpath']):
+                    raise AssertionError(f"录制页面中找不到列表: {page['target']['college']} {page['target']['url']}")
+                continue
+            verify_page(page['target'], render_page(page['target'], page['articles']), page['articles'])
+
+
+def _inject_recorded(target, recorded, articles):
+    """把注入的新文章插到录制页面列表的最前面，没有注入时原样返回"""
+    if not articles:
+        return recorded
+    tree = html.document_fromstring(recorded)
+    items = tree.xpath(target['list_xpath'])
+    if not items:
+        return recorded
+    first = items[0]
+    for title, href in articles:
+        first.addprevious(build_item(target, title, href))
+    encoding = tree.getroottree().docinfo.encoding or 'utf-8'
+    return etree.tostring(tree, encoding=encoding, method='html', doctype=tree.getroottree().docinfo.doctype)
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        site = self.server.site
+        host = (self.headers.get('Host') or '').split(':')[0]
+        profile = site.profile(host)
+        if profile.latency:
+            time.sleep(profile.latency)
+        if site.should_fail(host):
+            self.send_error(503)
+            return
+        path = self.path.split('?')[0]
+        body = site.render(host, path)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', site.content_type(host, path))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if profile.bandwidth:
+            for start in range(0, len(body), _THROTTLE_CHUNK):
+                chunk = body[start:start + _THROTTLE_CHUNK]
+                self.wfile.write(chunk)
+                time.sleep(len(chunk) / profile.bandwidth)
+        else:
+            self.wfile.write(body)
+        site.record_sent(len(body))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """在后台线程运行的夹具 HTTP 服务器
+
+    参数:
+        site: FixtureSite 实例
+        port: 监听端口，0 表示自动分配
+    """
+
+    def __init__(self, site, port=0):
+        self.site = site
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), _FixtureHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.site = site
+        self.port = self.httpd.server_address[1]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="FixtureServer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def localize(self, targets):
+        """把目标改写为指向本服务器的副本，并把主机名解析到 127.0.0.1"""
+        return localize_targets(targets, self.port)
+
+
+def localize_targets(targets, port):
+    """把目标改写为指向本机 port 端口的副本，并把主机名解析到 127.0.0.1"""
+    dns_cache = get_dns_cache()
+    localized = []
+    for target in targets:
+        target = copy.deepcopy(target)
+        for key in ('url', 'base_url'):
+            parts = urlsplit(target[key])
+            dns_cache.overrides[parts.hostname] = '127.0.0.1'
+            target[key] = f"http://{parts.hostname}:{port}{parts.path}"
+        localized.append(target)
+    return localized
+
+
+def _serve_in_process(site_kwargs, conn):
+    server = FixtureServer(FixtureSite(**site_kwargs)).start()
+    conn.send(server.port)
+    while True:
+        command = conn.recv()
+        if command == 'stats':
+            with server.site._lock:
+                conn.send(dict(server.site.stats))
+        elif command == 'stop':
+            server.stop()
+            conn.send(None)
+            return
+
+
+class FixtureProcess:
+    """在子进程中运行的夹具服务器
+
+    服务器的 CPU 和内存不计入基准进程，测得的资源占用只包含爬虫本身。
+
+    参数:
+        与 FixtureSite 相同
+    """
+
+    def __init__(self, targets, **site_kwargs):
+        self._site_kwargs = dict(site_kwargs, targets=targets)
+        self._conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_serve_in_process, args=(self._site_kwargs, child_conn), name="FixtureProcess", daemon=True
+        )
+        self.port = None
+
+    def start(self):
+        self._process.start()
+        self.port = self._conn.recv()
+        return self
+
+    def stats(self):
+        """返回服务器收到的请求数、注入的错误数和发送的字节数"""
+        self._conn.send('stats')
+        return self._conn.recv()
+
+    def stop(self):
+        self._conn.send('stop')
+        self._conn.recv()
+        self._process.join()
+
+    def localize(self, targets):
+        """把目标改写为指向本服务器的副本，并把主机名解析到 127.0.0.1"""
+        return localize_targets(targets, self.port)
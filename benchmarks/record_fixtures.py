@@ -0,0 +1,48 @@
+"""录制真实列表页面，供离线基准回放
+
+需要校园网或 VPN。每个目标的原始响应字节保存到 <目录>/<主机名>/<原路径>，
+之后用 python -m benchmarks.bench_crawl --recorded <目录> 回放。
+
+使用方法:
+    python -m benchmarks.record_fixtures
+    python -m benchmarks.record_fixtures --output benchmarks/recorded
+"""
+
+import argparse
+import os
+
+import requests
+
+from bugs.config import TARGETS_COLLEGE, TARGET_JWC_PAGE
+from bugs.http_client import HttpClient
+
+from .fixtures import recorded_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="录制真实列表页面")
+    parser.add_argument('--output', default=os.path.join('benchmarks', 'recorded'), help="录制目录")
+    args = parser.parse_args()
+
+    http_client = HttpClient()
+    saved = failed = 0
+    for target in TARGET_JWC_PAGE + TARGETS_COLLEGE:
+        try:
+            response = http_client.get(target['url'])
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"录制失败 {target['url']}: {e}")
+            failed += 1
+            continue
+        path = recorded_path(args.output, target['url'])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(response.content)
+        saved += 1
+        print(f"已录制 {target['college']}: {path}")
+    http_client.close()
+    print(f"共录制 {saved} 个页面，失败 {failed} 个")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""数据库并发写入压力测试
+
+对本地夹具站点同时运行学院监控和教务处监控（不休眠、每次请求都注入新文章），
+共享一个 DatabaseManager，统计锁错误次数和写入延迟。
+
+使用方法:
+    python -m benchmarks.stress_db
+    python -m benchmarks.stress_db --seconds 60 --new-items 3
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from bugs.config import TARGETS_COLLEGE, TARGET_JWC_PAGE
+from bugs.crawler import WebCrawler
+from bugs.database import DatabaseManager
+from bugs.http_client import HttpClient
+
+from .fixtures import FixtureServer, FixtureSite
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run_monitor(name, targets, db_manager, http_client, stop_at, results):
+    """模拟监控线程：不休眠地循环爬取，记录每次批量入库的耗时和错误"""
+    stats = results[name] = {'cycles': 0, 'new_articles': 0, 'lock_errors': 0, 'other_errors': 0,
+                             'write_latencies': []}
+    original = db_manager.check_and_add_articles
+
+    while time.monotonic() < stop_at:
+        crawler = WebCrawler(db_manager, http_client=http_client)
+
+        def timed_batch(rows):
+            start = time.perf_counter()
+            try:
+                return original(rows)
+            finally:
+                stats['write_latencies'].append(time.perf_counter() - start)
+
+        # 只在本线程的爬虫实例上计时，不影响另一个监控
+        crawler.db_manager = _TimedManager(db_manager, timed_batch)
+        try:
+            articles = crawler.crawl_all_targets(targets, concurrent=False)
+            stats['new_articles'] += len(articles)
+        except sqlite3.OperationalError as e:
+            key = 'lock_errors' if 'locked' in str(e) else 'other_errors'
+            stats[key] += 1
+        except Exception:
+            stats['other_errors'] += 1
+        stats['cycles'] += 1
+
+
+class _TimedManager:
+    """把 check_and_add_articles 替换为计时版本的代理"""
+
+    def __init__(self, db_manager, timed_batch):
+        self._db_manager = db_manager
+        self.check_and_add_articles = timed_batch
+
+    def __getattr__(self, name):
+        return getattr(self._db_manager, name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数据库并发写入压力测试")
+    parser.add_argument('--seconds', type=float, default=20, help="运行时长")
+    parser.add_argument('--new-items', type=int, default=2, help="每次请求注入的新文章数")
+    args = parser.parse_args()
+
+    site = FixtureSite(TARGETS_COLLEGE + TARGET_JWC_PAGE, new_items_per_request=args.new_items)
+    server = FixtureServer(site).start()
+    http_client = HttpClient()
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager = DatabaseManager(os.path.join(tmp, 'stress.db'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            db_manager.init_db()
+            stop_at = time.monotonic() + args.seconds
+            threads = [
+                threading.Thread(target=run_monitor, args=(name, server.localize(targets), db_manager,
+                                                           http_client, stop_at, results))
+                for name, targets in (('college', TARGETS_COLLEGE), ('jwc', TARGET_JWC_PAGE))
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        writer_stats = db_manager.get_writer_stats()
+        db_manager.close()
+    server.stop()
+
+    report = {'seconds': args.seconds, 'writer': writer_stats, 'monitors': {}}
+    for name, stats in results.items():
+        latencies = stats.pop('write_latencies')
+        stats['batches'] = len(latencies)
+        stats['write_p50_ms'] = round(_percentile(latencies, 50) * 1000, 2)
+        stats['write_p99_ms'] = round(_percentile(latencies, 99) * 1000, 2)
+        stats['write_max_ms'] = round(max(latencies, default=0) * 1000, 2)
+        report['monitors'][name] = stats
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
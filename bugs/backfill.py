@@ -0,0 +1,237 @@
+"""历史回填模块 - 沿列表分页抓取旧通知并批量写入已见表
+
+博达站群（VSB）的列表首页为 tzgg.htm，更早的分页为 tzgg/N.htm，N 从最旧的 1 开始编号，
+首页的“下页”链接指向最大的 N。规划时抓取首页，按其中的分页链接得到全部分页，
+每个分页在数据库中记录完成状态；中断后再次回填只抓取尚未完成的分页。
+
+分页在线程池中并行抓取，按主机限制并发数和每秒请求数。回填的文章只写入已见表
+（和全文索引），不写入通知发件箱、不触发提交回调，因此不会发出通知。
+"""
+
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from urllib.parse import urljoin, urlsplit
+
+from .config import (
+    BACKFILL_MAX_WORKERS,
+    BACKFILL_MAX_PER_HOST,
+    BACKFILL_RATE_PER_HOST,
+    BACKFILL_MAX_ATTEMPTS
+)
+from .crawler import WebCrawler
+from .encoding import get_encoding_resolver, parse_html
+from .http_client import HttpClient
+from .output import locked_print
+from .targets import get_target_registry
+
+
+class HostRateLimiter:
+    """按主机限制并发数和请求速率（线程安全）
+
+    参数:
+        rate: 每个主机每秒最多发出的请求数，0 表示不限
+        max_per_host: 每个主机同时进行的请求数
+    """
+
+    def __init__(self, rate=BACKFILL_RATE_PER_HOST, max_per_host=BACKFILL_MAX_PER_HOST):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._slots = defaultdict(lambda: threading.BoundedSemaphore(max(1, max_per_host)))
+        self._next = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, url):
+        """占用主机的一个并发名额，并等到该主机的下一个发送时刻"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            semaphore = self._slots[host]
+        with semaphore:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next.get(host, now))
+                self._next[host] = start + self.interval
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+
+def history_pages(listing_url, root):
+    """从列表首页的分页链接得到全部历史分页
+
+    参数:
+        listing_url: 列表首页 URL（如 .../tzgg.htm）
+        root: 列表首页的文档根元素
+
+    返回: [(分页 URL, 页码)]，由新到旧；没有分页时为空列表
+    """
+    stem = os.path.splitext(listing_url)[0]
+    pattern = re.compile(re.escape(stem) + r"/(\d+)\.htm$")
+    last = 0
+    for href in root.xpath('//a/@href'):
+        match = pattern.match(urljoin(listing_url, href.strip()))
+        if match:
+            last = max(last, int(match.group(1)))
+    return [(f"{stem}/{n}.htm", n) for n in range(last, 0, -1)]
+
+
+class Backfiller:
+    """并行回填历史通知
+
+    参数:
+        db_manager: 数据库管理器实例
+        http_client: 使用的 HTTP 客户端，未指定时自建一个
+        print_lock: 打印锁
+        max_workers: 同时抓取的分页数
+        limiter: 按主机的限速器，未指定时按配置创建
+        registry: 目标注册表，未指定时使用进程级共享实例
+    """
+
+    def __init__(self, db_manager, http_client=None, print_lock=None, max_workers=BACKFILL_MAX_WORKERS,
+                 limiter=None, registry=None):
+        self.db_manager = db_manager
+        self.http = http_client or HttpClient()
+        self._owns_http = http_client is None
+        self.print_lock = print_lock
+        self.max_workers = max(1, max_workers)
+        self.limiter = limiter or HostRateLimiter()
+        self.registry = registry or get_target_registry()
+        self.encodings = get_encoding_resolver()
+        # 只借用爬虫的列表项解析，保证回填与日常爬取得到相同的 URL
+        self._crawler = WebCrawler(db_manager, print_lock, http_client=self.http, registry=self.registry)
+        self._stop = threading.Event()
+
+    def _print(self, *args, **kwargs):
+        locked_print(self.print_lock, *args, **kwargs)
+
+    def stop(self):
+        """停止回填，进行中的分页完成后退出"""
+        self._stop.set()
+
+    def close(self):
+        if self._owns_http:
+            self.http.close()
+
+    def _fetch(self, url):
+        """抓取并解析一个页面，页面不存在（404）时返回 None"""
+        with self.limiter.slot(url):
+            response = self.http.get(url)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        content = response.content
+        return parse_html(content, self.encodings.resolve(url, content, response.headers.get('Content-Type')))
+
+    def _extract(self, root, target):
+        items = self.registry.xpath(target, 'list_xpath')(root)
+        return self._crawler._collect_all(items, target)
+
+    def plan(self, target, replan=False):
+        """规划目标的分页（已规划过且 replan 为 False 时沿用已有计划）
+
+        规划时已抓取的列表首页直接写入，不再重复抓取。
+
+        返回: 分页总数（含列表首页）
+        """
+        pages = self.db_manager.get_backfill_pages(target['url'])
+        if pages is not None and not replan:
+            return pages
+        root = self._fetch(target['url'])
+        if root is None:
+            raise ValueError(f"列表首页不存在: {target['url']}")
+        pages = [(target['url'], 0)] + history_pages(target['url'], root)
+        self.db_manager.save_backfill_plan(target['url'], pages)
+        self.db_manager.complete_backfill_page(target['url'], self._extract(root, target))
+        return len(pages)
+
+    def _backfill_page(self, target, page_url):
+        """抓取并写入一个分页，失败时按指数退避重试
+
+        返回: (条目数, 新写入数)，放弃或已停止时返回 None
+        """
+        error = None
+        for attempt in range(BACKFILL_MAX_ATTEMPTS):
+            if self._stop.is_set():
+                return None
+            try:
+                root = self._fetch(page_url)
+                rows = [] if root is None else self._extract(root, target)
+                return len(rows), self.db_manager.complete_backfill_page(page_url, rows)
+            except Exception as e:
+                error = str(e)
+                self._stop.wait(2 ** attempt)
+        if not self._stop.is_set():
+            self.db_manager.fail_backfill_page(page_url, error)
+            self._print(f"  -> 警告: 分页抓取失败 {BACKFILL_MAX_ATTEMPTS} 次，留待下次回填: {page_url}: {error}")
+        return None
+
+    def run(self, targets, max_pages=None, replan=False, progress_seconds=5):
+        """回填一组目标
+
+        参数:
+            targets: 目标配置列表
+            max_pages: 每个目标本次最多抓取的分页数（由新到旧），None 表示不限
+            replan: 是否重新抓取列表首页规划分页
+            progress_seconds: 输出进度的间隔（秒），None 表示不输出
+
+        返回: 统计字典（分页数、条目数、新写入数、失败数、耗时、每秒分页数、是否被中断）
+        """
+        stats = {'pages': 0, 'items': 0, 'added': 0, 'failed': 0, 'planned_targets': 0}
+        started = time.perf_counter()
+        interrupted = False
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="Backfill")
+        try:
+            # 规划本身也要抓取列表首页，各目标并行进行
+            planned = {pool.submit(self.plan, target, replan): target for target in targets}
+            queues = defaultdict(list)
+            for future, target in planned.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    self._print(f"  -> 警告: 无法规划 {target['college']} {target['url']}: {e}")
+                    stats['failed'] += 1
+                    continue
+                stats['planned_targets'] += 1
+                pending = self.db_manager.get_pending_backfill_pages(target['url'])[:max_pages]
+                queues[urlsplit(target['url']).netloc].extend((target, page_url) for page_url, _ in pending)
+
+            # 各主机的分页轮流提交，所有主机同时推进，不会让工作线程都排在同一个主机的限速上
+            order = []
+            while any(queues.values()):
+                for host in list(queues):
+                    if queues[host]:
+                        order.append(queues[host].pop(0))
+            running = {pool.submit(self._backfill_page, target, page_url) for target, page_url in order}
+            total = len(running)
+            last_report = time.monotonic()
+            while running:
+                done, running = wait(running, timeout=progress_seconds or None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if result is None:
+                        if not self._stop.is_set():
+                            stats['failed'] += 1
+                        continue
+                    stats['pages'] += 1
+                    stats['items'] += result[0]
+                    stats['added'] += result[1]
+                if progress_seconds and time.monotonic() - last_report >= progress_seconds:
+                    last_report = time.monotonic()
+                    elapsed = time.perf_counter() - started
+                    self._print(f"已完成 {stats['pages']}/{total} 页，新增 {stats['added']} 条，"
+                                f"{stats['pages'] / elapsed:.1f} 页/秒")
+        except KeyboardInterrupt:
+            interrupted = True
+            self.stop()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        elapsed = time.perf_counter() - started
+        stats['elapsed_seconds'] = round(elapsed, 3)
+        stats['pages_per_second'] = round(stats['pages'] / elapsed, 2) if elapsed else 0.0
+        stats['interrupted'] = interrupted or self._stop.is_set()
+        return stats
@@ -0,0 +1,44 @@
+"""爬取预算模块 - 限制一轮爬取的总耗时"""
+
+import time
+
+from .config import MIN_REQUEST_TIMEOUT
+
+
+class CycleBudget:
+    """一轮爬取的时间预算
+
+    从创建时开始计时。剩余时间不足 min_timeout 时视为耗尽，不再发起新请求；
+    已发起的请求超时时间不超过剩余时间。
+
+    参数:
+        seconds: 本轮预算（秒）
+        min_timeout: 发起一个请求至少需要的剩余时间（秒），不超过预算的一半
+    """
+
+    def __init__(self, seconds, min_timeout=MIN_REQUEST_TIMEOUT):
+        self.seconds = seconds
+        # 预算本身很短时仍允许发起请求，否则每轮都会直接判定为耗尽
+        self.min_timeout = min(min_timeout, seconds / 2)
+        self.started = time.monotonic()
+        self.deadline = self.started + seconds
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def remaining(self):
+        return self.deadline - time.monotonic()
+
+    def expired(self):
+        """剩余时间是否已不足以发起新请求"""
+        return self.remaining() < self.min_timeout
+
+    def used_ratio(self):
+        """已用预算比例，超支时大于 1"""
+        return self.elapsed() / self.seconds if self.seconds else 0.0
+
+    def request_timeout(self, timeout):
+        """按剩余时间收紧 (连接超时, 读取超时)"""
+        remaining = max(self.min_timeout, self.remaining())
+        connect_timeout, read_timeout = timeout
+        return min(connect_timeout, remaining), min(read_timeout, remaining)
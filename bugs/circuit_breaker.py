@@ -0,0 +1,158 @@
+"""熔断模块 - 按主机跟踪请求失败，跳过持续不可用的站点
+
+连续超时、连接失败或 5xx 达到阈值后熔断（open），期间对该主机的请求直接跳过；
+熔断时间到期后进入半开（half_open）状态，只放行一个试探请求：
+成功则恢复（closed），失败则再次熔断，熔断时间按指数增长。
+"""
+
+import math
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+from .config import (
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_BASE_SECONDS,
+    CIRCUIT_BREAKER_MAX_SECONDS
+)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(requests.RequestException):
+    """主机处于熔断状态，请求被跳过"""
+
+
+class _HostState:
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.open_until = 0.0
+        self.skipped = 0
+        self.last_error = None
+
+
+class CircuitBreaker:
+    """按主机的熔断器（线程安全）
+
+    参数:
+        failure_threshold: 连续失败多少次后熔断
+        base_seconds: 第一次熔断的时长（秒），之后每次试探失败翻倍
+        max_seconds: 熔断时长上限（秒）
+    """
+
+    def __init__(self, failure_threshold=CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                 base_seconds=CIRCUIT_BREAKER_BASE_SECONDS, max_seconds=CIRCUIT_BREAKER_MAX_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.base_seconds = base_seconds
+        self.max_seconds = max_seconds
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState()
+        return state
+
+    def before_request(self, host):
+        """请求前检查，主机熔断中时抛出 CircuitOpenError
+
+        返回: 状态变化时返回新状态（进入半开），否则返回 None
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._host(host)
+            if state.state == CLOSED:
+                return None
+            if state.state == OPEN and now >= state.open_until:
+                state.state = HALF_OPEN
+                return HALF_OPEN
+            state.skipped += 1
+            if state.state == HALF_OPEN:
+                raise CircuitOpenError(f"主机 {host} 正在试探恢复，本次跳过")
+            raise CircuitOpenError(f"主机 {host} 已熔断，{math.ceil(state.open_until - now)} 秒后重试")
+
+    def record_success(self, host):
+        """记录一次成功请求
+
+        返回: 从半开恢复时返回 CLOSED，否则返回 None
+        """
+        with self._lock:
+            state = self._host(host)
+            changed = state.state != CLOSED
+            state.state = CLOSED
+            state.failures = 0
+            state.trips = 0
+            state.last_error = None
+            return CLOSED if changed else None
+
+    def record_failure(self, host, error):
+        """记录一次失败请求
+
+        返回: 因此熔断时返回 OPEN，否则返回 None
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._host(host)
+            state.failures += 1
+            state.last_error = str(error)
+            if state.state == OPEN:
+                # 熔断前已经发出的请求，失败不再延长熔断时间
+                return None
+            if state.state == CLOSED and state.failures < self.failure_threshold:
+                return None
+            state.trips += 1
+            state.state = OPEN
+            state.open_until = now + self.open_seconds(state.trips)
+            return OPEN
+
+    def open_seconds(self, trips):
+        """第 trips 次熔断的时长"""
+        return min(self.max_seconds, self.base_seconds * 2 ** (trips - 1))
+
+    def get_state(self, host):
+        """返回单个主机的状态字典"""
+        with self._lock:
+            return self._describe(host, self._host(host))
+
+    def snapshot(self, include_closed=False):
+        """返回各主机的熔断状态，默认只包含未处于正常状态的主机"""
+        with self._lock:
+            return {
+                host: self._describe(host, state)
+                for host, state in self._hosts.items()
+                if include_closed or state.state != CLOSED
+            }
+
+    def _describe(self, host, state):
+        retry_in = max(0.0, state.open_until - time.monotonic()) if state.state == OPEN else 0.0
+        return {
+            'host': host,
+            'state': state.state,
+            'failures': state.failures,
+            'trips': state.trips,
+            'skipped': state.skipped,
+            'retry_in': round(retry_in, 1),
+            'retry_at': datetime.fromtimestamp(time.time() + retry_in).strftime('%H:%M:%S')
+            if state.state == OPEN else None,
+            'last_error': state.last_error,
+        }
+
+
+_default_breaker = None
+_default_lock = threading.Lock()
+
+
+def get_circuit_breaker():
+    """获取进程级共享熔断器"""
+    global _default_breaker
+    with _default_lock:
+        if _default_breaker is None:
+            _default_breaker = CircuitBreaker()
+        return _default_breaker
@@ -3,6 +3,49 @@
 # 数据库配置
 DB_NAME = "announcements.db"
 TABLE_NAME = "seen_announcements"
+VALIDATOR_TABLE_NAME = "page_validators"  # 各目标页面的 ETag/Last-Modified
+FINGERPRINT_TABLE_NAME = "list_fingerprints"  # 各目标列表区域的指纹
+HIGH_WATER_TABLE_NAME = "high_water_marks"  # 各目标上一轮扫描过的列表头部
+OUTBOX_TABLE_NAME = "notification_outbox"  # 待投递的 webhook 通知
+CYCLE_TABLE_NAME = "crawl_cycles"  # 每轮爬取的耗时与预算使用情况
+SNAPSHOT_TABLE_NAME = "page_snapshots"  # 页面快照索引
+LEASE_TABLE_NAME = "target_leases"  # 分片模式下各目标的归属与租约到期时间
+WORKER_TABLE_NAME = "crawl_workers"  # 分片模式下存活的工作进程
+TARGET_CHECK_TABLE_NAME = "target_checks"  # 单次运行模式下各目标的上次检查时间
+DETAIL_JOB_TABLE_NAME = "detail_jobs"  # 待抓取详情页的新文章
+DETAIL_TABLE_NAME = "article_details"  # 文章正文
+ATTACHMENT_TABLE_NAME = "attachments"  # 按内容摘要去重的附件文件
+ARTICLE_ATTACHMENT_TABLE_NAME = "article_attachments"  # 文章与附件的对应关系
+BACKFILL_TARGET_TABLE_NAME = "backfill_targets"  # 历史回填：各目标的分页计划
+BACKFILL_PAGE_TABLE_NAME = "backfill_pages"  # 历史回填：每个分页的完成状态（断点）
+SEARCH_TABLE_NAME = "announcement_search"  # 标题和正文全文索引（FTS5，中文按相邻两字切分）
+ENABLE_TITLE_SEARCH = True  # SQLite 未编译 FTS5 时自动关闭
+SEARCH_TITLE_WEIGHT = 4.0   # 按相关度排序时标题中命中的权重（正文中命中为 1）
+
+# 页面快照存档（按内容寻址，相同页面只存一份，可用 replay_snapshots.py 离线重放）
+ENABLE_SNAPSHOTS = False
+SNAPSHOT_DIR = "snapshots"
+SNAPSHOT_COMPRESSION = 'zstd'  # 'zstd'（需安装 zstandard，否则退回 gzip）或 'gzip'
+
+# 新文章输出: 'jsonl'（追加写入按大小/时间轮转的 JSONL 流，每条带递增序号）、'text'（每轮一个 txt 文件）或 None
+OUTPUT_SINK = 'jsonl'
+OUTPUT_DIR = "output"
+OUTPUT_ROTATE_BYTES = 16 * 1024 * 1024   # 当前分段超过该大小后轮转
+OUTPUT_ROTATE_SECONDS = 24 * 60 * 60     # 当前分段写入超过该时长后轮转
+OUTPUT_COMPRESS_ROTATED = True           # 轮转后的分段压缩为 .jsonl.gz
+OUTPUT_LOCK_TIMEOUT_SECONDS = 30        # 输出目录被其他进程占用时最多等待的秒数，超时报错
+
+# SQLite 配置（WAL 模式，所有写操作经由单写线程合并提交）
+SQLITE_SYNCHRONOUS = 'NORMAL'     # WAL 模式下 NORMAL 仍能保证数据库一致性
+SQLITE_CACHE_SIZE_KB = 8192       # 每个连接的页缓存大小
+SQLITE_BUSY_TIMEOUT_MS = 5000     # 遇到锁时的最长等待时间
+WRITER_BATCH_SIZE = 64            # 单个事务最多合并的写操作数
+WRITER_COMMIT_DELAY = 0.002       # 收到写操作后等待合并其他写操作的时间（秒）
+
+# 已见 URL 内存索引: 'hash'（64 位哈希，命中即已见）、'bloom'（布隆过滤器，内存固定）、None（关闭）
+SEEN_INDEX_MODE = 'hash'
+BLOOM_FILTER_FP_RATE = 0.001          # 布隆过滤器误判率，误判时回查 SQLite
+BLOOM_FILTER_MIN_CAPACITY = 100000    # 布隆过滤器最小容量
 
 # HTTP 请求配置
 HEADERS = {
@@ -11,14 +54,125 @@ HEADERS = {
 }
 REQUEST_TIMEOUT = 20
 
+# HTTP 连接池配置（学院与教务处监控共享同一客户端）
+HTTP_POOL_CONNECTIONS = 32  # 缓存的主机连接池数量，应不少于目标主机数
+HTTP_POOL_MAXSIZE = 4       # 每个主机保持的长连接数
+CONNECT_TIMEOUT = 5         # 建立连接超时（秒）
+READ_TIMEOUT = 15           # 读取响应超时（秒）
+DNS_CACHE_TTL = 300         # DNS 解析结果缓存时间（秒）
+ENABLE_CONDITIONAL_GET = True  # 使用 ETag/Last-Modified 条件请求，304 时跳过解析
+ENABLE_STREAMING_FETCH = False  # 设置为 True 时流式下载并增量解析，列表块结束即断开连接
+STREAM_CHUNK_SIZE = 16 * 1024   # 流式下载的分块大小（字节）
+ENCODING_SNIFF_BYTES = 4096     # 在页面开头多少字节内查找 <meta charset> 声明
+ENABLE_LIST_FINGERPRINT = True  # 列表区域指纹未变化时跳过逐条解析和数据库检查
+ENABLE_INCREMENTAL_PARSE = False  # 设置为 True 时从最新一条扫描，到达高水位即停止
+HIGH_WATER_STOP_RUN = 3           # 连续遇到多少条已知 URL 后停止扫描
+
+# 并发抓取配置
+ENABLE_CONCURRENT_CRAWL = False  # 设置为 True 使用 asyncio 并发抓取所有目标
+MAX_CONCURRENT_REQUESTS = 16     # 全局同时进行的请求数上限
+MAX_CONCURRENT_PER_HOST = 2      # 同一主机同时进行的请求数上限
+
+# 指标导出（--loop 模式下在本机提供 Prometheus 文本格式的 /metrics）
+ENABLE_METRICS = True            # 设置为 False 时不采集也不监听端口
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = 9108
+
+# 历史回填（backfill.py 沿分页抓取旧通知，只写入已见表，不发送通知）
+BACKFILL_MAX_WORKERS = 16        # 同时抓取的分页数
+BACKFILL_MAX_PER_HOST = 4        # 同一主机同时进行的请求数
+BACKFILL_RATE_PER_HOST = 5.0     # 同一主机每秒最多发出的请求数
+BACKFILL_MAX_ATTEMPTS = 3        # 单个分页在一次回填中的最多尝试次数，仍失败的留待下次回填
+
+# 新文章推送（--loop 模式下在本机提供 Server-Sent Events 的 /events）
+ENABLE_PUSH_SERVER = False       # 设置为 True 时启动推送服务
+PUSH_HOST = '127.0.0.1'
+PUSH_PORT = 9109
+PUSH_MAX_CLIENTS = 256           # 同时连接的订阅者上限，超出时返回 503
+PUSH_BATCH_SIZE = 200            # 每次从数据库读取并推送的文章数
+PUSH_HEARTBEAT_SECONDS = 15      # 没有新文章时发送保活注释的间隔
+PUSH_WRITE_TIMEOUT_SECONDS = 30  # 向订阅者写入超过该时间即断开，订阅者可凭 Last-Event-ID 重连续传
+
+# 按主机熔断：连续超时/连接失败/5xx 达到阈值后跳过该主机，到期后放行一个试探请求
+ENABLE_CIRCUIT_BREAKER = True
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 2   # 连续失败次数阈值
+CIRCUIT_BREAKER_BASE_SECONDS = 60       # 第一次熔断时长，每次试探失败翻倍
+CIRCUIT_BREAKER_MAX_SECONDS = 30 * 60   # 熔断时长上限
+
 # Webhook 通知配置
 ENABLE_WEBHOOK_NOTIFICATION = False  # 设置为 True 开启HTTP通知
 NOTIFICATION_WEBHOOK_URL = "http://example.com/webhook"
+WEBHOOK_BATCH_SIZE = 1               # 每次 POST 的文章数，大于 1 时请求体为 JSON 数组
+WEBHOOK_RETRY_BASE_SECONDS = 10      # 首次重试等待时间，之后按指数增长
+WEBHOOK_RETRY_MAX_SECONDS = 60 * 60  # 重试等待时间上限
+WEBHOOK_POLL_SECONDS = 5             # 投递线程检查待发送通知的间隔
+
+# 详情页与附件抓取（新文章入库后由独立线程池抓取正文和附件，列表轮询不等待它）
+ENABLE_DETAIL_FETCH = False          # 设置为 True 时抓取新文章的详情页正文和附件
+DETAIL_MAX_WORKERS = 4               # 同时处理的文章数
+DETAIL_MAX_PER_HOST = 2              # 同一主机同时进行的详情页/附件请求数
+DETAIL_MAX_ATTEMPTS = 5              # 详情页抓取失败的最多尝试次数，之后放弃并记录错误
+DETAIL_RETRY_BASE_SECONDS = 60       # 首次重试等待时间，之后按指数增长
+DETAIL_RETRY_MAX_SECONDS = 6 * 60 * 60
+DETAIL_POLL_SECONDS = 30             # 检查到期任务的间隔（新文章入库时会立即唤醒）
+DETAIL_CLAIM_SECONDS = 10 * 60       # 取出的任务在该时间内对其他进程不可见，进程中途退出后重新到期
+DETAIL_DRAIN_SECONDS = 60            # 单次运行结束前最多等待详情页抓取的时间，未完成的留待下次运行
+DETAIL_PAGE_MAX_BYTES = 5 * 1024 * 1024  # 超过该大小的 HTML 详情页放弃解析
+# 正文区域，按顺序取第一个匹配的元素；都不匹配时取整个 <body>
+DETAIL_CONTENT_XPATHS = [
+    "//div[@class='v_news_content']",
+    "//div[contains(@id, 'vsb_content')]",
+    "//form[@name='_newscontent_fromname']",
+    "//div[contains(@class, 'article')]",
+    "//div[contains(@class, 'content')]",
+]
+ATTACHMENT_DIR = "attachments"       # 附件按内容摘要存放，相同内容只存一份
+ATTACHMENT_EXTENSIONS = ('.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+                         '.wps', '.et', '.zip', '.rar', '.7z', '.txt')
+ATTACHMENT_URL_PATTERNS = ('download.jsp',)  # 没有扩展名的下载链接（博达站群的附件下载地址）
+ATTACHMENT_MAX_BYTES = 100 * 1024 * 1024     # 超过该大小的附件放弃下载
+ATTACHMENT_CHUNK_SIZE = 64 * 1024            # 附件分块写入磁盘的大小
 
 # 爬取间隔时间
 JWC_CRAWL_INTERVAL_SECONDS = 60 * 1
 CRAWL_INTERVAL_SECONDS = 60 * 60
 
+# 调度配置（--loop 模式）
+# 转专业周期的日期范围，格式 ('MM-DD', 'MM-DD')（每年重复）或 ('YYYY-MM-DD', 'YYYY-MM-DD')，
+# 例如 [('05-06', '05-31'), ('11-18', '12-10')]，请按当年教务处通知填写
+TRANSFER_SEASON_DATES = []
+SCHEDULER_MAX_WORKERS = 4  # 同时执行的爬取任务数
+CYCLE_BUDGET_RATIO = 0.8   # 每轮爬取的时间预算占当前轮询间隔的比例
+MIN_REQUEST_TIMEOUT = 1    # 剩余预算低于该值（秒）时不再发起新请求
+
+# 分片模式（--worker）：多个进程共享数据库，通过租约表分配目标。
+# 进程失联后其租约最多 LEASE_TTL_SECONDS 过期，再经一次心跳被其他进程接管，
+# 两者之和应小于最短的轮询间隔
+LEASE_TTL_SECONDS = 30
+LEASE_HEARTBEAT_SECONDS = 10
+
+# 单次运行快速模式（--fast，适合由 cron 每分钟启动）
+FAST_DUE_TOLERANCE_SECONDS = 10   # 距上次检查不足间隔但相差不超过该值时也视为到期，抵消启动时间的抖动
+FAST_START_BUDGET_MS = 300        # 从进程开始执行到发出第一个请求的耗时上限，见 benchmarks/bench_startup.py
+TARGETS_STAMP_FILE = ".targets_validated"  # 与数据库同目录，记录校验通过的目标配置摘要，配置不变时跳过校验
+
+# 轮询策略：default_interval 为默认间隔，windows 中第一个匹配当前时刻的窗口优先，
+# jitter 为每次派发的最大随机延迟（秒），cycle_budget 为每轮的固定时间预算（秒，
+# 未指定时为当前间隔 × CYCLE_BUDGET_RATIO）。目标可用 'poll_policy' 键单独指定策略
+POLL_POLICIES = {
+    'jwc': {
+        'default_interval': JWC_CRAWL_INTERVAL_SECONDS,
+    },
+    'college': {
+        'default_interval': CRAWL_INTERVAL_SECONDS,
+        'windows': [
+            # 转专业周期内 7:00-18:00 每分钟检查一次
+            {'interval': 60, 'start_time': '07:00', 'end_time': '18:00', 'dates': TRANSFER_SEASON_DATES},
+        ],
+        'jitter': 10,
+    },
+}
+
 # 教务处目标配置
 TARGET_JWC_PAGE = [
     {
@@ -1,11 +1,61 @@
 """网页爬虫模块，用于抓取和解析通知公告"""
 
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-from lxml import html
-from urllib.parse import urljoin
+from lxml import etree, html
+from urllib.parse import urljoin, urlparse
 
-from .config import HEADERS, REQUEST_TIMEOUT, ENABLE_WEBHOOK_NOTIFICATION, NOTIFICATION_WEBHOOK_URL
+from .config import (
+    ENABLE_CONCURRENT_CRAWL,
+    ENABLE_CONDITIONAL_GET,
+    ENABLE_STREAMING_FETCH,
+    STREAM_CHUNK_SIZE,
+    ENABLE_LIST_FINGERPRINT,
+    ENABLE_INCREMENTAL_PARSE,
+    HIGH_WATER_STOP_RUN,
+    MAX_CONCURRENT_REQUESTS,
+    MAX_CONCURRENT_PER_HOST,
+    ENABLE_CIRCUIT_BREAKER,
+    ENABLE_SNAPSHOTS
+)
+from .circuit_breaker import CircuitOpenError, get_circuit_breaker
 from .database import DatabaseManager
+from .encoding import get_encoding_resolver, parse_html
+from .http_client import get_http_client
+from .metrics import PhaseRecorder, get_metrics, record_bytes, record_phase
+from .output import locked_print
+from .snapshots import SnapshotStore
+from .targets import get_target_registry
+
+# fetch_page 在服务器返回 304 时的返回值，表示页面自上次抓取后未修改
+NOT_MODIFIED = object()
+
+
+def _list_block(item):
+    """列表项所在的列表块：最近的带 class 或 id 的祖先元素
+    
+    list_xpath 通常以这样的元素定位列表（如 //div[@class='r-content']/ul/li），
+    等它闭合而不是等直接父元素闭合，可以覆盖列表分布在多个 ul 中的情况。
+    """
+    block = item.getparent()
+    while block is not None and block.getparent() is not None:
+        if block.get('class') or block.get('id'):
+            return block
+        block = block.getparent()
+    return item.getparent()
+
+
+def _is_closed(element):
+    """判断增量解析中的元素是否已闭合：它或它的某个祖先后面已经出现了兄弟节点"""
+    while element is not None:
+        if element.getnext() is not None:
+            return True
+        element = element.getparent()
+    return False
+
 
 class WebCrawler:
     """大学通知公告爬虫
@@ -13,29 +63,145 @@ class WebCrawler:
     参数:
         db_manager: 数据库管理器实例
         print_lock: 线程锁，用于线程安全打印
+        http_client: 共享 HTTP 客户端，未指定时使用进程级共享实例
+        registry: 预编译 XPath 的目标注册表，未指定时使用进程级共享实例
+        breaker: 按主机的熔断器，未指定时按配置使用进程级共享实例
+        metrics: 指标收集器，未指定时按配置使用进程级共享实例
+        snapshots: 页面快照存档，未指定时按 ENABLE_SNAPSHOTS 决定是否存档
+        encodings: 页面编码解析器，未指定时使用进程级共享实例
     """
     
-    def __init__(self, db_manager=None, print_lock=None):
+    def __init__(self, db_manager=None, print_lock=None, http_client=None, registry=None, breaker=None,
+                 metrics=None, snapshots=None, encodings=None):
         self.db_manager = db_manager or DatabaseManager()
         self.page_cache = {}
+        self.pending_validators = {}
+        self.fingerprint_stats = {'hits': 0, 'misses': 0}
         self.print_lock = print_lock
+        self.http = http_client or get_http_client()
+        self.registry = registry or get_target_registry()
+        if breaker is None and ENABLE_CIRCUIT_BREAKER:
+            breaker = get_circuit_breaker()
+        self.breaker = breaker
+        self.budget = None
+        self.skipped_targets = []
+        self.checked_targets = []
+        self.metrics = metrics or get_metrics()
+        if snapshots is None and ENABLE_SNAPSHOTS:
+            snapshots = SnapshotStore(self.db_manager)
+        self.snapshots = snapshots
+        self.encodings = encodings or get_encoding_resolver()
+        self._fetch_phases = {}
     
     def _print(self, msg):
         """线程安全的打印包装器"""
-        if self.print_lock:
-            with self.print_lock:
-                print(msg)
-        else:
-            print(msg)
+        locked_print(self.print_lock, msg)
+    
+    def _send_request(self, url):
+        """发送（条件）GET 请求
+        
+        启用条件请求时携带上次保存的 ETag/Last-Modified。
+        收到响应头即返回，响应体由调用方读取，以便分开统计下载耗时。
+        2xx 响应在调用方读完响应体后才向熔断器报告成功，读取响应体出错时报告失败（见 _read_body）。
+        
+        返回:
+            响应对象；服务器返回 304 时返回 NOT_MODIFIED
+            
+        异常:
+            CircuitOpenError: 目标主机处于熔断状态，未发出请求
+        """
+        host = urlparse(url).hostname
+        if self.breaker is not None:
+            try:
+                if self.breaker.before_request(host):
+                    self._print(f"  主机 {host} 熔断到期，发送试探请求")
+            except CircuitOpenError:
+                self._count_response(host, 'circuit_open')
+                raise
+        
+        headers = {}
+        if ENABLE_CONDITIONAL_GET:
+            etag, last_modified = self.db_manager.get_validators(url)
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        
+        timeout = None
+        if self.budget is not None:
+            # 剩余预算不足默认超时时收紧本次请求的超时
+            timeout = self.budget.request_timeout(self.http.timeout)
+        
+        try:
+            response = self.http.get(url, timeout=timeout, headers=headers, stream=True)
+        except Exception as e:
+            self._count_response(host, 'error')
+            self._record_host_result(host, e)
+            raise
+        self._count_response(host, str(response.status_code))
+        if response.status_code >= 500:
+            self._record_host_result(host, f"状态码 {response.status_code}")
+        elif response.status_code == 304 or response.status_code >= 400:
+            # 没有要读取的响应体，收到响应头即说明主机正常
+            self._record_host_result(host, None)
+        if response.status_code == 304:
+            response.close()
+            return NOT_MODIFIED
+        try:
+            response.raise_for_status()
+        except requests.RequestException:
+            response.close()
+            raise
+        if ENABLE_CONDITIONAL_GET:
+            # 解析完成后才落库，避免解析中断导致以后一直收到 304
+            self.pending_validators[url] = (
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified')
+            )
+        return response
+    
+    def _count_response(self, host, status):
+        if self.metrics is not None:
+            self.metrics.http_responses.inc((host, status))
+    
+    def _record_host_result(self, host, error):
+        """向熔断器报告一次请求结果，error 为 None 表示主机正常响应"""
+        if self.breaker is None:
+            return
+        if error is None:
+            if self.breaker.record_success(host):
+                self._print(f"  主机 {host} 已恢复")
+            return
+        if self.breaker.record_failure(host, error):
+            state = self.breaker.get_state(host)
+            self._print(f"  主机 {host} 连续失败 {state['failures']} 次，熔断 {state['retry_in']:.0f} 秒"
+                        f"（第 {state['trips']} 次）: {error}")
+    
+    def _read_body(self, url, read):
+        """调用 read() 读取响应体并返回其结果，读完后才向熔断器报告成功
+        
+        读取过程中的连接中断、超时等网络错误记为该主机的一次失败后继续抛出。
+        """
+        host = urlparse(url).hostname
+        try:
+            result = read()
+        except requests.RequestException as e:
+            self._record_host_result(host, e)
+            raise
+        self._record_host_result(host, None)
+        return result
     
     def fetch_page(self, url):
-        """获取页面内容并缓存
+        """获取页面并解析，结果按 URL 缓存
+        
+        服务器返回 304 时不下载页面内容。编码按响应头和 <meta> 声明确定（见 bugs/encoding.py），
+        原始字节直接交给 lxml 解析。
         
         参数:
             url: 目标 URL
             
         返回:
-            页面 HTML 文本，失败时返回 None
+            已解析的文档根元素；页面未修改时返回 NOT_MODIFIED；失败时返回 None
         """
         if url in self.page_cache:
             return self.page_cache[url]
@@ -43,11 +209,28 @@ class WebCrawler:
         self._print(f"正在请求: {url}")
         
         try:
-            response = requests.get(url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
-            response.raise_for_status()
-            response.encoding = response.apparent_encoding
-            self.page_cache[url] = response.text
-            return response.text
+            response = self._send_request(url)
+            if response is NOT_MODIFIED:
+                self.page_cache[url] = NOT_MODIFIED
+                return NOT_MODIFIED
+            started = time.perf_counter()
+            self._read_body(url, lambda: response.content)  # 读完响应体，与下面的解码分开计时
+            record_phase('download', time.perf_counter() - started)
+            record_bytes(response.raw.tell())
+            self._save_snapshot(url, response.content)
+            
+            # 确定编码并建树，合计为 decode
+            started = time.perf_counter()
+            encoding = self.encodings.resolve(url, response.content, response.headers.get('Content-Type'))
+            root = parse_html(response.content, encoding)
+            record_phase('decode', time.perf_counter() - started)
+            
+            self.page_cache[url] = root
+            return root
+        except CircuitOpenError as e:
+            self._print(f"跳过 {url}: {e}")
+            self.page_cache[url] = None
+            return None
         except requests.RequestException as e:
             self._print(f"请求失败 {url}: {e}")
             self.page_cache[url] = None
@@ -57,11 +240,103 @@ class WebCrawler:
             self.page_cache[url] = None
             return None
     
+    def fetch_listing(self, target):
+        """以流式方式获取列表页面并增量解析
+        
+        分块读取响应并送入 lxml 增量解析器，list_xpath 匹配的列表块一闭合就断开连接，
+        不再下载导航、页脚和脚本。读完整个页面仍未找到列表块时，
+        得到的就是完整文档的解析结果。
+        
+        参数:
+            target: 目标配置字典
+            
+        返回:
+            已解析的文档根元素；页面未修改时返回 NOT_MODIFIED；失败时返回 None
+        """
+        url = target['url']
+        if url in self.page_cache:
+            return self.page_cache[url]
+        
+        self._print(f"正在请求: {url}")
+        
+        try:
+            response = self._send_request(url)
+            if response is NOT_MODIFIED:
+                self.page_cache[url] = NOT_MODIFIED
+                return NOT_MODIFIED
+            started = time.perf_counter()
+            chunks = [] if self.snapshots is not None else None
+            try:
+                root = self._read_body(url, lambda: self._parse_stream(response, target, chunks))
+            finally:
+                # 流式模式下下载、解码和建树交错进行，合计为 download
+                record_phase('download', time.perf_counter() - started)
+                record_bytes(response.raw.tell())
+                # 未读完的响应会关闭底层连接而不是放回连接池
+                response.close()
+            if chunks is not None:
+                # 提前结束时存档的是已读取的部分，重放时与本次解析结果一致
+                self._save_snapshot(url, b''.join(chunks))
+            self.page_cache[url] = root
+            return root
+        except CircuitOpenError as e:
+            self._print(f"跳过 {url}: {e}")
+            self.page_cache[url] = None
+            return None
+        except requests.RequestException as e:
+            self._print(f"请求失败 {url}: {e}")
+            self.page_cache[url] = None
+            return None
+        except Exception as e:
+            self._print(f"未知错误 {url}: {e}")
+            self.page_cache[url] = None
+            return None
+    
+    def _parse_stream(self, response, target, chunks=None):
+        """把响应分块送入增量解析器，列表块闭合后提前结束，返回文档根元素
+        
+        chunks 不为 None 时把读取到的原始数据块依次追加到其中。
+        """
+        list_xpath = self.registry.xpath(target, 'list_xpath')
+        content_type = response.headers.get('Content-Type')
+        parser = root = None
+        
+        for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+            if chunks is not None:
+                chunks.append(chunk)
+            if parser is None:
+                # 按第一块中的声明确定编码，<meta charset> 通常在页面开头几百字节内
+                encoding = self.encodings.resolve(target['url'], chunk, content_type)
+                parser = etree.HTMLPullParser(events=('end',), encoding=encoding)
+            parser.feed(chunk)
+            for _, element in parser.read_events():
+                if root is None:
+                    root = element.getroottree().getroot()
+            if root is None:
+                continue
+            items = list_xpath(root)
+            if items and _is_closed(_list_block(items[-1])):
+                break
+        
+        if parser is None:
+            return None
+        # close() 会补全尚未闭合的标签；提前结束时已有的列表块是完整的
+        return parser.close()
+    
+    def _save_snapshot(self, url, content):
+        """存档页面原始内容，存档失败不影响本次爬取"""
+        if self.snapshots is None:
+            return
+        try:
+            self.snapshots.save(url, content)
+        except OSError as e:
+            self._print(f"警告: 页面快照保存失败 {url}: {e}")
+    
     def parse_section(self, page_content, target):
         """从页面内容中解析通知公告
         
         参数:
-            page_content: 页面 HTML 内容
+            page_content: 页面 HTML 内容，或 fetch_page/fetch_listing 返回的已解析根元素
             target: 目标配置字典
             
         返回:
@@ -72,88 +347,186 @@ class WebCrawler:
         
         self._print(f"检查: {college_name}")
         
-        tree = html.fromstring(page_content)
-        items = tree.xpath(target['list_xpath'])
+        if isinstance(page_content, etree._Element):
+            tree = page_content
+        else:
+            tree = html.fromstring(page_content)
+        items = self.registry.xpath(target, 'list_xpath')(tree)
         
         if not items:
             self._print(f"警告: 未找到公告列表 (XPath: {target['list_xpath']})")
             return []
         
-        new_articles = []
+        fingerprint = None
+        if ENABLE_LIST_FINGERPRINT:
+            fingerprint = self._fingerprint_items(items)
+            if fingerprint == self.db_manager.get_fingerprint(target['url']):
+                self.fingerprint_stats['hits'] += 1
+                self._print(f"  {college_name}: 列表未变化，跳过解析")
+                return []
+            self.fingerprint_stats['misses'] += 1
+        
+        high_water_mark = None
+        if ENABLE_INCREMENTAL_PARSE:
+            candidates, high_water_mark = self._collect_incremental(items, target)
+        else:
+            candidates = self._collect_all(items, target)
+        
+        # 整页候选一次性去重入库，结果保持页面时间顺序
+        new_articles = self.db_manager.check_and_add_articles(candidates)
+        
+        # webhook 通知已在同一事务中写入发件箱，由 NotificationWorker 异步投递
+        for article_info in new_articles:
+            self._print(f"  [新] {college_name}: {article_info['title']}")
+        
+        if not new_articles:
+            self._print(f"  {college_name}: 无新公告")
+        
+        if high_water_mark is not None:
+            self.db_manager.save_high_water_mark(target['url'], high_water_mark)
+        if fingerprint is not None:
+            self.db_manager.save_fingerprint(target['url'], fingerprint)
+        
+        return new_articles
+    
+    def _extract_title(self, item, target):
+        """提取列表项标题，没有标题时返回 None"""
+        title_parts = self.registry.xpath(target, 'title_xpath')(item)
+        if not title_parts:
+            return None
+        return title_parts[0].strip() or None
+    
+    def _extract_url(self, item, target):
+        """提取列表项的完整 URL，没有链接时返回 None"""
+        hrefs = self.registry.xpath(target, 'href_xpath')(item)
+        if not hrefs:
+            return None
+        return urljoin(target['base_url'], hrefs[0])
+    
+    def _collect_all(self, items, target):
+        """逐条解析整个列表，返回按时间顺序（旧到新）排列的候选文章"""
+        college_name = target['college']
+        category = target.get('category', '通知公告')
+        candidates = []
         
         for item in reversed(items):
             try:
-                title_parts = item.xpath(target['title_xpath'])
-                if not title_parts:
-                    continue
-                
-                title = title_parts[0].strip()
+                title = self._extract_title(item, target)
                 if not title:
                     continue
-
-                href_xpath = target.get('href_xpath', './a/@href')
-                hrefs = item.xpath(href_xpath)
                 
-                if not hrefs:
+                full_url = self._extract_url(item, target)
+                if not full_url:
                     self._print(f"警告: 未找到链接 '{title[:20]}...'")
                     continue
                 
-                relative_url = hrefs[0]
-                full_url = urljoin(target['base_url'], relative_url)
-                
-                article_info = self.db_manager.check_and_add_article(
-                    full_url, title, college_name, category
-                )
-                
-                if article_info:
-                    new_articles.append(article_info)
-                    self._print(f"  [新] {college_name}: {title}")
-                    self.send_notification(article_info)
+                candidates.append((full_url, title, college_name, category))
                     
             except Exception as e:
                 self._print(f"解析错误: {e}")
                 continue
         
-        if not new_articles:
-            self._print(f"  {college_name}: 无新公告")
-        
-        return new_articles
+        return candidates
     
-    def send_notification(self, article_info):
-        """发送新文章通知
+    def _collect_incremental(self, items, target):
+        """从最新一条开始扫描，到达高水位后停止
         
-        通过HTTP POST请求将新文章信息以JSON格式发送到指定的webhook地址。
+        高水位记录上一轮扫描过的列表头部 URL 序列和已识别的置顶 URL。
+        页面开头与上一轮头部逐位相同的条目不再查询数据库，也不计入停止条件：
+        这些条目可能是尚未识别出的置顶条目，新条目可能就插在它们下面。
+        上一轮的整个头部原样出现在页面开头时立即停止；否则遇到连续 HIGH_WATER_STOP_RUN 条
+        已知 URL（置顶条目除外）即停止，只对新 URL 求标题。
+        出现在新条目之前的已知 URL 会被记为置顶。没有高水位记录时完整扫描一遍。
+        本轮有新条目时，新头部只保留到最后一条新条目之后的 HIGH_WATER_STOP_RUN 条已知 URL
+        （它们排在新条目之后，不可能是置顶条目）；页面不变时沿用上一轮的头部，不会变长。
         
-        参数:
-            article_info: 文章信息字典
+        返回:
+            (按时间顺序排列的候选文章, 新的高水位记录)
         """
-        if not ENABLE_WEBHOOK_NOTIFICATION or not NOTIFICATION_WEBHOOK_URL:
-            return
+        college_name = target['college']
+        category = target.get('category', '通知公告')
+        mark = self.db_manager.get_high_water_mark(target['url'])
+        previous_head = mark['head']
+        pinned = set(mark['pinned'])
+        can_stop = bool(previous_head)
         
-        payload = {
-            "title": f"【{article_info['college']}】{article_info['title']}",
-            "content": article_info['url']
-        }
+        head = []
+        new_items = []
+        known_before_new = []
+        known_run = 0
+        # 最后一条新条目之后凑满停止条件时（或整个上一轮头部相同时）的头部长度，新头部截断到这里
+        stop_at = None
+        in_unchanged_prefix = True
         
-        headers = {
-            'Content-Type': 'application/json'
-        }
+        for item in items:
+            try:
+                full_url = self._extract_url(item, target)
+                if not full_url:
+                    continue
+                
+                position = len(head)
+                head.append(full_url)
+                if in_unchanged_prefix and position < len(previous_head) and previous_head[position] == full_url:
+                    # 与上一轮头部相同的条目都已入库，不必再查询
+                    known_before_new.append(full_url)
+                    if len(head) == len(previous_head):
+                        # 上一轮的头部原样出现在页面开头，之后都是已扫描过的旧条目
+                        stop_at = len(head)
+                        break
+                    continue
+                in_unchanged_prefix = False
+                
+                if full_url in pinned:
+                    known_before_new.append(full_url)
+                    continue
+                
+                if self.db_manager.is_article_seen(full_url):
+                    known_run += 1
+                    known_before_new.append(full_url)
+                    if known_run == HIGH_WATER_STOP_RUN and new_items:
+                        stop_at = len(head)
+                    if can_stop and known_run >= HIGH_WATER_STOP_RUN:
+                        break
+                else:
+                    known_run = 0
+                    stop_at = None
+                    new_items.append((item, full_url))
+                    # 排在新文章之前的已知条目只可能是置顶条目
+                    pinned.update(known_before_new)
+                    known_before_new = []
+                    
+            except Exception as e:
+                self._print(f"解析错误: {e}")
+                continue
         
-        self._print(f"  -> 正在发送HTTP通知: {payload['title']}")
+        candidates = []
+        for item, full_url in reversed(new_items):
+            try:
+                title = self._extract_title(item, target)
+            except Exception as e:
+                self._print(f"解析错误: {e}")
+                continue
+            if title:
+                candidates.append((full_url, title, college_name, category))
         
-        try:
-            response = requests.post(
-                NOTIFICATION_WEBHOOK_URL, 
-                json=payload, 
-                headers=headers, 
-                timeout=REQUEST_TIMEOUT
-            )
-            if response.status_code == 200:
-                self._print(f"  -> 通知发送成功！")
-            else:
-                self._print(f"  -> 警告: 通知发送失败，状态码: {response.status_code}, 响应: {response.text}")
-        except Exception as e:
-            self._print(f"  -> 错误: 发送HTTP通知时发生异常: {e}")
+        if stop_at is not None:
+            head = head[:stop_at]
+        # 只保留仍在本轮头部范围内的置顶 URL，避免记录无限增长
+        scanned = set(head)
+        new_mark = {'head': head, 'pinned': [url for url in pinned if url in scanned]}
+        return candidates, new_mark
+    
+    @staticmethod
+    def _fingerprint_items(items):
+        """计算列表区域的指纹
+        
+        只对 list_xpath 匹配到的节点序列化后取哈希，
+        页面其他位置的轮播图、访问计数等变化不影响结果。
+        """
+        digest = hashlib.sha1()
+        for item in items:
+            digest.update(etree.tostring(item, encoding='utf-8', with_tail=False))
+        return digest.hexdigest()
     
     def crawl_target(self, target):
         """爬取单个目标
@@ -164,23 +537,173 @@ class WebCrawler:
         返回:
             新文章列表，失败时返回空列表
         """
-        page_content = self.fetch_page(target['url'])
+        page_content = self.fetch_target(target)
+        return self._process_page(page_content, target)
+    
+    def fetch_target(self, target):
+        """按配置的抓取模式获取目标页面（流式增量解析或完整下载）"""
+        if self.metrics is None:
+            return self._fetch_target(target)
+        # 记录 DNS、建连、首字节、下载和解码耗时，处理页面时一并上报
+        with PhaseRecorder() as recorder:
+            page_content = self._fetch_target(target)
+        self._fetch_phases[target['url']] = recorder
+        return page_content
+    
+    def _fetch_target(self, target):
+        if ENABLE_STREAMING_FETCH:
+            return self.fetch_listing(target)
+        return self.fetch_page(target['url'])
+    
+    def _process_page(self, page_content, target):
+        """处理 fetch_target 的结果：解析新文章并保存页面校验信息"""
+        if self.metrics is None:
+            return self._handle_page(page_content, target)
+        
+        with PhaseRecorder() as recorder:
+            started = time.perf_counter()
+            articles = self._handle_page(page_content, target)
+            elapsed = time.perf_counter() - started
+        
+        phases = recorder.phases
+        if page_content is not None and page_content is not NOT_MODIFIED:
+            phases['parse'] = elapsed - phases.get('db', 0.0)
+        fetch = self._fetch_phases.pop(target['url'], None)
+        response_bytes = 0
+        if fetch is not None:
+            # 请求前读取校验信息也计入 db
+            for phase, seconds in fetch.phases.items():
+                phases[phase] = phases.get(phase, 0.0) + seconds
+            response_bytes = fetch.bytes
+        self.metrics.observe_target(target, phases, response_bytes, len(articles))
+        return articles
+    
+    def _handle_page(self, page_content, target):
         if page_content is None:
             return []
         
-        return self.parse_section(page_content, target)
+        if page_content is NOT_MODIFIED:
+            self._print(f"  {target['college']}: 页面未修改，跳过解析")
+            return []
+        
+        articles = self.parse_section(page_content, target)
+        
+        validators = self.pending_validators.pop(target['url'], None)
+        if validators is not None:
+            self.db_manager.save_validators(target['url'], *validators)
+        
+        return articles
     
-    def crawl_all_targets(self, targets):
+    def crawl_all_targets(self, targets, concurrent=None, budget=None):
         """爬取所有配置的目标
         
         参数:
             targets: 目标配置列表
+            concurrent: 是否使用并发模式，未指定时使用 ENABLE_CONCURRENT_CRAWL
+            budget: 本轮的 CycleBudget，预算耗尽后不再请求剩余目标，
+                未到达的目标记录在 self.skipped_targets 中；None 表示不限时
+            
+        成功取得页面（含 304 未修改）的目标记录在 self.checked_targets 中，
+        请求失败、处于熔断状态或因预算未检查的目标不在其中。
             
         返回:
-            所有新文章的合并列表
+            所有新文章的合并列表（预算耗尽时为已完成部分）
         """
+        if concurrent is None:
+            concurrent = ENABLE_CONCURRENT_CRAWL
+        self.budget = budget
+        self.skipped_targets = []
+        if concurrent:
+            all_new_articles = self.crawl_all_targets_concurrent(targets)
+        else:
+            all_new_articles = []
+            for target in targets:
+                if budget is not None and budget.expired():
+                    self.skipped_targets.append(target)
+                    continue
+                articles = self.crawl_target(target)
+                all_new_articles.extend(articles)
+            self._report_skipped()
+        # 失败和熔断跳过的页面在缓存中为 None，预算耗尽未请求的不在缓存中
+        self.checked_targets = [target for target in targets if self.page_cache.get(target['url']) is not None]
+        return all_new_articles
+    
+    def _report_skipped(self):
+        if self.skipped_targets:
+            names = '、'.join(target['college'] for target in self.skipped_targets)
+            self._print(f"本轮时间预算已用完，{len(self.skipped_targets)} 个目标未检查: {names}")
+    
+    def crawl_all_targets_concurrent(self, targets):
+        """使用 asyncio 并发爬取所有目标
+        
+        所有目标同时发起请求，受全局并发上限和单主机并发上限约束，
+        一轮耗时接近最慢的单个站点，而不是所有站点耗时之和。
+        
+        参数:
+            targets: 目标配置列表
+            
+        返回:
+            所有新文章的合并列表，顺序与顺序模式一致
+        """
+        # asyncio 只有并发模式需要，顺序模式的单次运行不必为导入它付出启动时间
+        import asyncio
+
+        return asyncio.run(self._crawl_all_async(targets))
+    
+    async def _crawl_all_async(self, targets):
+        """并发爬取的协程实现
+        
+        页面请求在线程池中执行，解析和数据库操作在事件循环线程中串行执行。
+        """
+        if not targets:
+            return []
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        global_limit = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        host_limits = {}
+        results = [[] for _ in targets]
+        executor = ThreadPoolExecutor(
+            max_workers=MAX_CONCURRENT_REQUESTS,
+            thread_name_prefix="CrawlFetch"
+        )
+        
+        finished = [False] * len(targets)
+        
+        async def crawl_one(index, target):
+            host = urlparse(target['url']).netloc
+            if host not in host_limits:
+                host_limits[host] = asyncio.Semaphore(MAX_CONCURRENT_PER_HOST)
+            
+            # 先等待主机配额再占用全局配额，避免排队时占住全局名额
+            async with host_limits[host]:
+                async with global_limit:
+                    if self.budget is not None and self.budget.expired():
+                        return
+                    page_content = await loop.run_in_executor(
+                        executor, self.fetch_target, target
+                    )
+            
+            results[index] = self._process_page(page_content, target)
+            finished[index] = True
+        
+        tasks = [asyncio.ensure_future(crawl_one(index, target)) for index, target in enumerate(targets)]
+        try:
+            # 预算到期时放弃仍在排队或请求中的目标，已完成的结果照常返回
+            timeout = max(0.0, self.budget.remaining()) if self.budget is not None else None
+            done, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for task in done:
+                task.result()
+        finally:
+            executor.shutdown(wait=False)
+        
+        self.skipped_targets = [target for target, ok in zip(targets, finished) if not ok]
+        self._report_skipped()
+        
         all_new_articles = []
-        for target in targets:
-            articles = self.crawl_target(target)
+        for articles in results:
             all_new_articles.extend(articles)
         return all_new_articles
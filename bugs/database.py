@@ -3,80 +3,1181 @@
 数据库模块 - 处理所有数据库相关操作
 """
 
+import json
+import queue
 import sqlite3
-from datetime import datetime
-from .config import DB_NAME, TABLE_NAME
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from .config import (
+    DB_NAME,
+    TABLE_NAME,
+    VALIDATOR_TABLE_NAME,
+    FINGERPRINT_TABLE_NAME,
+    HIGH_WATER_TABLE_NAME,
+    OUTBOX_TABLE_NAME,
+    CYCLE_TABLE_NAME,
+    SNAPSHOT_TABLE_NAME,
+    LEASE_TABLE_NAME,
+    WORKER_TABLE_NAME,
+    TARGET_CHECK_TABLE_NAME,
+    DETAIL_JOB_TABLE_NAME,
+    DETAIL_TABLE_NAME,
+    ATTACHMENT_TABLE_NAME,
+    ARTICLE_ATTACHMENT_TABLE_NAME,
+    ENABLE_DETAIL_FETCH,
+    BACKFILL_TARGET_TABLE_NAME,
+    BACKFILL_PAGE_TABLE_NAME,
+    SEARCH_TABLE_NAME,
+    ENABLE_TITLE_SEARCH,
+    SEARCH_TITLE_WEIGHT,
+    ENABLE_WEBHOOK_NOTIFICATION,
+    NOTIFICATION_WEBHOOK_URL,
+    SEEN_INDEX_MODE,
+    BLOOM_FILTER_FP_RATE,
+    BLOOM_FILTER_MIN_CAPACITY
+)
+from .db_writer import open_connection, acquire_writer, release_writer
+from .metrics import record_phase
+from .search import build_match, text_tokens
+from .seen_index import HashedUrlIndex, BloomFilterIndex
+
+# 单条 IN 查询的参数个数上限（旧版 SQLite 限制为 999）
+_MAX_QUERY_PARAMS = 500
+
+# 表结构版本，记录在数据库的 user_version 中；修改 init_db 中的表结构时需要加一
+SCHEMA_VERSION = 5
 
 
 class DatabaseManager:
-    """数据库管理类"""
-    
-    def __init__(self, db_name=DB_NAME):
+    """数据库管理类
+
+    数据库运行在 WAL 模式：读操作从长连接池中借用连接，互不阻塞；
+    所有写操作交给同一数据库文件共享的单写线程，合并提交。
+    已见 URL 先查内存索引，只有索引无法确定的 URL 和新文章写入才访问 SQLite。
+    同一实例可以在多个监控线程间共享。
+
+    参数:
+        db_name: 数据库文件名
+        seen_index_mode: 已见 URL 索引类型，'hash'、'bloom' 或 None
+        enable_outbox: 新文章是否同时写入通知发件箱，未指定时取决于 webhook 配置
+        enable_search: 是否维护标题和正文全文索引，未指定时取决于 ENABLE_TITLE_SEARCH
+        enable_details: 新文章是否同时加入详情页抓取队列，未指定时取决于 ENABLE_DETAIL_FETCH
+    """
+
+    def __init__(self, db_name=DB_NAME, seen_index_mode=SEEN_INDEX_MODE, enable_outbox=None,
+                 enable_search=None, enable_details=None):
         self.db_name = db_name
         self.table_name = TABLE_NAME
-    
+        self.validator_table_name = VALIDATOR_TABLE_NAME
+        self.fingerprint_table_name = FINGERPRINT_TABLE_NAME
+        self.high_water_table_name = HIGH_WATER_TABLE_NAME
+        self.outbox_table_name = OUTBOX_TABLE_NAME
+        self.cycle_table_name = CYCLE_TABLE_NAME
+        self.snapshot_table_name = SNAPSHOT_TABLE_NAME
+        self.lease_table_name = LEASE_TABLE_NAME
+        self.worker_table_name = WORKER_TABLE_NAME
+        self.check_table_name = TARGET_CHECK_TABLE_NAME
+        if enable_outbox is None:
+            enable_outbox = bool(ENABLE_WEBHOOK_NOTIFICATION and NOTIFICATION_WEBHOOK_URL)
+        self.enable_outbox = enable_outbox
+        self.search_table_name = SEARCH_TABLE_NAME
+        self.enable_search = ENABLE_TITLE_SEARCH if enable_search is None else enable_search
+        self.detail_job_table_name = DETAIL_JOB_TABLE_NAME
+        self.detail_table_name = DETAIL_TABLE_NAME
+        self.attachment_table_name = ATTACHMENT_TABLE_NAME
+        self.article_attachment_table_name = ARTICLE_ATTACHMENT_TABLE_NAME
+        self.enable_details = ENABLE_DETAIL_FETCH if enable_details is None else enable_details
+        self.backfill_target_table_name = BACKFILL_TARGET_TABLE_NAME
+        self.backfill_page_table_name = BACKFILL_PAGE_TABLE_NAME
+        self._commit_listeners = []
+        self.seen_index_mode = seen_index_mode
+        self.seen_index = None
+        self._read_pool = queue.LifoQueue()
+        self._connections = []
+        self._writer = None
+        # 保护内存索引、连接列表和写线程引用
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def _reading(self):
+        """从连接池借用一个读连接，池中没有空闲连接时新建"""
+        try:
+            conn = self._read_pool.get_nowait()
+        except queue.Empty:
+            conn = open_connection(self.db_name)
+            with self._lock:
+                self._connections.append(conn)
+        started = time.perf_counter()
+        try:
+            yield conn
+        finally:
+            self._read_pool.put(conn)
+            record_phase('db', time.perf_counter() - started)
+
+    def _query(self, sql, params=()):
+        """执行只读查询并返回全部结果行"""
+        with self._reading() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def _write(self, func):
+        """通过单写线程执行 func(conn) 并等待事务提交，返回其结果"""
+        with self._lock:
+            if self._writer is None:
+                self._writer = acquire_writer(self.db_name)
+            writer = self._writer
+        started = time.perf_counter()
+        try:
+            return writer.execute(func)
+        finally:
+            record_phase('db', time.perf_counter() - started)
+
+    def add_commit_listener(self, listener):
+        """注册新文章提交后的回调 listener(articles)，在写事务提交后调用"""
+        with self._lock:
+            self._commit_listeners.append(listener)
+
+    def _notify_committed(self, articles):
+        with self._lock:
+            listeners = list(self._commit_listeners)
+        for listener in listeners:
+            listener(articles)
+
+    def get_writer_stats(self):
+        """返回单写线程的提交统计，尚未写入过时返回 None"""
+        with self._lock:
+            return self._writer.get_stats() if self._writer else None
+
+    def close(self):
+        """关闭所有读连接并释放写线程"""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+            self._read_pool = queue.LifoQueue()
+            if self._writer is not None:
+                self._writer = None
+                release_writer(self.db_name)
+
     def init_db(self):
-        """初始化数据库，创建表（如果不存在）"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute(f'''
-        CREATE TABLE IF NOT EXISTS {self.table_name} (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            url TEXT UNIQUE NOT NULL,
-            title TEXT NOT NULL,
-            college TEXT NOT NULL,
-            category TEXT NOT NULL,
-            first_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        conn.commit()
-        conn.close()
+        """初始化数据库，创建表（如果不存在）
+
+        数据库的 user_version 已等于 SCHEMA_VERSION 时跳过建表语句，
+        单次运行模式由 cron 频繁启动时不必每次都执行全部 DDL。
+        """
+        def create_tables(conn):
+            conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.table_name} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT UNIQUE NOT NULL,
+                title TEXT NOT NULL,
+                college TEXT NOT NULL,
+                category TEXT NOT NULL,
+                first_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                backfilled INTEGER NOT NULL DEFAULT 0
+            )
+            ''')
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info({self.table_name})")}
+            if 'backfilled' not in columns:
+                # 版本 4 之前的已见表没有回填标记，已有记录都视为日常爬取发现的文章
+                conn.execute(f"ALTER TABLE {self.table_name} ADD COLUMN backfilled INTEGER NOT NULL DEFAULT 0")
+            # 推送服务只按 id 读取日常发现的文章，部分索引让它跳过大批回填记录时不必逐行扫描
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.table_name}_live "
+                f"ON {self.table_name} (id) WHERE backfilled = 0"
+            )
+            conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.validator_table_name} (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+            conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.fingerprint_table_name} (
+                url TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+            conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.high_water_table_name} (
+                url TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+            conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.outbox_table_name} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+            conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.cycle_table_name} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                started_at TIMESTAMP NOT NULL,
+                budget_seconds REAL NOT NULL,
+                elapsed_seconds REAL NOT NULL,
+                used_ratio REAL NOT NULL,
+                overrun INTEGER NOT NULL,
+                targets INTEGER NOT NULL,
+                skipped_targets TEXT NOT NULL,
+                new_articles INTEGER NOT NULL
+            )
+            ''')
+            conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.snapshot_table_name} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at TIMESTAMP NOT NULL
+            )
+            ''')
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.snapshot_table_name}_url_time "
+                f"ON {self.snapshot_table_name} (url, fetched_at)"
+            )
+            conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.lease_table_name} (
+                url TEXT PRIMARY KEY,
+                owner TEXT,
+                expires_at REAL NOT NULL DEFAULT 0
+            )
+            ''')
+            conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.worker_table_name} (
+                worker_id TEXT PRIMARY KEY,
+                heartbeat_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            ''')
+            conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.check_table_name} (
+                url TEXT PRIMARY KEY,
+                checked_at REAL NOT NULL
+            )
+            ''')
+            conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.detail_job_table_name} (
+                url TEXT PRIMARY KEY,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+            conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.detail_table_name} (
+                url TEXT PRIMARY KEY,
+                body TEXT,
+                error TEXT,
+                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+            conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.attachment_table_name} (
+                digest TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                content_type TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+            conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.article_attachment_table_name} (
+                article_url TEXT NOT NULL,
+                url TEXT NOT NULL,
+                name TEXT,
+                digest TEXT,
+                error TEXT,
+                PRIMARY KEY (article_url, url)
+            )
+            ''')
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.article_attachment_table_name}_url "
+                f"ON {self.article_attachment_table_name} (url)"
+            )
+            conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.backfill_target_table_name} (
+                url TEXT PRIMARY KEY,
+                pages INTEGER NOT NULL,
+                planned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+            conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.backfill_page_table_name} (
+                page_url TEXT PRIMARY KEY,
+                target_url TEXT NOT NULL,
+                page_no INTEGER NOT NULL,
+                done INTEGER NOT NULL DEFAULT 0,
+                items INTEGER,
+                added INTEGER,
+                last_error TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self.backfill_page_table_name}_target "
+                f"ON {self.backfill_page_table_name} (target_url, done)"
+            )
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+        current = self.schema_version() == SCHEMA_VERSION
+        if not current:
+            self._write(create_tables)
+        # 全文索引可单独开关，表结构版本一致时也要确认索引表存在
+        if self.enable_search and not (current and self._table_exists(self.search_table_name)):
+            added = self.init_search()
+            if added:
+                print(f"全文索引已补建 {added} 条")
+        if self.seen_index_mode:
+            self.load_seen_index()
         print(f"数据库 '{self.db_name}' 初始化成功")
-    
+
+    def schema_version(self):
+        """返回数据库记录的表结构版本，新建的数据库为 0"""
+        return self._query("PRAGMA user_version")[0][0]
+
+    def _table_exists(self, name):
+        return bool(self._query("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)))
+
+    def init_search(self):
+        """创建标题和正文全文索引，并补建索引中最大 id 之后的已有文章
+
+        返回: 补建的条数；SQLite 不支持 FTS5 时关闭检索并返回 0
+        """
+        def create_search(conn):
+            columns = [row[1] for row in conn.execute(f"PRAGMA table_info({self.search_table_name})")]
+            if columns and 'body' not in columns:
+                # 版本 5 之前的索引只有标题，删除后按已见表和详情表整体重建
+                conn.execute(f"DROP TABLE {self.search_table_name}")
+            # 无内容表：只存词元索引，标题等字段通过 rowid 关联已见表读取
+            conn.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.search_table_name} "
+                f"USING fts5(tokens, body, content='', tokenize='unicode61')"
+            )
+            indexed = conn.execute(f"SELECT MAX(rowid) FROM {self.search_table_name}").fetchone()[0] or 0
+            # 检索脚本不经过 init_db，旧数据库可能还没有详情表
+            has_details = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.detail_table_name,)
+            ).fetchone()
+            if has_details:
+                rows = conn.execute(
+                    f"SELECT s.id, s.title, d.body FROM {self.table_name} AS s "
+                    f"LEFT JOIN {self.detail_table_name} AS d ON d.url = s.url WHERE s.id > ?",
+                    (indexed,)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    f"SELECT id, title, NULL FROM {self.table_name} WHERE id > ?", (indexed,)
+                ).fetchall()
+            conn.executemany(
+                f"INSERT INTO {self.search_table_name} (rowid, tokens, body) VALUES (?, ?, ?)",
+                [(row_id, text_tokens(title), text_tokens(body) if body else None) for row_id, title, body in rows]
+            )
+            return len(rows)
+
+        try:
+            added = self._write(create_search)
+        except sqlite3.OperationalError as e:
+            # 部分发行版的 SQLite 未编译 FTS5
+            if 'fts5' not in str(e):
+                raise
+            self.enable_search = False
+            print(f"警告: 无法创建全文索引，检索功能不可用: {e}")
+            return 0
+        return added
+
+    def has_search_index(self):
+        """用只读查询检查当前版本（含正文列）的全文索引是否已建立"""
+        columns = [row[1] for row in self._query(f"PRAGMA table_info({self.search_table_name})")]
+        return 'body' in columns
+
+    def load_seen_index(self):
+        """从数据库全量加载已见 URL 内存索引"""
+        with self._lock, self._reading() as conn:
+            if self.seen_index_mode == 'bloom':
+                count = conn.execute(f"SELECT COUNT(*) FROM {self.table_name}").fetchone()[0]
+                index = BloomFilterIndex(
+                    max(count * 2, BLOOM_FILTER_MIN_CAPACITY), BLOOM_FILTER_FP_RATE
+                )
+            elif self.seen_index_mode == 'hash':
+                index = HashedUrlIndex()
+            else:
+                raise ValueError(f"未知的已见索引类型: {self.seen_index_mode}")
+            index.load(row[0] for row in conn.execute(f"SELECT url FROM {self.table_name}"))
+            self.seen_index = index
+
+    def _get_seen_index(self):
+        """获取已见 URL 索引（未加载时先加载），调用方需持有 self._lock"""
+        if self.seen_index is None and self.seen_index_mode:
+            self.load_seen_index()
+        return self.seen_index
+
+    def _remember_seen(self, urls):
+        """将已写入数据库的 URL 加入内存索引"""
+        with self._lock:
+            index = self.seen_index
+            if index is None:
+                return
+            for url in urls:
+                index.add(url)
+            if not index.exact and index.is_full():
+                self.load_seen_index()
+
     def is_article_seen(self, url):
         """检查URL是否已在数据库中"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT url FROM {self.table_name} WHERE url = ?", (url,))
-        result = cursor.fetchone()
-        conn.close()
-        return result is not None
-    
+        with self._lock:
+            index = self._get_seen_index()
+            if index is not None:
+                if not index.might_contain(url):
+                    return False
+                if index.exact:
+                    return True
+        rows = self._query(f"SELECT url FROM {self.table_name} WHERE url = ?", (url,))
+        return bool(rows)
+
     def add_article(self, url, title, college, category):
         """添加新文章到数据库"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        try:
-            cursor.execute(
-                f"INSERT INTO {self.table_name} (url, title, college, category) VALUES (?, ?, ?, ?)", 
+        def insert(conn):
+            cursor = conn.execute(
+                f"INSERT OR IGNORE INTO {self.table_name} (url, title, college, category) VALUES (?, ?, ?, ?)",
                 (url, title, college, category)
             )
-            conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            # URL已存在
-            return False
-        finally:
-            conn.close()
-    
+            # rowcount 为 0 表示 URL 已存在
+            return cursor.rowcount > 0
+
+        added = self._write(insert)
+        self._remember_seen([url])
+        return added
+
     def check_and_add_article(self, url, title, college, category):
         """
         检查URL是否已存在，如果不存在则添加到数据库并返回文章信息
         返回: 新文章信息字典，如果已存在则返回None
         """
-        if self.is_article_seen(url):
-            return None
-        
-        # 添加到数据库
-        self.add_article(url, title, college, category)
-        
-        # 返回文章信息
+        new_articles = self.check_and_add_articles([(url, title, college, category)])
+        return new_articles[0] if new_articles else None
+
+    def check_and_add_articles(self, rows):
+        """
+        批量检查并添加一个页面上的候选文章
+
+        先查内存索引和一次集合查询找出未见过的 URL，
+        再由单写线程在写事务中用 INSERT OR IGNORE 写入，以唯一约束为准确认哪些是新文章，
+        因此多个进程同时处理同一页面时每篇文章也只会返回一次。
+
+        参数:
+            rows: (url, title, college, category) 元组列表，按页面处理顺序排列
+
+        返回: 新文章信息字典列表，顺序与 rows 一致
+        """
+        # 同一页面中重复出现的 URL 只保留第一次
+        candidates = {}
+        for row in rows:
+            candidates.setdefault(row[0], row)
+        if not candidates:
+            return []
+
+        seen = self._lookup_seen(list(candidates))
+        new_rows = [row for url, row in candidates.items() if url not in seen]
+        if not new_rows:
+            return []
+
         now_str = datetime.now().strftime('%Y-%m-%d-%H-%M')
+
+        def insert_unseen(conn):
+            inserted = self._insert_seen_rows(conn, new_rows)
+            articles = [
+                {
+                    'id': row_id,
+                    'time': now_str,
+                    'college': college,
+                    'category': category,
+                    'title': title,
+                    'url': url
+                }
+                for row_id, url, title, college, category in inserted
+            ]
+            if self.enable_details:
+                conn.executemany(
+                    f"INSERT OR IGNORE INTO {self.detail_job_table_name} (url) VALUES (?)",
+                    [(article['url'],) for article in articles]
+                )
+            if self.enable_outbox:
+                # 与“已见”记录同一事务写入发件箱，崩溃或重启都不会丢通知
+                conn.executemany(
+                    f"INSERT INTO {self.outbox_table_name} (payload) VALUES (?)",
+                    [(json.dumps(article, ensure_ascii=False),) for article in articles]
+                )
+            return articles
+
+        articles = self._write(insert_unseen)
+        self._remember_seen([row[0] for row in new_rows])
+        if articles:
+            self._notify_committed(articles)
+        return articles
+
+    def _insert_seen_rows(self, conn, rows, backfilled=False):
+        """在写事务中写入已见记录（及全文索引），返回真正新写入的 [(id, url, title, college, category)]
+
+        由唯一约束决定哪些 URL 真正是第一次写入：其他线程或其他进程
+        可能在两次查询之间写入了相同 URL，此时 INSERT OR IGNORE 不产生变更。
+        backfilled 为 True 时标记为回填的旧文章，推送服务不会把它们当作新文章。
+        """
+        inserted = []
+        for row in rows:
+            cursor = conn.execute(
+                f"INSERT OR IGNORE INTO {self.table_name} (url, title, college, category, backfilled) "
+                f"VALUES (?, ?, ?, ?, ?)",
+                tuple(row) + (int(backfilled),)
+            )
+            if cursor.rowcount:
+                inserted.append((cursor.lastrowid,) + tuple(row))
+                if self.enable_search:
+                    conn.execute(
+                        f"INSERT INTO {self.search_table_name} (rowid, tokens) VALUES (?, ?)",
+                        (cursor.lastrowid, text_tokens(row[1]))
+                    )
+        return inserted
+
+    def _lookup_seen(self, urls):
+        """先查内存索引，只对索引无法确定的 URL 查询数据库，返回已见集合"""
+        with self._lock:
+            index = self._get_seen_index()
+            if index is None:
+                uncertain = urls
+                seen = set()
+            else:
+                seen = set()
+                uncertain = []
+                for url in urls:
+                    if not index.might_contain(url):
+                        continue
+                    if index.exact:
+                        seen.add(url)
+                    else:
+                        uncertain.append(url)
+        if uncertain:
+            with self._reading() as conn:
+                seen.update(self._select_seen(conn, uncertain))
+        return seen
+
+    def _select_seen(self, conn, urls):
+        """返回 urls 中已存在于数据库的集合"""
+        seen = set()
+        for start in range(0, len(urls), _MAX_QUERY_PARAMS):
+            chunk = urls[start:start + _MAX_QUERY_PARAMS]
+            placeholders = ','.join('?' * len(chunk))
+            cursor = conn.execute(
+                f"SELECT url FROM {self.table_name} WHERE url IN ({placeholders})", chunk
+            )
+            seen.update(row[0] for row in cursor)
+        return seen
+
+    def get_validators(self, url):
+        """获取页面的缓存校验信息
+
+        返回: (etag, last_modified) 元组，没有记录时返回 (None, None)
+        """
+        rows = self._query(
+            f"SELECT etag, last_modified FROM {self.validator_table_name} WHERE url = ?", (url,)
+        )
+        return rows[0] if rows else (None, None)
+
+    def save_validators(self, url, etag, last_modified):
+        """保存页面的缓存校验信息，两者都为空时删除记录"""
+        def save(conn):
+            if etag is None and last_modified is None:
+                conn.execute(f"DELETE FROM {self.validator_table_name} WHERE url = ?", (url,))
+            else:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {self.validator_table_name} "
+                    f"(url, etag, last_modified, updated_at) VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
+                    (url, etag, last_modified)
+                )
+
+        self._write(save)
+
+    def get_fingerprint(self, url):
+        """获取目标列表区域上一轮的指纹，没有记录时返回 None"""
+        rows = self._query(
+            f"SELECT fingerprint FROM {self.fingerprint_table_name} WHERE url = ?", (url,)
+        )
+        return rows[0][0] if rows else None
+
+    def save_fingerprint(self, url, fingerprint):
+        """保存目标列表区域的指纹"""
+        self._write(lambda conn: conn.execute(
+            f"INSERT OR REPLACE INTO {self.fingerprint_table_name} "
+            f"(url, fingerprint, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)",
+            (url, fingerprint)
+        ))
+
+    def get_high_water_mark(self, url):
+        """获取目标的高水位记录
+
+        返回: {'head': 上一轮扫描过的头部 URL 列表, 'pinned': 置顶 URL 列表}
+        """
+        rows = self._query(
+            f"SELECT state FROM {self.high_water_table_name} WHERE url = ?", (url,)
+        )
+        return json.loads(rows[0][0]) if rows else {'head': [], 'pinned': []}
+
+    def save_high_water_mark(self, url, mark):
+        """保存目标的高水位记录"""
+        self._write(lambda conn: conn.execute(
+            f"INSERT OR REPLACE INTO {self.high_water_table_name} "
+            f"(url, state, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)",
+            (url, json.dumps(mark, ensure_ascii=False))
+        ))
+
+    def record_cycle(self, name, started_at, budget_seconds, elapsed_seconds, targets,
+                     skipped_urls, new_articles):
+        """记录一轮爬取的耗时与预算使用情况
+
+        参数:
+            name: 监控任务名称
+            started_at: 开始时间（datetime）
+            budget_seconds: 本轮时间预算
+            elapsed_seconds: 实际耗时
+            targets: 本轮目标数
+            skipped_urls: 因预算耗尽未检查的目标 URL 列表
+            new_articles: 新文章数
+        """
+        used_ratio = elapsed_seconds / budget_seconds if budget_seconds else 0.0
+        overrun = bool(skipped_urls) or elapsed_seconds > budget_seconds
+        self._write(lambda conn: conn.execute(
+            f"INSERT INTO {self.cycle_table_name} (name, started_at, budget_seconds, elapsed_seconds, "
+            f"used_ratio, overrun, targets, skipped_targets, new_articles) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (name, started_at.strftime('%Y-%m-%d %H:%M:%S'), budget_seconds, elapsed_seconds, used_ratio,
+             int(overrun), targets, json.dumps(skipped_urls), new_articles)
+        ))
+
+    def get_cycle_summary(self, since=None):
+        """按监控任务汇总爬取轮次，用于根据实际耗时调整间隔
+
+        参数:
+            since: 只统计该时间（datetime）之后开始的轮次，None 表示全部
+
+        返回: {任务名: {'cycles', 'overruns', 'avg_elapsed', 'max_elapsed', 'avg_used_ratio', 'max_used_ratio'}}
+        """
+        sql = (f"SELECT name, COUNT(*), SUM(overrun), AVG(elapsed_seconds), MAX(elapsed_seconds), "
+               f"AVG(used_ratio), MAX(used_ratio) FROM {self.cycle_table_name}")
+        params = ()
+        if since is not None:
+            sql += " WHERE started_at >= ?"
+            params = (since.strftime('%Y-%m-%d %H:%M:%S'),)
+        summary = {}
+        for name, cycles, overruns, avg_elapsed, max_elapsed, avg_ratio, max_ratio in self._query(
+                sql + " GROUP BY name", params):
+            summary[name] = {
+                'cycles': cycles,
+                'overruns': overruns,
+                'avg_elapsed': round(avg_elapsed, 2),
+                'max_elapsed': round(max_elapsed, 2),
+                'avg_used_ratio': round(avg_ratio, 3),
+                'max_used_ratio': round(max_ratio, 3),
+            }
+        return summary
+
+    def get_last_checked(self, urls):
+        """返回 {URL: 上次检查时间戳}，从未检查过的 URL 不在结果中"""
+        checked = {}
+        for start in range(0, len(urls), _MAX_QUERY_PARAMS):
+            chunk = urls[start:start + _MAX_QUERY_PARAMS]
+            placeholders = ','.join('?' * len(chunk))
+            checked.update(self._query(
+                f"SELECT url, checked_at FROM {self.check_table_name} WHERE url IN ({placeholders})", chunk
+            ))
+        return checked
+
+    def mark_checked(self, urls, checked_at):
+        """记录目标的检查时间，供单次运行模式判断哪些目标到期"""
+        self._write(lambda conn: conn.executemany(
+            f"INSERT OR REPLACE INTO {self.check_table_name} (url, checked_at) VALUES (?, ?)",
+            [(url, checked_at) for url in urls]
+        ))
+
+    def add_snapshot(self, url, digest, size, fetched_at):
+        """记录一次页面快照"""
+        self._write(lambda conn: conn.execute(
+            f"INSERT INTO {self.snapshot_table_name} (url, digest, size, fetched_at) VALUES (?, ?, ?, ?)",
+            (url, digest, size, fetched_at.strftime('%Y-%m-%d %H:%M:%S'))
+        ))
+
+    def get_snapshots(self, url, since=None, until=None):
+        """按抓取时间顺序返回目标的快照 [(摘要, 抓取时间, 原始大小)]
+
+        参数:
+            url: 目标 URL
+            since, until: 抓取时间范围（datetime，两端都包含），None 表示不限
+        """
+        sql = f"SELECT digest, fetched_at, size FROM {self.snapshot_table_name} WHERE url = ?"
+        params = [url]
+        if since is not None:
+            sql += " AND fetched_at >= ?"
+            params.append(since.strftime('%Y-%m-%d %H:%M:%S'))
+        if until is not None:
+            sql += " AND fetched_at <= ?"
+            params.append(until.strftime('%Y-%m-%d %H:%M:%S'))
+        return self._query(sql + " ORDER BY fetched_at, id", params)
+
+    def search_titles(self, query, college=None, category=None, since=None, until=None, limit=20, offset=0,
+                      order='relevance'):
+        """在标题和正文全文索引中检索
+
+        参数:
+            query: 检索词，空格分隔的多个词须同时出现
+            college, category: 按学院、栏目精确过滤，None 表示不限
+            since, until: 首次发现时间范围（本地时间的 datetime，两端都包含），None 表示不限
+            limit, offset: 分页
+            order: 'relevance' 按相关度（BM25）排序，需要为全部匹配项打分；
+                'recent' 按首次发现由新到旧，匹配项很多时更快
+
+        返回: (匹配总数, [文章字典])，字典含 title、college、category、url、first_seen_at（本地时间）
+        """
+        if not self.enable_search:
+            raise RuntimeError("全文索引未启用")
+        match = build_match(query)
+        if match is None:
+            return 0, []
+
+        if order not in ('relevance', 'recent'):
+            raise ValueError(f"不支持的排序方式: {order}")
+        where = f"{self.search_table_name} MATCH ?"
+        params = [match]
+        filtered = any(value is not None for value in (college, category, since, until))
+        for column, value in (('college', college), ('category', category)):
+            if value is not None:
+                where += f" AND s.{column} = ?"
+                params.append(value)
+        # first_seen_at 由 CURRENT_TIMESTAMP 写入，为 UTC 时间
+        if since is not None:
+            where += " AND s.first_seen_at >= ?"
+            params.append(since.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'))
+        if until is not None:
+            where += " AND s.first_seen_at <= ?"
+            params.append(until.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'))
+        source = (f"FROM {self.search_table_name} JOIN {self.table_name} AS s "
+                  f"ON s.id = {self.search_table_name}.rowid WHERE {where}")
+
+        if filtered:
+            total = self._query(f"SELECT COUNT(*) {source}", params)[0][0]
+        else:
+            # 没有过滤条件时只需数索引中的匹配项，不必关联已见表
+            total = self._query(f"SELECT COUNT(*) FROM {self.search_table_name} WHERE {where}", params)[0][0]
+        if order == 'relevance':
+            order_by = (f"bm25({self.search_table_name}, {SEARCH_TITLE_WEIGHT}, 1.0), "
+                        f"{self.search_table_name}.rowid DESC")
+        else:
+            order_by = f"{self.search_table_name}.rowid DESC"
+        rows = self._query(
+            f"SELECT s.title, s.college, s.category, s.url, s.first_seen_at {source} "
+            f"ORDER BY {order_by} LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        )
+        return total, [
+            {
+                'title': title,
+                'college': college,
+                'category': category,
+                'url': url,
+                'first_seen_at': datetime.strptime(first_seen_at, '%Y-%m-%d %H:%M:%S')
+                .replace(tzinfo=timezone.utc).astimezone().strftime('%Y-%m-%d %H:%M:%S'),
+            }
+            for title, college, category, url, first_seen_at in rows
+        ]
+
+    def get_latest_article_id(self):
+        """返回最新一篇日常爬取发现的文章的 id（不含回填的旧文章），没有文章时返回 0"""
+        return self._query(
+            f"SELECT COALESCE(MAX(id), 0) FROM {self.table_name} WHERE backfilled = 0"
+        )[0][0]
+
+    def get_articles_after(self, after_id, limit):
+        """按 id 顺序返回 after_id 之后首次发现的文章
+
+        写事务依次分配 id 并提交（进程内由单写线程、多进程间由 SQLite 写锁串行化），
+        较小的 id 不会在较大的 id 之后才可见，因此记住最后一个 id 即可从断点继续。
+        回填写入的旧文章不是新文章，不会返回。
+
+        返回: 文章字典列表，与 check_and_add_articles 的返回格式相同（time 为本地时间）
+        """
+        rows = self._query(
+            f"SELECT id, url, title, college, category, first_seen_at FROM {self.table_name} "
+            f"WHERE id > ? AND backfilled = 0 ORDER BY id LIMIT ?",
+            (after_id, limit)
+        )
+        return [
+            {
+                'id': row_id,
+                'time': datetime.strptime(first_seen_at, '%Y-%m-%d %H:%M:%S')
+                .replace(tzinfo=timezone.utc).astimezone().strftime('%Y-%m-%d-%H-%M'),
+                'college': college,
+                'category': category,
+                'title': title,
+                'url': url,
+            }
+            for row_id, url, title, college, category, first_seen_at in rows
+        ]
+
+    def register_worker(self, worker_id, ttl):
+        """登记（续期）一个分片工作进程，ttl 秒内没有续期即视为失联"""
+        now = time.time()
+        self._write(lambda conn: conn.execute(
+            f"INSERT OR REPLACE INTO {self.worker_table_name} (worker_id, heartbeat_at, expires_at) "
+            f"VALUES (?, ?, ?)",
+            (worker_id, now, now + ttl)
+        ))
+
+    def rebalance_leases(self, worker_id, urls, ttl):
+        """续期本进程的租约，并按存活进程数重新分配目标
+
+        在一个写事务中完成：登记心跳、清理失联进程、续期已持有的租约；
+        持有数超过平均份额时释放多余的，不足时认领无主或已过期的租约。
+
+        参数:
+            worker_id: 本进程标识
+            urls: 需要分配的全部目标 URL
+            ttl: 租约与心跳有效期（秒）
+
+        返回:
+            本进程当前持有租约的 URL 列表
+        """
+        def rebalance(conn):
+            now = time.time()
+            expires_at = now + ttl
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.worker_table_name} (worker_id, heartbeat_at, expires_at) "
+                f"VALUES (?, ?, ?)",
+                (worker_id, now, expires_at)
+            )
+            conn.execute(f"DELETE FROM {self.worker_table_name} WHERE expires_at < ?", (now,))
+            live_workers = conn.execute(f"SELECT COUNT(*) FROM {self.worker_table_name}").fetchone()[0]
+            share = -(-len(urls) // max(1, live_workers))
+
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {self.lease_table_name} (url, owner, expires_at) VALUES (?, NULL, 0)",
+                [(url,) for url in urls]
+            )
+            conn.execute(
+                f"UPDATE {self.lease_table_name} SET expires_at = ? WHERE owner = ?", (expires_at, worker_id)
+            )
+            wanted = set(urls)
+            owned = sorted(
+                url for (url,) in conn.execute(
+                    f"SELECT url FROM {self.lease_table_name} WHERE owner = ?", (worker_id,)
+                ) if url in wanted
+            )
+
+            if len(owned) > share:
+                # 新进程加入后让出多余的目标，由其他进程在下一次心跳时认领
+                conn.executemany(
+                    f"UPDATE {self.lease_table_name} SET owner = NULL, expires_at = 0 "
+                    f"WHERE url = ? AND owner = ?",
+                    [(url, worker_id) for url in owned[share:]]
+                )
+                owned = owned[:share]
+            elif len(owned) < share:
+                free = [
+                    url for (url,) in conn.execute(
+                        f"SELECT url FROM {self.lease_table_name} "
+                        f"WHERE owner IS NULL OR expires_at < ? ORDER BY url", (now,)
+                    ) if url in wanted
+                ]
+                for url in free[:share - len(owned)]:
+                    cursor = conn.execute(
+                        f"UPDATE {self.lease_table_name} SET owner = ?, expires_at = ? "
+                        f"WHERE url = ? AND (owner IS NULL OR expires_at < ?)",
+                        (worker_id, expires_at, url, now)
+                    )
+                    if cursor.rowcount:
+                        owned.append(url)
+            return owned
+
+        return self._write(rebalance)
+
+    def release_leases(self, worker_id):
+        """释放本进程的全部租约并注销，其他进程下一次心跳即可接管"""
+        def release(conn):
+            conn.execute(
+                f"UPDATE {self.lease_table_name} SET owner = NULL, expires_at = 0 WHERE owner = ?", (worker_id,)
+            )
+            conn.execute(f"DELETE FROM {self.worker_table_name} WHERE worker_id = ?", (worker_id,))
+        self._write(release)
+
+    def fetch_due_notifications(self, limit, claim_seconds):
+        """取出到期待投递的通知，并在 claim_seconds 秒内对其他投递进程隐藏
+
+        多个工作进程共享发件箱时，同一条通知只会被其中一个取出；
+        取出后进程崩溃、未确认也未重排的通知在 claim_seconds 后重新到期。
+
+        返回: [(id, 文章信息字典, 已尝试次数)]，按写入顺序排列
+        """
+        def claim(conn):
+            now = time.time()
+            rows = conn.execute(
+                f"SELECT id, payload, attempts FROM {self.outbox_table_name} "
+                f"WHERE next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (now, limit)
+            ).fetchall()
+            conn.executemany(
+                f"UPDATE {self.outbox_table_name} SET next_attempt_at = ? WHERE id = ?",
+                [(now + claim_seconds, row_id) for row_id, _, _ in rows]
+            )
+            return rows
+        rows = self._write(claim)
+        return [(row_id, json.loads(payload), attempts) for row_id, payload, attempts in rows]
+
+    def next_notification_due(self):
+        """返回最早一条待投递通知的计划时间，发件箱为空时返回 None"""
+        rows = self._query(f"SELECT MIN(next_attempt_at) FROM {self.outbox_table_name}")
+        return rows[0][0]
+
+    def count_pending_notifications(self):
+        """返回发件箱中尚未投递成功的通知数（含等待重试的）"""
+        return self._query(f"SELECT COUNT(*) FROM {self.outbox_table_name}")[0][0]
+
+    def complete_notifications(self, ids):
+        """投递成功后从发件箱删除"""
+        self._write(lambda conn: conn.executemany(
+            f"DELETE FROM {self.outbox_table_name} WHERE id = ?", [(row_id,) for row_id in ids]
+        ))
+
+    def reschedule_notifications(self, ids, error, delay):
+        """投递失败后记录错误并推迟到 delay 秒后重试"""
+        next_attempt_at = time.time() + delay
+        self._write(lambda conn: conn.executemany(
+            f"UPDATE {self.outbox_table_name} SET attempts = attempts + 1, next_attempt_at = ?, "
+            f"last_error = ? WHERE id = ?",
+            [(next_attempt_at, error, row_id) for row_id in ids]
+        ))
+
+    def claim_detail_jobs(self, limit, claim_seconds):
+        """取出到期的详情页抓取任务，并在 claim_seconds 秒内对其他进程隐藏
+
+        返回: [(文章 URL, 已尝试次数)]
+        """
+        def claim(conn):
+            now = time.time()
+            rows = conn.execute(
+                f"SELECT url, attempts FROM {self.detail_job_table_name} "
+                f"WHERE next_attempt_at <= ? ORDER BY created_at, url LIMIT ?",
+                (now, limit)
+            ).fetchall()
+            conn.executemany(
+                f"UPDATE {self.detail_job_table_name} SET next_attempt_at = ? WHERE url = ?",
+                [(now + claim_seconds, url) for url, _ in rows]
+            )
+            return rows
+        return self._write(claim)
+
+    def next_detail_job_due(self):
+        """返回最早一个详情页任务的计划时间，队列为空时返回 None"""
+        return self._query(f"SELECT MIN(next_attempt_at) FROM {self.detail_job_table_name}")[0][0]
+
+    def find_attachment(self, url=None, digest=None):
+        """按附件 URL（之前下载成功过的）或内容摘要查找已存的附件
+
+        返回: (摘要, 文件路径)，没有时返回 None
+        """
+        if url is not None:
+            rows = self._query(
+                f"SELECT a.digest, a.path FROM {self.article_attachment_table_name} AS aa "
+                f"JOIN {self.attachment_table_name} AS a ON a.digest = aa.digest WHERE aa.url = ? LIMIT 1",
+                (url,)
+            )
+        else:
+            rows = self._query(
+                f"SELECT digest, path FROM {self.attachment_table_name} WHERE digest = ?", (digest,)
+            )
+        return rows[0] if rows else None
+
+    def complete_detail_job(self, url, body, attachments):
+        """在同一事务中保存正文和附件记录并移出队列
+
+        参数:
+            url: 文章 URL
+            body: 提取的正文文本
+            attachments: 附件字典列表，含 url、name、digest、path、size、content_type、error；
+                下载失败的附件 digest 为 None
+        """
+        def complete(conn):
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {self.attachment_table_name} (digest, path, size, content_type) "
+                f"VALUES (?, ?, ?, ?)",
+                [(item['digest'], item['path'], item['size'], item['content_type'])
+                 for item in attachments if item['digest']]
+            )
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.article_attachment_table_name} (article_url, url, name, digest, error) "
+                f"VALUES (?, ?, ?, ?, ?)",
+                [(url, item['url'], item['name'], item['digest'], item['error']) for item in attachments]
+            )
+            self._index_body(conn, url, body)
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.detail_table_name} (url, body, error) VALUES (?, ?, NULL)",
+                (url, body)
+            )
+            conn.execute(f"DELETE FROM {self.detail_job_table_name} WHERE url = ?", (url,))
+        self._write(complete)
+
+    def _index_body(self, conn, url, body):
+        """在写事务中把文章的全文索引条目换成新的正文，须在详情表更新之前调用
+
+        无内容的 FTS5 表不能直接更新，要先用写入时的原值执行 'delete' 命令再重新写入；
+        标题词元由已见表重新计算，旧正文从详情表读取。
+        """
+        if not self.enable_search:
+            return
+        article = conn.execute(f"SELECT id, title FROM {self.table_name} WHERE url = ?", (url,)).fetchone()
+        if article is None:
+            return
+        row_id, title = article
+        old = conn.execute(f"SELECT body FROM {self.detail_table_name} WHERE url = ?", (url,)).fetchone()
+        old_body = old[0] if old else None
+        if old_body == body:
+            return
+        tokens = text_tokens(title)
+        conn.execute(
+            f"INSERT INTO {self.search_table_name} ({self.search_table_name}, rowid, tokens, body) "
+            f"VALUES ('delete', ?, ?, ?)",
+            (row_id, tokens, text_tokens(old_body) if old_body else None)
+        )
+        conn.execute(
+            f"INSERT INTO {self.search_table_name} (rowid, tokens, body) VALUES (?, ?, ?)",
+            (row_id, tokens, text_tokens(body) if body else None)
+        )
+
+    def reschedule_detail_job(self, url, error, delay):
+        """抓取失败后记录错误并推迟到 delay 秒后重试"""
+        self._write(lambda conn: conn.execute(
+            f"UPDATE {self.detail_job_table_name} SET attempts = attempts + 1, next_attempt_at = ?, "
+            f"last_error = ? WHERE url = ?",
+            (time.time() + delay, error, url)
+        ))
+
+    def fail_detail_job(self, url, error):
+        """重试次数用完后放弃，记录错误并移出队列"""
+        def fail(conn):
+            self._index_body(conn, url, None)
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.detail_table_name} (url, body, error) VALUES (?, NULL, ?)",
+                (url, error)
+            )
+            conn.execute(f"DELETE FROM {self.detail_job_table_name} WHERE url = ?", (url,))
+        self._write(fail)
+
+    def get_detail(self, url):
+        """返回文章的正文和附件，尚未抓取时返回 None
+
+        返回: {'body', 'error', 'fetched_at', 'attachments': [{'url', 'name', 'digest', 'path', 'error'}]}
+        """
+        rows = self._query(
+            f"SELECT body, error, fetched_at FROM {self.detail_table_name} WHERE url = ?", (url,)
+        )
+        if not rows:
+            return None
+        body, error, fetched_at = rows[0]
+        attachments = self._query(
+            f"SELECT aa.url, aa.name, aa.digest, a.path, aa.error FROM {self.article_attachment_table_name} AS aa "
+            f"LEFT JOIN {self.attachment_table_name} AS a ON a.digest = aa.digest WHERE aa.article_url = ?",
+            (url,)
+        )
         return {
-            'time': now_str,
-            'college': college,
-            'category': category,
-            'title': title,
-            'url': url
+            'body': body,
+            'error': error,
+            'fetched_at': fetched_at,
+            'attachments': [
+                {'url': item_url, 'name': name, 'digest': digest, 'path': path, 'error': item_error}
+                for item_url, name, digest, path, item_error in attachments
+            ],
         }
 
+    def get_backfill_pages(self, target_url):
+        """返回目标的分页计划总页数，尚未规划时返回 None"""
+        rows = self._query(
+            f"SELECT pages FROM {self.backfill_target_table_name} WHERE url = ?", (target_url,)
+        )
+        return rows[0][0] if rows else None
+
+    def save_backfill_plan(self, target_url, pages):
+        """保存目标的分页计划，已完成的分页保持完成状态
+
+        参数:
+            target_url: 目标（列表首页）URL
+            pages: [(分页 URL, 页码)]，列表首页的页码为 0
+        """
+        def save(conn):
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.backfill_target_table_name} (url, pages) VALUES (?, ?)",
+                (target_url, len(pages))
+            )
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {self.backfill_page_table_name} (page_url, target_url, page_no) "
+                f"VALUES (?, ?, ?)",
+                [(page_url, target_url, page_no) for page_url, page_no in pages]
+            )
+        self._write(save)
+
+    def get_pending_backfill_pages(self, target_url):
+        """返回目标尚未完成的分页 [(分页 URL, 页码)]，由新到旧（页码为 0 的列表首页最先）"""
+        return self._query(
+            f"SELECT page_url, page_no FROM {self.backfill_page_table_name} "
+            f"WHERE target_url = ? AND done = 0 ORDER BY page_no = 0 DESC, page_no DESC",
+            (target_url,)
+        )
+
+    def complete_backfill_page(self, page_url, rows):
+        """在同一事务中写入一个分页的文章并标记该分页完成
+
+        不写入通知发件箱和详情页队列，也不触发提交回调；文章带回填标记，
+        推送服务按 id 读取新文章时会跳过它们，回填的旧文章不会发出通知或推送。
+
+        参数:
+            page_url: 分页 URL
+            rows: (url, title, college, category) 元组列表
+
+        返回: 新写入的文章数
+        """
+        def complete(conn):
+            inserted = self._insert_seen_rows(conn, rows, backfilled=True)
+            conn.execute(
+                f"UPDATE {self.backfill_page_table_name} SET done = 1, items = ?, added = ?, last_error = NULL, "
+                f"updated_at = CURRENT_TIMESTAMP WHERE page_url = ?",
+                (len(rows), len(inserted), page_url)
+            )
+            return len(inserted)
+
+        added = self._write(complete)
+        self._remember_seen([row[0] for row in rows])
+        return added
+
+    def fail_backfill_page(self, page_url, error):
+        """记录分页抓取失败，分页保持未完成，下次回填时重试"""
+        self._write(lambda conn: conn.execute(
+            f"UPDATE {self.backfill_page_table_name} SET last_error = ?, updated_at = CURRENT_TIMESTAMP "
+            f"WHERE page_url = ?",
+            (error, page_url)
+        ))
+
+    def get_backfill_progress(self):
+        """返回各目标的回填进度 {目标 URL: {'pages', 'done', 'items', 'added', 'failed'}}"""
+        rows = self._query(
+            f"SELECT target_url, COUNT(*), SUM(done), COALESCE(SUM(items), 0), COALESCE(SUM(added), 0), "
+            f"SUM(done = 0 AND last_error IS NOT NULL) FROM {self.backfill_page_table_name} GROUP BY target_url"
+        )
+        return {
+            target_url: {'pages': pages, 'done': done, 'items': items, 'added': added, 'failed': failed}
+            for target_url, pages, done, items, added, failed in rows
+        }
@@ -0,0 +1,185 @@
+"""数据库单写线程模块
+
+同一数据库文件的所有写操作都通过一个专用线程执行，
+多个写请求合并到同一事务中提交（group commit），读操作在 WAL 模式下并发进行。
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from .config import (
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE_KB,
+    SQLITE_SYNCHRONOUS,
+    WRITER_BATCH_SIZE,
+    WRITER_COMMIT_DELAY
+)
+
+
+def configure_connection(conn):
+    """为连接设置 WAL 模式及性能相关的 PRAGMA"""
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute(f'PRAGMA synchronous={SQLITE_SYNCHRONOUS}')
+    conn.execute(f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}')
+    conn.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+    conn.execute('PRAGMA temp_store=MEMORY')
+
+
+def open_connection(db_name):
+    """打开一个已配置好的连接，事务边界由调用方显式控制"""
+    conn = sqlite3.connect(
+        db_name,
+        check_same_thread=False,
+        isolation_level=None,
+        timeout=SQLITE_BUSY_TIMEOUT_MS / 1000
+    )
+    configure_connection(conn)
+    return conn
+
+
+class DatabaseWriter:
+    """单写线程
+
+    写操作以 func(conn) 的形式提交，按到达顺序执行；一次事务中最多合并
+    WRITER_BATCH_SIZE 个操作，每个操作包在独立的 SAVEPOINT 中，
+    单个操作失败只回滚它自己。
+
+    参数:
+        db_name: 数据库文件名
+    """
+
+    def __init__(self, db_name):
+        self.db_name = db_name
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.commits = 0
+        self.jobs = 0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"DatabaseWriter-{os.path.basename(db_name)}",
+            daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, func):
+        """提交写操作，返回 Future，结果为 func(conn) 的返回值"""
+        future = Future()
+        self._queue.put((func, future, time.perf_counter()))
+        return future
+
+    def execute(self, func):
+        """提交写操作并等待其所在事务提交"""
+        return self.submit(func).result()
+
+    def stop(self):
+        """处理完已提交的操作后停止写线程"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def get_stats(self):
+        """返回提交次数、操作数及写延迟（从提交到事务完成）"""
+        with self._stats_lock:
+            return {
+                'commits': self.commits,
+                'jobs': self.jobs,
+                'avg_latency_ms': round(self.total_latency / self.jobs * 1000, 2) if self.jobs else 0.0,
+                'max_latency_ms': round(self.max_latency * 1000, 2),
+            }
+
+    def _collect_batch(self, first):
+        """在首个操作之后收集短时间内到达的其他操作"""
+        batch = [first]
+        deadline = time.perf_counter() + WRITER_COMMIT_DELAY
+        while len(batch) < WRITER_BATCH_SIZE:
+            remaining = deadline - time.perf_counter()
+            try:
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(job)
+            if job is None:
+                break
+        return batch
+
+    def _run(self):
+        conn = open_connection(self.db_name)
+        stopping = False
+        while not stopping:
+            batch = self._collect_batch(self._queue.get())
+            if batch[-1] is None:
+                stopping = True
+                batch.pop()
+            if batch:
+                self._commit_batch(conn, batch)
+        conn.close()
+
+    def _commit_batch(self, conn, batch):
+        results = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for func, future, _ in batch:
+                conn.execute('SAVEPOINT job')
+                try:
+                    results.append((future, func(conn), None))
+                    conn.execute('RELEASE job')
+                except Exception as e:
+                    conn.execute('ROLLBACK TO job')
+                    conn.execute('RELEASE job')
+                    results.append((future, None, e))
+            conn.execute('COMMIT')
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        now = time.perf_counter()
+        with self._stats_lock:
+            self.commits += 1
+            for _, _, submitted_at in batch:
+                latency = now - submitted_at
+                self.jobs += 1
+                self.total_latency += latency
+                self.max_latency = max(self.max_latency, latency)
+
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def acquire_writer(db_name):
+    """获取数据库文件对应的共享写线程（引用计数）"""
+    key = os.path.abspath(db_name)
+    with _writers_lock:
+        entry = _writers.get(key)
+        if entry is None:
+            entry = _writers[key] = [DatabaseWriter(db_name), 0]
+        entry[1] += 1
+        return entry[0]
+
+
+def release_writer(db_name):
+    """释放写线程引用，最后一个引用释放时停止写线程"""
+    key = os.path.abspath(db_name)
+    with _writers_lock:
+        entry = _writers.get(key)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] > 0:
+            return
+        del _writers[key]
+    entry[0].stop()
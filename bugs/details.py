@@ -0,0 +1,368 @@
+"""详情页抓取模块 - 抓取新文章的正文和附件
+
+新文章在入库的同一事务中加入详情页队列（detail_jobs），由后台线程池独立处理，
+使用自己的 HTTP 客户端和并发上限，列表页轮询不会等待这一阶段。
+
+附件分块流式写入临时文件并同时计算 SHA-256，内容相同的附件只保存一份，
+存放在 ATTACHMENT_DIR/<摘要前两位>/<摘要><扩展名>。文章链接本身指向附件或返回的不是 HTML 时，
+同样流式保存为该文章的附件，不读入内存解析；HTML 详情页超过 DETAIL_PAGE_MAX_BYTES 时放弃。
+抓取失败按指数退避重试，超过 DETAIL_MAX_ATTEMPTS 次后放弃并记录错误。
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urljoin, urlsplit
+
+from .config import (
+    DETAIL_MAX_WORKERS,
+    DETAIL_MAX_PER_HOST,
+    DETAIL_MAX_ATTEMPTS,
+    DETAIL_RETRY_BASE_SECONDS,
+    DETAIL_RETRY_MAX_SECONDS,
+    DETAIL_POLL_SECONDS,
+    DETAIL_CLAIM_SECONDS,
+    DETAIL_PAGE_MAX_BYTES,
+    DETAIL_CONTENT_XPATHS,
+    ATTACHMENT_DIR,
+    ATTACHMENT_EXTENSIONS,
+    ATTACHMENT_URL_PATTERNS,
+    ATTACHMENT_MAX_BYTES,
+    ATTACHMENT_CHUNK_SIZE
+)
+from .encoding import get_encoding_resolver, parse_html
+from .http_client import HttpClient
+from .output import locked_print
+
+_FILENAME_RE = re.compile(r"filename\*?=(?:UTF-8'')?\"?([^\";]+)", re.IGNORECASE)
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+_HTML_TYPES = ('text/html', 'application/xhtml+xml')
+
+
+def _extension(url, content_type=None, disposition=None):
+    """依次从 Content-Disposition、URL 路径和 Content-Type 推断附件扩展名"""
+    for name in (_disposition_name(disposition), unquote(urlsplit(url).path)):
+        ext = os.path.splitext(name or '')[1].lower()
+        if ext in ATTACHMENT_EXTENSIONS:
+            return ext
+    if content_type:
+        return mimetypes.guess_extension(content_type.split(';')[0].strip()) or ''
+    return ''
+
+
+def _disposition_name(disposition):
+    match = _FILENAME_RE.search(disposition or '')
+    return unquote(match.group(1)) if match else None
+
+
+def _is_attachment(url):
+    path = urlsplit(url).path.lower()
+    return (os.path.splitext(path)[1] in ATTACHMENT_EXTENSIONS
+            or any(pattern in path for pattern in ATTACHMENT_URL_PATTERNS))
+
+
+def _is_html(content_type):
+    # 没有 Content-Type 的页面按 HTML 处理
+    return not content_type or content_type.split(';')[0].strip().lower() in _HTML_TYPES
+
+
+def _read_capped(response, limit):
+    """分块读取响应体，超过 limit 字节时放弃"""
+    chunks, size = [], 0
+    for chunk in response.iter_content(ATTACHMENT_CHUNK_SIZE):
+        size += len(chunk)
+        if size > limit:
+            raise ValueError(f"详情页超过 {limit} 字节")
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def parse_detail(content, base_url, encoding):
+    """从详情页提取正文文本和附件链接
+
+    参数:
+        content: 详情页原始字节
+        base_url: 详情页 URL，用于补全相对链接
+        encoding: 页面编码
+
+    返回: (正文文本, [(附件 URL, 链接文字)])，找不到正文区域时正文为整页文本
+    """
+    tree = parse_html(content, encoding)
+    for node in tree.xpath('//script | //style'):
+        node.getparent().remove(node)
+
+    content = None
+    for xpath in DETAIL_CONTENT_XPATHS:
+        nodes = tree.xpath(xpath)
+        if nodes:
+            content = nodes[0]
+            break
+    text = '\n'.join(line.strip() for line in (content if content is not None else tree).itertext())
+    body = _BLANK_LINES_RE.sub('\n', text).strip()
+
+    # 附件链接常放在正文区域之外（如页面底部的“附件”列表），因此在整页查找
+    attachments, seen = [], set()
+    for link in tree.xpath('//a[@href]'):
+        url = urljoin(base_url, link.get('href').strip())
+        if url in seen or not _is_attachment(url):
+            continue
+        seen.add(url)
+        attachments.append((url, ''.join(link.itertext()).strip()))
+    return body, attachments
+
+
+class DetailFetcher:
+    """后台详情页抓取线程池
+
+    参数:
+        db_manager: 数据库管理器实例（队列所在数据库）
+        http_client: 使用的 HTTP 客户端，未指定时自建一个，与列表页请求互不占用连接
+        print_lock: 打印锁
+        max_workers: 同时处理的文章数
+        max_per_host: 同一主机同时进行的请求数
+        attachment_dir: 附件存放目录
+    """
+
+    def __init__(self, db_manager, http_client=None, print_lock=None, max_workers=DETAIL_MAX_WORKERS,
+                 max_per_host=DETAIL_MAX_PER_HOST, attachment_dir=ATTACHMENT_DIR):
+        self.db_manager = db_manager
+        self.http = http_client or HttpClient()
+        self._owns_http = http_client is None
+        self.print_lock = print_lock
+        self.max_workers = max(1, max_workers)
+        self.attachment_dir = attachment_dir
+        self.fetched = 0
+        self.failed = 0
+        self.attachments_downloaded = 0
+        self.attachments_reused = 0
+        self._host_slots = defaultdict(lambda: threading.BoundedSemaphore(max(1, max_per_host)))
+        self._slots_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+        self._idle = threading.Condition()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._pool = None
+        self._thread = None
+
+    def _print(self, *args, **kwargs):
+        locked_print(self.print_lock, *args, **kwargs)
+
+    def _count(self, name, n=1):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def _ensure_pool(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="DetailFetch")
+        return self._pool
+
+    def start(self):
+        """启动调度线程，并在新文章提交后立即唤醒它"""
+        self._ensure_pool()
+        self.db_manager.add_commit_listener(lambda articles: self._wakeup.set())
+        self._thread = threading.Thread(target=self._run, name="DetailFetcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """停止抓取，未完成的任务留在队列中，认领到期后由下次运行继续"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._pool is not None:
+            # 指定超时时不等进行中的下载完成，它们的任务会在认领到期后重新处理
+            self._pool.shutdown(wait=timeout is None, cancel_futures=True)
+        if self._owns_http:
+            self.http.close()
+
+    def drain(self, timeout):
+        """单次运行结束前尽量处理当前到期的任务
+
+        参数:
+            timeout: 最长等待时间（秒）
+
+        返回: 是否已无到期任务
+        """
+        deadline = time.monotonic() + timeout
+        self._ensure_pool()
+        while time.monotonic() < deadline:
+            if self.dispatch_due():
+                self._wait_slot(deadline - time.monotonic())
+                continue
+            # 等进行中的任务结束后再看一次，失败重试的任务可能已经到期
+            if not self._wait_idle(deadline - time.monotonic()):
+                return False
+            if not self.dispatch_due():
+                return True
+        return False
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                while self.dispatch_due() and not self._stop.is_set():
+                    self._wait_slot(DETAIL_POLL_SECONDS)
+            except Exception as e:
+                self._print(f"  -> 错误: 读取详情页队列失败: {e}")
+            self._wakeup.wait(DETAIL_POLL_SECONDS)
+            self._wakeup.clear()
+
+    def _wait_slot(self, timeout):
+        # 线程池已满时等待任一任务完成，避免认领了却长时间排队的任务
+        with self._idle:
+            self._idle.wait_for(lambda: self._in_flight < self.max_workers or self._stop.is_set(),
+                                max(0, timeout))
+
+    def _wait_idle(self, timeout):
+        with self._idle:
+            return self._idle.wait_for(lambda: self._in_flight == 0, max(0, timeout))
+
+    def dispatch_due(self):
+        """按空闲的工作线程数认领到期任务并提交，返回提交的数量（0 表示没有到期任务或没有空闲线程）"""
+        with self._idle:
+            free = self.max_workers - self._in_flight
+        if free <= 0:
+            return 0
+        jobs = self.db_manager.claim_detail_jobs(free, DETAIL_CLAIM_SECONDS)
+        with self._idle:
+            self._in_flight += len(jobs)
+        for url, attempts in jobs:
+            self._pool.submit(self._process, url, attempts)
+        return len(jobs)
+
+    def _process(self, url, attempts):
+        try:
+            self.fetch_one(url, attempts)
+        except Exception as e:
+            self._print(f"  -> 错误: 处理详情页失败 {url}: {e}")
+        finally:
+            with self._idle:
+                self._in_flight -= 1
+                self._idle.notify_all()
+            self._wakeup.set()
+
+    def _host_slot(self, url):
+        with self._slots_lock:
+            return self._host_slots[urlsplit(url).netloc]
+
+    def fetch_one(self, url, attempts=0):
+        """抓取一篇文章的详情页和附件并入库，失败时重新排期或放弃
+
+        返回: 是否成功
+        """
+        try:
+            with self._host_slot(url), self.http.get(url, stream=True) as response:
+                response.raise_for_status()
+                content_type = response.headers.get('Content-Type')
+                if _is_attachment(url) or not _is_html(content_type):
+                    # 文章直接链接到附件（或返回的不是网页）：流式存为附件，正文留空，不做解析
+                    stored = self._store(url, response)
+                    content = None
+                else:
+                    content = _read_capped(response, DETAIL_PAGE_MAX_BYTES)
+            if content is None:
+                body, links = '', []
+            else:
+                encoding = get_encoding_resolver().resolve(url, content, content_type)
+                body, links = parse_detail(content, url, encoding)
+        except Exception as e:
+            self._retry_or_fail(url, attempts, str(e))
+            return False
+
+        attachments = [self._fetch_attachment(link, name) for link, name in links]
+        if content is None:
+            attachments.insert(0, self._attachment_item(url, '', stored))
+        self.db_manager.complete_detail_job(url, body, attachments)
+        self._count('fetched')
+        return True
+
+    def _retry_or_fail(self, url, attempts, error):
+        if attempts + 1 >= DETAIL_MAX_ATTEMPTS:
+            self.db_manager.fail_detail_job(url, error)
+            self._count('failed')
+            self._print(f"  -> 警告: 详情页抓取失败 {attempts + 1} 次，已放弃: {url}: {error}")
+            return
+        delay = min(DETAIL_RETRY_MAX_SECONDS, DETAIL_RETRY_BASE_SECONDS * 2 ** attempts)
+        self.db_manager.reschedule_detail_job(url, error, delay)
+        self._print(f"  -> 警告: 详情页抓取失败（第 {attempts + 1} 次），{delay} 秒后重试: {url}: {error}")
+
+    def _fetch_attachment(self, url, name):
+        """下载一个附件，返回写入 article_attachments 的字典；失败时 digest 为 None 并记录错误"""
+        item = {'url': url, 'name': name, 'digest': None, 'path': None, 'size': 0,
+                'content_type': None, 'error': None}
+        # 多篇文章引用同一附件链接时不重复下载
+        existing = self.db_manager.find_attachment(url=url)
+        if existing and os.path.exists(existing[1]):
+            item['digest'], item['path'] = existing
+            self._count('attachments_reused')
+            return item
+        try:
+            return self._attachment_item(url, name, self._download(url))
+        except Exception as e:
+            item['error'] = str(e)
+            self._print(f"  -> 警告: 附件下载失败 {url}: {e}")
+        return item
+
+    @staticmethod
+    def _attachment_item(url, name, stored):
+        """由 _store 的结果生成写入 article_attachments 的字典，没有链接文字时用响应给出的文件名"""
+        filename = stored.pop('filename')
+        return {'url': url, 'name': name or filename, 'error': None, **stored}
+
+    def _download(self, url):
+        """流式下载一个附件，结果见 _store"""
+        with self._host_slot(url), self.http.get(url, stream=True) as response:
+            response.raise_for_status()
+            return self._store(url, response)
+
+    def _store(self, url, response):
+        """把响应体分块写入临时文件并计算摘要，内容已存在时丢弃临时文件"""
+        os.makedirs(self.attachment_dir, exist_ok=True)
+        content_type = response.headers.get('Content-Type')
+        disposition = response.headers.get('Content-Disposition')
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.attachment_dir, suffix='.part')
+        try:
+            # 先接管 mkstemp 的文件描述符，读取中断（超时、超出大小等）时也会关闭
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.iter_content(ATTACHMENT_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > ATTACHMENT_MAX_BYTES:
+                        raise ValueError(f"附件超过 {ATTACHMENT_MAX_BYTES} 字节")
+                    digest.update(chunk)
+                    f.write(chunk)
+
+            digest = digest.hexdigest()
+            existing = self.db_manager.find_attachment(digest=digest)
+            if existing and os.path.exists(existing[1]):
+                path = existing[1]
+                self._count('attachments_reused')
+            else:
+                directory = os.path.join(self.attachment_dir, digest[:2])
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, digest + _extension(url, content_type, disposition))
+                os.replace(tmp_path, path)
+                self._count('attachments_downloaded')
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        return {'digest': digest, 'path': path, 'size': size, 'content_type': content_type,
+                'filename': _disposition_name(disposition)}
+
+    def get_stats(self):
+        """返回抓取统计"""
+        return {
+            'fetched': self.fetched,
+            'failed': self.failed,
+            'attachments_downloaded': self.attachments_downloaded,
+            'attachments_reused': self.attachments_reused,
+        }
@@ -0,0 +1,228 @@
+"""HTTP 客户端模块 - 共享连接池、DNS 缓存与压缩协商"""
+
+import socket
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .config import (
+    HEADERS,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+    CONNECT_TIMEOUT,
+    READ_TIMEOUT,
+    DNS_CACHE_TTL
+)
+from .metrics import record_phase, phase_total
+
+
+class DNSCache:
+    """进程级 DNS 解析缓存
+
+    替换 socket.getaddrinfo，在 TTL 内复用解析结果。
+
+    参数:
+        ttl: 缓存有效期（秒）
+    """
+
+    _original_getaddrinfo = socket.getaddrinfo
+
+    def __init__(self, ttl=DNS_CACHE_TTL):
+        self.ttl = ttl
+        self.overrides = {}
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def install(self):
+        """将缓存安装到 socket 模块（重复调用只生效一次）"""
+        socket.getaddrinfo = self.getaddrinfo
+
+    def getaddrinfo(self, host, port, *args, **kwargs):
+        """带缓存的 getaddrinfo"""
+        host = self.overrides.get(host, host)
+        key = (host, port, args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+
+        started = time.perf_counter()
+        result = DNSCache._original_getaddrinfo(host, port, *args, **kwargs)
+        record_phase('dns', time.perf_counter() - started)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = (now + self.ttl, result)
+        return result
+
+
+class ConnectionStats:
+    """连接复用统计（线程安全）
+
+    first_request_at 为第一个请求交给连接池发送时的 time.perf_counter()，
+    此时 requests 的准备工作都已完成；快速单次模式据此统计启动耗时。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.first_request_at = None
+
+    def record_send(self):
+        if self.first_request_at is None:
+            with self._lock:
+                if self.first_request_at is None:
+                    self.first_request_at = time.perf_counter()
+
+    def record(self, reused):
+        with self._lock:
+            if reused:
+                self.reused_connections += 1
+            else:
+                self.new_connections += 1
+
+
+def _timed_connection_class(base):
+    """生成记录建连耗时（不含 DNS 解析）的连接类"""
+
+    class TimedConnection(base):
+        def connect(self):
+            started = time.perf_counter()
+            dns_before = phase_total('dns')
+            try:
+                super().connect()
+            finally:
+                record_phase('connect', time.perf_counter() - started - (phase_total('dns') - dns_before))
+
+    TimedConnection.__name__ = f"Timed{base.__name__}"
+    return TimedConnection
+
+
+def _counting_pool_class(base, stats):
+    """生成在每次请求前记录连接是否复用、并记录首字节耗时的连接池类"""
+
+    class CountingPool(base):
+        ConnectionCls = _timed_connection_class(base.ConnectionCls)
+
+        def _make_request(self, conn, *args, **kwargs):
+            # 已建立套接字的连接即为复用，否则本次请求会重新握手
+            stats.record(getattr(conn, 'sock', None) is not None)
+            started = time.perf_counter()
+            connect_before = phase_total('dns', 'connect')
+            try:
+                return super()._make_request(conn, *args, **kwargs)
+            finally:
+                # 发送请求到收到响应头的时间，扣除其中的解析和建连
+                record_phase('ttfb', time.perf_counter() - started
+                             - (phase_total('dns', 'connect') - connect_before))
+
+    CountingPool.__name__ = f"Counting{base.__name__}"
+    return CountingPool
+
+
+class _CountingAdapter(HTTPAdapter):
+    """为每个主机维护长连接池并统计连接复用情况的适配器"""
+
+    def __init__(self, stats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool_class(HTTPConnectionPool, self.stats),
+            'https': _counting_pool_class(HTTPSConnectionPool, self.stats),
+        }
+
+    def send(self, request, *args, **kwargs):
+        self.stats.record_send()
+        return super().send(request, *args, **kwargs)
+
+
+class HttpClient:
+    """共享 HTTP 客户端
+
+    在多个监控线程间共享，按主机保持长连接池，缓存 DNS 并协商 gzip/deflate 压缩。
+
+    参数:
+        pool_connections: 缓存的主机连接池数量
+        pool_maxsize: 每个主机连接池的最大连接数
+        connect_timeout: 建立连接超时（秒）
+        read_timeout: 读取响应超时（秒）
+        dns_cache: DNS 缓存实例，未指定时使用进程级共享缓存
+    """
+
+    def __init__(self, pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE,
+                 connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT, dns_cache=None):
+        self.timeout = (connect_timeout, read_timeout)
+        self.stats = ConnectionStats()
+        self.dns_cache = dns_cache or get_dns_cache()
+        self.dns_cache.install()
+
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        self.session.headers['Accept-Encoding'] = 'gzip, deflate'
+        self.session.headers['Connection'] = 'keep-alive'
+
+        adapter = _CountingAdapter(
+            self.stats,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=False
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url, timeout=None, **kwargs):
+        """发送 GET 请求，默认使用配置的连接/读取超时"""
+        return self.session.get(url, timeout=timeout or self.timeout, **kwargs)
+
+    def post(self, url, timeout=None, **kwargs):
+        """发送 POST 请求，默认使用配置的连接/读取超时"""
+        return self.session.post(url, timeout=timeout or self.timeout, **kwargs)
+
+    def get_stats(self):
+        """返回连接复用与 DNS 缓存统计"""
+        return {
+            'new_connections': self.stats.new_connections,
+            'reused_connections': self.stats.reused_connections,
+            'dns_hits': self.dns_cache.hits,
+            'dns_misses': self.dns_cache.misses,
+        }
+
+    def close(self):
+        """关闭所有连接"""
+        self.session.close()
+
+
+_dns_cache = None
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_dns_cache():
+    """获取进程级共享 DNS 缓存"""
+    global _dns_cache
+    with _default_lock:
+        if _dns_cache is None:
+            _dns_cache = DNSCache()
+        return _dns_cache
+
+
+def get_http_client():
+    """获取进程级共享 HTTP 客户端"""
+    global _default_client
+    if _default_client is None:
+        client = HttpClient()
+        with _default_lock:
+            if _default_client is None:
+                _default_client = client
+    return _default_client
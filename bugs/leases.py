@@ -0,0 +1,105 @@
+"""租约模块 - 多进程/多机分片爬取时通过数据库租约表分配目标
+
+每个工作进程定期心跳：续期自己的租约，并按存活进程数均分目标。
+进程崩溃后其租约在 LEASE_TTL_SECONDS 内过期，由其他进程在下一次心跳时接管。
+去重仍由 seen_announcements 的唯一约束保证，接管前后重复抓取同一页面也不会重复通知。
+
+多台机器共享时数据库文件需放在各机器都能访问的位置；SQLite 的 WAL 模式
+要求共享内存，不能用于网络文件系统，此时请改用 journal_mode=DELETE。
+"""
+
+import os
+import socket
+import threading
+import time
+
+from .config import LEASE_TTL_SECONDS, LEASE_HEARTBEAT_SECONDS
+from .output import locked_print
+
+
+def default_worker_id():
+    """<主机名>-<进程号>"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaseManager:
+    """本进程的目标租约
+
+    参数:
+        db_manager: 数据库管理器实例（租约表所在的共享数据库）
+        urls: 需要在所有工作进程间分配的全部目标 URL
+        worker_id: 本进程标识，默认为主机名加进程号
+        ttl: 租约有效期（秒）
+        heartbeat: 心跳间隔（秒）
+        print_lock: 打印锁
+    """
+
+    def __init__(self, db_manager, urls, worker_id=None, ttl=LEASE_TTL_SECONDS,
+                 heartbeat=LEASE_HEARTBEAT_SECONDS, print_lock=None):
+        self.db_manager = db_manager
+        self.urls = list(urls)
+        self.worker_id = worker_id or default_worker_id()
+        self.ttl = ttl
+        self.heartbeat = heartbeat
+        self.print_lock = print_lock
+        self._owned = frozenset()
+        self._renewed_at = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _print(self, *args, **kwargs):
+        locked_print(self.print_lock, *args, **kwargs)
+
+    def register(self):
+        """只登记心跳、不认领目标，用于多个进程同时启动时先让彼此可见"""
+        self.db_manager.register_worker(self.worker_id, self.ttl)
+
+    def rebalance(self):
+        """续期并重新分配租约
+
+        返回: (新获得的 URL 集合, 失去的 URL 集合)
+        """
+        renewed_at = time.monotonic()
+        owned = frozenset(self.db_manager.rebalance_leases(self.worker_id, self.urls, self.ttl))
+        previous, self._owned = self._owned, owned
+        self._renewed_at = renewed_at
+        return owned - previous, previous - owned
+
+    def _valid(self):
+        # 心跳持续失败时租约已在数据库中过期，不再认为自己持有
+        return time.monotonic() - self._renewed_at < self.ttl
+
+    def owns(self, url):
+        return self._valid() and url in self._owned
+
+    def owned(self):
+        """当前持有且未过期租约的 URL 集合"""
+        return self._owned if self._valid() else frozenset()
+
+    def start(self):
+        """立即分配一次，然后在后台线程中定期心跳"""
+        self.rebalance()
+        self._print(f"[{self.worker_id}] 已认领 {len(self._owned)}/{len(self.urls)} 个目标")
+        self._thread = threading.Thread(target=self._run, name="LeaseHeartbeat", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止心跳并释放全部租约"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.db_manager.release_leases(self.worker_id)
+        self._owned = frozenset()
+
+    def _run(self):
+        while not self._stop.wait(self.heartbeat):
+            try:
+                gained, lost = self.rebalance()
+            except Exception as e:
+                # 心跳失败时在租约有效期内继续使用已有租约，过期后由其他进程接管
+                self._print(f"[{self.worker_id}] 租约心跳失败: {e}")
+                continue
+            if gained or lost:
+                self._print(f"[{self.worker_id}] 租约变化: 获得 {len(gained)} 个，让出 {len(lost)} 个，"
+                            f"当前 {len(self._owned)}/{len(self.urls)} 个目标")
@@ -0,0 +1,257 @@
+"""指标模块 - 以 Prometheus 文本格式导出爬取耗时、流量与结果统计
+
+不依赖 prometheus_client：计数器和直方图都是加锁的字典，记录一次只是几次加法。
+请求各阶段耗时通过线程局部的记录器收集：爬虫在抓取/处理一个目标前开启记录，
+HTTP 客户端（DNS、建连、首字节）和数据库（读写）在同一线程中累加耗时。
+ENABLE_METRICS 为 False 时 get_metrics() 返回 None，上述记录全部跳过。
+"""
+
+import threading
+import time
+
+from .config import ENABLE_METRICS, METRICS_HOST, METRICS_PORT
+
+# 单次请求/处理阶段的耗时分桶（秒）
+PHASE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20)
+# 一轮爬取的耗时分桶（秒）
+CYCLE_BUCKETS = (1, 2, 5, 10, 20, 30, 60, 120, 300, 600, 1800)
+
+_local = threading.local()
+
+
+def record_phase(phase, seconds):
+    """在当前线程的阶段记录器中累加耗时，没有开启记录时直接返回"""
+    recorder = getattr(_local, 'recorder', None)
+    if recorder is not None:
+        recorder.phases[phase] = recorder.phases.get(phase, 0.0) + seconds
+
+
+def record_bytes(count):
+    """在当前线程的阶段记录器中累加读取的字节数"""
+    recorder = getattr(_local, 'recorder', None)
+    if recorder is not None:
+        recorder.bytes += count
+
+
+def phase_total(*phases):
+    """当前线程记录器中若干阶段的累计耗时，用于从外层计时中扣除内层阶段"""
+    recorder = getattr(_local, 'recorder', None)
+    if recorder is None:
+        return 0.0
+    return sum(recorder.phases.get(phase, 0.0) for phase in phases)
+
+
+class PhaseRecorder:
+    """在 with 块内收集当前线程的阶段耗时（phases）和读取字节数（bytes）
+
+    允许嵌套：内层结束后恢复外层的记录器，内层数据不计入外层。
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.bytes = 0
+        self._outer = None
+
+    def __enter__(self):
+        self._outer = getattr(_local, 'recorder', None)
+        _local.recorder = self
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.recorder = self._outer
+        return False
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """带标签的计数器"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """带标签的直方图，分桶固定"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=PHASE_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                # [各桶计数..., 总和, 总数]
+                entry = self._values[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+                    break
+            entry[-2] += value
+            entry[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(entry)) for labels, entry in self._values.items())
+        for labels, entry in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                lines.append(f"{self.name}_bucket"
+                             f"{_format_labels(self.labelnames, labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_bucket"
+                         f"{_format_labels(self.labelnames, labels, [('le', '+Inf')])} {entry[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {entry[-2]:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {entry[-1]}")
+        return lines
+
+
+class CrawlMetrics:
+    """爬虫导出的全部指标"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.phase_seconds = Histogram(
+            'fzu_crawler_phase_seconds',
+            '单个目标各阶段耗时（dns/connect/ttfb/download/decode/parse/db）',
+            ('college', 'url', 'phase'))
+        self.response_bytes = Counter(
+            'fzu_crawler_response_bytes_total', '从网络读取的响应字节数（压缩后）', ('college', 'url'))
+        self.new_articles = Counter(
+            'fzu_crawler_new_articles_total', '发现的新文章数', ('college', 'url'))
+        self.http_responses = Counter(
+            'fzu_crawler_http_responses_total',
+            'HTTP 响应数，status 为状态码、error（请求异常）或 circuit_open（熔断跳过）',
+            ('host', 'status'))
+        self.cycle_seconds = Histogram(
+            'fzu_crawler_cycle_seconds', '每轮爬取耗时', ('monitor',), CYCLE_BUCKETS)
+        self.cycle_overruns = Counter(
+            'fzu_crawler_cycle_overruns_total', '超出时间预算的轮次', ('monitor',))
+        self.skipped_targets = Counter(
+            'fzu_crawler_skipped_targets_total', '因时间预算耗尽未检查的目标数', ('monitor',))
+        self._families = [self.phase_seconds, self.response_bytes, self.new_articles, self.http_responses,
+                          self.cycle_seconds, self.cycle_overruns, self.skipped_targets]
+
+    def observe_target(self, target, phases, response_bytes, new_articles):
+        """记录一个目标本轮的阶段耗时、流量和新文章数"""
+        labels = (target['college'], target['url'])
+        for phase, seconds in phases.items():
+            self.phase_seconds.observe(labels + (phase,), seconds)
+        if response_bytes:
+            self.response_bytes.inc(labels, response_bytes)
+        if new_articles:
+            self.new_articles.inc(labels, new_articles)
+
+    def observe_cycle(self, monitor, elapsed, overrun, skipped):
+        """记录一轮爬取的耗时与预算使用情况"""
+        self.cycle_seconds.observe((monitor,), elapsed)
+        if overrun:
+            self.cycle_overruns.inc((monitor,))
+        if skipped:
+            self.skipped_targets.inc((monitor,), skipped)
+
+    def render(self):
+        """生成 Prometheus 文本格式"""
+        lines = ["# HELP fzu_crawler_start_time_seconds 进程启动时间",
+                 "# TYPE fzu_crawler_start_time_seconds gauge",
+                 f"fzu_crawler_start_time_seconds {self.started:.3f}"]
+        for family in self._families:
+            lines.extend(family.render())
+        return '\n'.join(lines) + '\n'
+
+
+def _metrics_handler():
+    """/metrics 请求处理类
+
+    http.server 导入较慢，只在启动指标服务时加载，单次运行模式不需要它。
+    """
+    from http.server import BaseHTTPRequestHandler
+
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = self.server.metrics.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return _MetricsHandler
+
+
+class MetricsServer:
+    """在后台线程提供 /metrics 的 HTTP 服务
+
+    参数:
+        metrics: CrawlMetrics 实例
+        host: 监听地址，默认只监听本机
+        port: 监听端口，0 表示自动分配
+    """
+
+    def __init__(self, metrics, host=METRICS_HOST, port=METRICS_PORT):
+        from http.server import ThreadingHTTPServer
+
+        self.httpd = ThreadingHTTPServer((host, port), _metrics_handler())
+        self.httpd.daemon_threads = True
+        self.httpd.metrics = metrics
+        self.address = self.httpd.server_address
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="MetricsServer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+_default_metrics = None
+_default_lock = threading.Lock()
+
+
+def get_metrics():
+    """获取进程级共享指标，ENABLE_METRICS 为 False 时返回 None"""
+    global _default_metrics
+    if not ENABLE_METRICS:
+        return None
+    with _default_lock:
+        if _default_metrics is None:
+            _default_metrics = CrawlMetrics()
+        return _default_metrics
@@ -0,0 +1,133 @@
+"""通知投递模块 - 从发件箱异步投递 webhook 通知
+
+新文章在入库的同一事务中写入发件箱，投递线程独立于爬取循环运行：
+webhook 慢或不可用时只会推迟通知，不会拖慢爬取，也不会丢失。
+投递成功后删除记录，失败则按指数退避重试（至少一次语义）。
+"""
+
+import threading
+import time
+
+from .config import (
+    REQUEST_TIMEOUT,
+    NOTIFICATION_WEBHOOK_URL,
+    WEBHOOK_BATCH_SIZE,
+    WEBHOOK_RETRY_BASE_SECONDS,
+    WEBHOOK_RETRY_MAX_SECONDS,
+    WEBHOOK_POLL_SECONDS
+)
+from .http_client import HttpClient
+from .output import locked_print
+
+
+def build_payload(article_info):
+    """将文章信息转换为 webhook 请求体"""
+    return {
+        "title": f"【{article_info['college']}】{article_info['title']}",
+        "content": article_info['url']
+    }
+
+
+class NotificationWorker:
+    """后台通知投递线程
+
+    参数:
+        db_manager: 数据库管理器实例（发件箱所在数据库）
+        webhook_url: 通知地址
+        http_client: 投递使用的 HTTP 客户端，未指定时自建一个，与爬取请求互不占用连接
+        print_lock: 打印锁
+        batch_size: 每次 POST 的通知数，1 时请求体为单个对象，否则为数组
+    """
+
+    def __init__(self, db_manager, webhook_url=NOTIFICATION_WEBHOOK_URL, http_client=None,
+                 print_lock=None, batch_size=WEBHOOK_BATCH_SIZE):
+        self.db_manager = db_manager
+        self.webhook_url = webhook_url
+        self.http = http_client or HttpClient()
+        self._owns_http = http_client is None
+        self.print_lock = print_lock
+        self.batch_size = max(1, batch_size)
+        self.delivered = 0
+        self.failed = 0
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _print(self, *args, **kwargs):
+        locked_print(self.print_lock, *args, **kwargs)
+
+    def start(self):
+        """启动投递线程，并在新文章提交后立即唤醒它"""
+        self.db_manager.add_commit_listener(lambda articles: self._wakeup.set())
+        self._thread = threading.Thread(target=self._run, name="NotificationWorker", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """停止投递线程，尚未投递的通知留在发件箱，下次启动后继续"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._owns_http:
+            self.http.close()
+
+    def drain(self, timeout):
+        """单次运行结束前尽量投递当前到期的通知
+
+        投递失败的通知按退避推迟后不再到期，这时虽然没有到期通知，发件箱中仍有未送达的记录。
+
+        参数:
+            timeout: 最长等待时间（秒）
+
+        返回: 发件箱是否已清空
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.deliver_due():
+                break
+        return self.db_manager.count_pending_notifications() == 0
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                while self.deliver_due() and not self._stop.is_set():
+                    pass
+            except Exception as e:
+                self._print(f"  -> 错误: 读取通知发件箱失败: {e}")
+            self._wakeup.wait(WEBHOOK_POLL_SECONDS)
+            self._wakeup.clear()
+
+    def deliver_due(self):
+        """投递一批到期通知，返回本批数量（0 表示没有到期通知）"""
+        notifications = self.db_manager.fetch_due_notifications(self.batch_size, REQUEST_TIMEOUT * 2)
+        if not notifications:
+            return 0
+
+        ids = [row_id for row_id, _, _ in notifications]
+        payloads = [build_payload(article_info) for _, article_info, _ in notifications]
+        body = payloads[0] if self.batch_size == 1 else payloads
+
+        error = self._post(body)
+        if error is None:
+            self.db_manager.complete_notifications(ids)
+            self.delivered += len(ids)
+            for payload in payloads:
+                self._print(f"  -> 通知发送成功: {payload['title']}")
+        else:
+            attempts = max(attempts for _, _, attempts in notifications)
+            delay = min(WEBHOOK_RETRY_MAX_SECONDS, WEBHOOK_RETRY_BASE_SECONDS * 2 ** attempts)
+            self.db_manager.reschedule_notifications(ids, error, delay)
+            self.failed += len(ids)
+            self._print(f"  -> 警告: 通知发送失败（第 {attempts + 1} 次），{delay} 秒后重试: {error}")
+        return len(ids)
+
+    def _post(self, body):
+        """发送请求，成功返回 None，失败返回错误描述"""
+        try:
+            response = self.http.post(self.webhook_url, json=body, timeout=REQUEST_TIMEOUT)
+        except Exception as e:
+            return str(e)
+        if 200 <= response.status_code < 300:
+            return None
+        return f"状态码 {response.status_code}, 响应: {response.text[:200]}"
@@ -0,0 +1,357 @@
+"""输出模块 - 把每轮发现的新文章写入输出目标
+
+'jsonl': 追加写入 OUTPUT_DIR 下的 JSONL 流，每行一篇文章并带全局递增的序号 seq。
+    分段文件名为 articles-<本段第一条序号>.jsonl，超过 OUTPUT_ROTATE_BYTES 或写入超过
+    OUTPUT_ROTATE_SECONDS 后轮转，轮转后的分段可压缩为 .jsonl.gz。每轮写入后只 fsync 一次。
+    下游可用 iter_records(目录, 上次处理到的序号) 从断点继续读取。
+    写入进程在整个生命周期内持有目录中 .lock 文件的排他锁，同一目录不会有两个进程交错写入序号。
+'text': 与旧版相同，每轮生成一个 new_articles_<时间>.txt。
+
+写入使用输出目标自己的锁，不占用控制台打印锁。
+"""
+
+import glob
+import gzip
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import datetime
+
+from .config import (
+    OUTPUT_SINK,
+    OUTPUT_DIR,
+    OUTPUT_ROTATE_BYTES,
+    OUTPUT_ROTATE_SECONDS,
+    OUTPUT_COMPRESS_ROTATED,
+    OUTPUT_LOCK_TIMEOUT_SECONDS
+)
+
+_SEGMENT_RE = re.compile(r"^articles-(?P<seq>\d+)\.jsonl(?P<gz>\.gz)?$")
+_LOCK_FILE = '.lock'
+
+
+class OutputLockedError(RuntimeError):
+    """输出目录正由其他进程写入"""
+
+
+def locked_print(lock, *args, **kwargs):
+    """持有 lock 时调用 print，多个线程的控制台输出不会交错；lock 为 None 时直接打印"""
+    if lock is None:
+        print(*args, **kwargs)
+        return
+    with lock:
+        print(*args, **kwargs)
+
+
+def _segment_name(first_seq, compressed=False):
+    return f"articles-{first_seq:012d}.jsonl" + ('.gz' if compressed else '')
+
+
+def list_segments(directory):
+    """返回目录中的分段 [(第一条序号, 路径, 是否已压缩)]，按序号排列"""
+    segments = []
+    for path in glob.glob(os.path.join(directory, 'articles-*.jsonl*')):
+        match = _SEGMENT_RE.match(os.path.basename(path))
+        if match:
+            segments.append((int(match.group('seq')), path, bool(match.group('gz'))))
+    return sorted(segments)
+
+
+def _read_lines(path, compressed):
+    """读取分段中的完整记录，忽略写入中断留下的不完整末行"""
+    opener = gzip.open if compressed else open
+    with opener(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            yield json.loads(line)
+
+
+def iter_records(directory, after_seq=0):
+    """按序号顺序读取 after_seq 之后的全部记录
+
+    参数:
+        directory: JSONL 输出目录
+        after_seq: 已处理到的序号，只返回序号更大的记录
+
+    返回: 记录字典的迭代器
+    """
+    segments = list_segments(directory)
+    for i, (first_seq, path, compressed) in enumerate(segments):
+        # 下一个分段的起始序号不超过 after_seq 时，本段已全部处理过
+        if i + 1 < len(segments) and segments[i + 1][0] <= after_seq + 1:
+            continue
+        for record in _read_lines(path, compressed):
+            if record['seq'] > after_seq:
+                yield record
+
+
+def _lock_exclusive(lock_file):
+    """对已打开的锁文件加非阻塞排他锁，已被其他进程持有时返回 False
+
+    POSIX 上用 fcntl.flock，Windows 上没有 fcntl，改用 msvcrt.locking 锁住文件第一个字节。
+    """
+    try:
+        import fcntl
+    except ImportError:
+        import msvcrt
+        lock_file.seek(0)
+        try:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _unlock(lock_file):
+    """释放 _lock_exclusive 取得的锁并关闭锁文件"""
+    if os.name == 'nt':
+        # msvcrt 的锁要在关闭前显式解除；flock 随文件关闭释放
+        import msvcrt
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    lock_file.close()
+
+
+def _fsync_directory(directory):
+    # 新建或改名后同步目录项，保证掉电后文件仍在；Windows 不支持打开目录，也无需同步
+    if os.name == 'nt':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class JsonlSink:
+    """追加写入、按大小和时间轮转的 JSONL 输出
+
+    同一目录只能由一个进程写入：创建时取得目录锁并一直持有到 close（或进程退出），
+    锁被占用时最多等待 lock_timeout 秒，仍未取得则抛出 OutputLockedError。
+    分片模式下每个工作进程使用各自的目录。
+
+    参数:
+        directory: 输出目录
+        rotate_bytes: 当前分段超过该大小后轮转
+        rotate_seconds: 当前分段写入超过该时长后轮转
+        compress: 是否把轮转后的分段压缩为 .jsonl.gz
+        lock_timeout: 等待目录锁的秒数
+    """
+
+    def __init__(self, directory=OUTPUT_DIR, rotate_bytes=OUTPUT_ROTATE_BYTES,
+                 rotate_seconds=OUTPUT_ROTATE_SECONDS, compress=OUTPUT_COMPRESS_ROTATED,
+                 lock_timeout=OUTPUT_LOCK_TIMEOUT_SECONDS):
+        self.directory = directory
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.compress = compress
+        self._lock = threading.Lock()
+        self._file = None
+        self._path = None
+        self._size = 0
+        self._opened_at = 0.0
+        self.last_seq = 0
+        os.makedirs(directory, exist_ok=True)
+        # 先取得目录锁再恢复：恢复会截断末行，不能截到其他进程正在写的行
+        self._lock_file = self._acquire_directory_lock(lock_timeout)
+        self._recover()
+
+    def _acquire_directory_lock(self, timeout):
+        lock_file = open(os.path.join(self.directory, _LOCK_FILE), 'a')
+        deadline = time.monotonic() + timeout
+        while not _lock_exclusive(lock_file):
+            if time.monotonic() >= deadline:
+                lock_file.close()
+                raise OutputLockedError(
+                    f"输出目录 {self.directory} 正由其他进程写入（等待 {timeout} 秒后仍未释放），"
+                    f"同时运行多个爬虫进程时请为它们配置不同的输出目录"
+                )
+            time.sleep(0.1)
+        return lock_file
+
+    def _recover(self):
+        """从已有分段恢复序号，最后一个未压缩的分段继续作为当前分段"""
+        segments = list_segments(self.directory)
+        for first_seq, path, compressed in segments[:-1]:
+            # 上次轮转后、压缩完成前退出的分段
+            if not compressed and self.compress:
+                self._compress(path)
+        if not segments:
+            return
+
+        first_seq, path, compressed = segments[-1]
+        records = list(_read_lines(path, compressed))
+        self.last_seq = records[-1]['seq'] if records else first_seq - 1
+        if compressed:
+            return
+
+        # 截掉写入中断留下的不完整末行，之后的追加才能从新行开始
+        with open(path, 'rb+') as f:
+            content = f.read()
+            end = content.rfind(b'\n') + 1
+            if end != len(content):
+                f.truncate(end)
+        self._open(path)
+        if records:
+            self._opened_at = datetime.fromisoformat(records[0]['written_at']).timestamp()
+
+    def _open(self, path):
+        self._file = open(path, 'ab')
+        self._path = path
+        self._size = self._file.tell()
+        self._opened_at = time.time()
+
+    def _should_rotate(self):
+        return (self._size >= self.rotate_bytes
+                or time.time() - self._opened_at >= self.rotate_seconds)
+
+    def _rotate(self):
+        path = self._path
+        self._file.close()
+        self._file = self._path = None
+        if self.compress:
+            self._compress(path)
+
+    def _compress(self, path):
+        gz_path = path + '.gz'
+        tmp_path = gz_path + '.tmp'
+        with open(path, 'rb') as src, gzip.open(tmp_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, gz_path)
+        _fsync_directory(self.directory)
+        os.remove(path)
+
+    def write(self, articles):
+        """追加一轮的新文章并 fsync 一次
+
+        返回: 写入的分段路径，没有文章时返回 None
+        """
+        if not articles:
+            return None
+        written_at = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            if self._file is not None and self._should_rotate():
+                self._rotate()
+            if self._file is None:
+                self._open(os.path.join(self.directory, _segment_name(self.last_seq + 1)))
+                _fsync_directory(self.directory)
+
+            lines = []
+            for seq, article in enumerate(articles, self.last_seq + 1):
+                record = {
+                    'seq': seq,
+                    'written_at': written_at,
+                    'time': article['time'],
+                    'college': article['college'],
+                    'category': article['category'],
+                    'title': article['title'],
+                    'url': article['url'],
+                }
+                lines.append(json.dumps(record, ensure_ascii=False) + '\n')
+            data = ''.join(lines).encode('utf-8')
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._size += len(data)
+            self.last_seq += len(articles)
+            return self._path
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._lock_file is not None:
+                _unlock(self._lock_file)
+                self._lock_file = None
+
+
+class TextFileSink:
+    """每轮生成一个 new_articles_<时间>.txt 的文本输出
+
+    参数:
+        directory: 输出目录，默认当前目录
+    """
+
+    def __init__(self, directory='.'):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, articles, filename=None):
+        """将文章列表保存到文本文件
+
+        参数:
+            articles: 文章信息字典列表
+            filename: 输出文件名，未指定时自动生成
+
+        返回:
+            保存的文件名，如果没有文章则返回 None
+        """
+        if not articles:
+            return None
+
+        if filename is None:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = os.path.join(self.directory, f"new_articles_{timestamp}.txt")
+            # 两个监控任务在同一秒内都有新文章时不能互相覆盖
+            base, suffix = filename[:-len('.txt')], 1
+            while os.path.exists(filename):
+                suffix += 1
+                filename = f"{base}_{suffix}.txt"
+
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(f"福州大学通知爬取结果\n")
+            f.write(f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write(f"共 {len(articles)} 篇新文章\n")
+            f.write("=" * 60 + "\n\n")
+
+            for article in articles:
+                f.write(f"{article['time']}\n")
+                f.write(f"{article['college']} - {article['category']}\n")
+                f.write(f"{article['title']}\n")
+                f.write(f"{article['url']}\n")
+                f.write("-" * 60 + "\n\n")
+        return filename
+
+    def close(self):
+        pass
+
+
+def create_output_sink(kind=OUTPUT_SINK, directory=None):
+    """按类型创建输出目标，kind 为 None 时返回 None
+
+    参数:
+        kind: 'jsonl' 或 'text'
+        directory: 输出目录，未指定时 jsonl 使用 OUTPUT_DIR，text 使用当前目录
+    """
+    if kind is None:
+        return None
+    if kind == 'jsonl':
+        return JsonlSink(directory or OUTPUT_DIR)
+    if kind == 'text':
+        return TextFileSink(directory or '.')
+    raise ValueError(f"不支持的输出类型: {kind}")
+
+
+_default_sink = None
+_default_lock = threading.Lock()
+
+
+def get_output_sink():
+    """获取进程级共享的输出目标，OUTPUT_SINK 为 None 时返回 None"""
+    global _default_sink
+    if OUTPUT_SINK is None:
+        return None
+    with _default_lock:
+        if _default_sink is None:
+            _default_sink = create_output_sink()
+        return _default_sink
@@ -0,0 +1,184 @@
+"""推送模块 - 以 Server-Sent Events 向本机订阅者推送新文章
+
+GET /events 返回 text/event-stream，每篇新文章是一个 article 事件，事件 id 为已见表的 id。
+断线重连时浏览器 EventSource 会自动带上 Last-Event-ID 请求头（也可用 ?last_event_id=N），
+服务从数据库中补发该 id 之后的全部文章；不带时只推送连接之后的新文章。
+历史回填写入的旧文章带回填标记，不会作为事件推送。
+
+数据库是唯一的事件来源：新文章提交后的回调只递增一个计数并唤醒等待的连接，
+各连接在自己的线程中按 id 从数据库读取并写出。慢订阅者只会落后、不会堆积内存，
+也不会拖慢爬取；写入超过 PUSH_WRITE_TIMEOUT_SECONDS 的连接被断开，重连后从断点续传。
+"""
+
+import json
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+from .config import (
+    PUSH_HOST,
+    PUSH_PORT,
+    PUSH_MAX_CLIENTS,
+    PUSH_BATCH_SIZE,
+    PUSH_HEARTBEAT_SECONDS,
+    PUSH_WRITE_TIMEOUT_SECONDS
+)
+
+
+def format_event(article):
+    """把文章字典编码为一个 SSE 事件"""
+    data = json.dumps(article, ensure_ascii=False)
+    return f"id: {article['id']}\nevent: article\ndata: {data}\n\n".encode('utf-8')
+
+
+def _push_handler():
+    """/events 请求处理类
+
+    http.server 导入较慢，只在启动推送服务时加载。
+    """
+    from http.server import BaseHTTPRequestHandler
+
+    class _PushHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            if parts.path != '/events':
+                self.send_error(404)
+                return
+            try:
+                last_id = self._last_event_id(parse_qs(parts.query))
+            except ValueError:
+                self.send_error(400, "Invalid Last-Event-ID")
+                return
+            if not self.server.push.acquire_client():
+                self.send_error(503, "Too many subscribers")
+                return
+            try:
+                self._stream(last_id)
+            except OSError:
+                # 订阅者断开或写入超时
+                pass
+            finally:
+                self.server.push.release_client()
+
+        def _last_event_id(self, query):
+            value = self.headers.get('Last-Event-ID') or (query.get('last_event_id') or [None])[0]
+            if value is None:
+                return None
+            return max(0, int(value))
+
+        def _stream(self, last_id):
+            push = self.server.push
+            self.connection.settimeout(PUSH_WRITE_TIMEOUT_SECONDS)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('X-Accel-Buffering', 'no')
+            self.end_headers()
+            self.wfile.write(f"retry: {push.retry_ms}\n\n".encode('ascii'))
+            self.wfile.flush()
+
+            generation = push.generation
+            if last_id is None:
+                last_id = push.db_manager.get_latest_article_id()
+            while not push.stopping:
+                articles = push.db_manager.get_articles_after(last_id, push.batch_size)
+                if articles:
+                    self.wfile.write(b''.join(format_event(article) for article in articles))
+                    self.wfile.flush()
+                    last_id = articles[-1]['id']
+                    push.record_sent(len(articles))
+                    if len(articles) == push.batch_size:
+                        continue
+                # 先记下计数再查询，查询之后提交的文章一定会唤醒下面的等待
+                changed, generation = push.wait(generation, push.heartbeat)
+                if not changed:
+                    self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+
+        def log_message(self, format, *args):
+            pass
+
+    return _PushHandler
+
+
+class PushServer:
+    """在后台线程提供 /events 的 SSE 服务
+
+    参数:
+        db_manager: 数据库管理器实例（已见表所在数据库）
+        host: 监听地址，默认只监听本机
+        port: 监听端口，0 表示自动分配
+        max_clients: 同时连接的订阅者上限
+        batch_size: 每次从数据库读取的文章数
+        heartbeat: 没有新文章时发送保活注释的间隔（秒）
+    """
+
+    retry_ms = 3000
+
+    def __init__(self, db_manager, host=PUSH_HOST, port=PUSH_PORT, max_clients=PUSH_MAX_CLIENTS,
+                 batch_size=PUSH_BATCH_SIZE, heartbeat=PUSH_HEARTBEAT_SECONDS):
+        from http.server import ThreadingHTTPServer
+
+        self.db_manager = db_manager
+        self.max_clients = max_clients
+        self.batch_size = max(1, batch_size)
+        self.heartbeat = heartbeat
+        self.generation = 0
+        self.stopping = False
+        self.clients = 0
+        self.sent = 0
+        self._changed = threading.Condition()
+        self._lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), _push_handler())
+        self.httpd.daemon_threads = True
+        self.httpd.push = self
+        self.address = self.httpd.server_address
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="PushServer", daemon=True)
+
+    def start(self):
+        """启动服务，并在新文章提交后唤醒所有连接"""
+        self.db_manager.add_commit_listener(self._on_commit)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._changed:
+            self.stopping = True
+            self._changed.notify_all()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _on_commit(self, articles):
+        # 在提交新文章的线程中调用，只唤醒连接线程，不做任何 I/O
+        with self._changed:
+            self.generation += 1
+            self._changed.notify_all()
+
+    def wait(self, generation, timeout):
+        """等待有新文章提交（或服务停止）
+
+        返回: (是否有变化, 当前计数)
+        """
+        with self._changed:
+            changed = self._changed.wait_for(lambda: self.generation != generation or self.stopping, timeout)
+            return changed, self.generation
+
+    def acquire_client(self):
+        with self._lock:
+            if self.clients >= self.max_clients:
+                return False
+            self.clients += 1
+            return True
+
+    def release_client(self):
+        with self._lock:
+            self.clients -= 1
+
+    def record_sent(self, count):
+        with self._lock:
+            self.sent += count
+
+    def get_stats(self):
+        """返回当前连接数和已推送的事件数"""
+        with self._lock:
+            return {'clients': self.clients, 'sent': self.sent}
@@ -0,0 +1,247 @@
+"""调度模块 - 按时间窗口策略定时派发爬取任务
+
+所有任务放在同一个按截止时间排序的堆中，到期任务交给有界线程池执行。
+下一次截止时间按固定节拍（上一次截止时间 + 间隔）计算，不受执行耗时影响。
+
+延迟（lateness）按策略给出的截止时间计算，包含随机抖动带来的推迟；
+调度延迟（dispatch_lateness）按加上抖动后的派发时刻计算，只反映调度线程和线程池的排队。
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from .config import CYCLE_BUDGET_RATIO
+
+# 检查是否即将进入更高频窗口时的步长（秒）
+_WINDOW_PROBE_STEP = 60
+
+
+def _parse_clock(value):
+    """'07:30' -> 从零点起的秒数"""
+    hour, minute = value.split(':')
+    return int(hour) * 3600 + int(minute) * 60
+
+
+class PollWindow:
+    """轮询时间窗口
+
+    参数:
+        interval: 窗口内的轮询间隔（秒）
+        start_time: 每天的开始时刻，如 '07:00'，默认全天
+        end_time: 每天的结束时刻（不含），如 '18:00'
+        dates: 日期范围列表，每项为 (开始, 结束)，格式 'MM-DD'（每年重复）
+            或 'YYYY-MM-DD'，两端都包含；None 表示不限日期
+        weekdays: 允许的星期（0 为周一），None 表示不限
+    """
+
+    def __init__(self, interval, start_time='00:00', end_time='24:00', dates=None, weekdays=None):
+        self.interval = interval
+        self.start = _parse_clock(start_time)
+        self.end = _parse_clock(end_time)
+        self.dates = dates
+        self.weekdays = set(weekdays) if weekdays is not None else None
+
+    def _date_matches(self, moment):
+        if self.dates is None:
+            return True
+        for start, end in self.dates:
+            fmt = '%m-%d' if len(start) == 5 else '%Y-%m-%d'
+            value = moment.strftime(fmt)
+            if start <= end and start <= value <= end:
+                return True
+            # 跨年的 'MM-DD' 范围，如 ('12-15', '01-15')
+            if start > end and (value >= start or value <= end):
+                return True
+        return False
+
+    def contains(self, moment):
+        """判断某个时刻是否在窗口内"""
+        if self.weekdays is not None and moment.weekday() not in self.weekdays:
+            return False
+        if not self._date_matches(moment):
+            return False
+        seconds = moment.hour * 3600 + moment.minute * 60 + moment.second
+        return self.start <= seconds < self.end
+
+
+class PollPolicy:
+    """轮询策略：按时间窗口决定间隔，窗口外使用默认间隔
+
+    参数:
+        default_interval: 不在任何窗口内时的间隔（秒）
+        windows: PollWindow 列表，按顺序取第一个匹配的窗口
+        jitter: 每次派发在截止时间后随机延迟的最大秒数，避免整点集中请求
+        cycle_budget: 每轮爬取的固定时间预算（秒），None 时按当前间隔的比例计算
+    """
+
+    def __init__(self, default_interval, windows=(), jitter=0, cycle_budget=None):
+        self.default_interval = default_interval
+        self.windows = list(windows)
+        self.jitter = jitter
+        self.cycle_budget = cycle_budget
+
+    @classmethod
+    def from_config(cls, config):
+        """从配置字典构建策略"""
+        windows = [PollWindow(**window) for window in config.get('windows', ())]
+        return cls(config['default_interval'], windows, config.get('jitter', 0), config.get('cycle_budget'))
+
+    def interval_at(self, timestamp):
+        """返回某个时间点适用的轮询间隔"""
+        moment = datetime.fromtimestamp(timestamp)
+        for window in self.windows:
+            if window.contains(moment):
+                return window.interval
+        return self.default_interval
+
+    def budget_at(self, timestamp):
+        """返回某个时间点开始的一轮爬取的时间预算（秒）"""
+        if self.cycle_budget is not None:
+            return self.cycle_budget
+        return self.interval_at(timestamp) * CYCLE_BUDGET_RATIO
+
+    def next_deadline(self, deadline):
+        """计算下一次截止时间
+
+        正常情况下为 deadline + 当前间隔；若在此之前会进入间隔更短的窗口，
+        则提前到进入窗口的时刻，避免从每小时切换到每分钟时错过前面一段。
+        """
+        interval = self.interval_at(deadline)
+        candidate = deadline + interval
+        probe = deadline + _WINDOW_PROBE_STEP
+        while probe < candidate:
+            if self.interval_at(probe) < interval:
+                # 对齐到整分钟
+                return probe - probe % _WINDOW_PROBE_STEP
+            probe += _WINDOW_PROBE_STEP
+        return candidate
+
+
+class ScheduledJob:
+    """调度任务及其准时性统计"""
+
+    def __init__(self, name, func, policy):
+        self.name = name
+        self.func = func
+        self.policy = policy
+        self.deadline = None
+        self.running = False
+        self.runs = 0
+        self.skipped = 0
+        self.last_lateness = 0.0
+        self.max_lateness = 0.0
+        self.total_lateness = 0.0
+        self.max_dispatch_lateness = 0.0
+        self.total_dispatch_lateness = 0.0
+        self.last_duration = 0.0
+
+    def stats(self):
+        return {
+            'name': self.name,
+            'runs': self.runs,
+            'skipped': self.skipped,
+            'last_lateness': round(self.last_lateness, 3),
+            'max_lateness': round(self.max_lateness, 3),
+            'avg_lateness': round(self.total_lateness / self.runs, 3) if self.runs else 0.0,
+            'max_dispatch_lateness': round(self.max_dispatch_lateness, 3),
+            'avg_dispatch_lateness': round(self.total_dispatch_lateness / self.runs, 3) if self.runs else 0.0,
+            'last_duration': round(self.last_duration, 3),
+            'next_deadline': datetime.fromtimestamp(self.deadline).strftime('%Y-%m-%d %H:%M:%S')
+            if self.deadline else None,
+        }
+
+
+class Scheduler:
+    """基于堆的截止时间调度器
+
+    同一任务上一次还没执行完时，本次到期会被跳过并计入 skipped；
+    调度线程落后超过一个间隔时，直接跳到下一个未来的节拍。
+
+    参数:
+        max_workers: 执行任务的线程池大小
+        on_complete: 每次任务执行结束后的回调 on_complete(job, lateness, error)，
+            lateness 为相对策略截止时间（不含抖动）的延迟
+    """
+
+    def __init__(self, max_workers, on_complete=None):
+        self.jobs = []
+        self.on_complete = on_complete
+        self._heap = []
+        self._counter = itertools.count()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="CrawlWorker")
+
+    def add_job(self, name, func, policy, start_at=None):
+        """添加任务，默认立即执行第一次"""
+        job = ScheduledJob(name, func, policy)
+        job.deadline = start_at if start_at is not None else time.time()
+        self.jobs.append(job)
+        heapq.heappush(self._heap, (job.deadline, next(self._counter), job))
+        return job
+
+    def report(self):
+        """返回所有任务的准时性统计"""
+        with self._lock:
+            return [job.stats() for job in self.jobs]
+
+    def stop(self):
+        self._stop.set()
+
+    def run_forever(self):
+        """运行调度循环，直到调用 stop()"""
+        try:
+            while not self._stop.is_set() and self._heap:
+                deadline, _, job = self._heap[0]
+                dispatch_at = deadline + (random.uniform(0, job.policy.jitter) if job.policy.jitter else 0)
+                wait = dispatch_at - time.time()
+                if wait > 0 and self._stop.wait(wait):
+                    break
+                heapq.heappop(self._heap)
+                self._dispatch(job, deadline, dispatch_at)
+
+                next_deadline = job.policy.next_deadline(deadline)
+                now = time.time()
+                while next_deadline <= now:
+                    # 调度落后：跳过已错过的节拍，保持原有相位
+                    next_deadline = job.policy.next_deadline(next_deadline)
+                with self._lock:
+                    job.deadline = next_deadline
+                heapq.heappush(self._heap, (next_deadline, next(self._counter), job))
+        finally:
+            self._executor.shutdown(wait=False)
+
+    def _dispatch(self, job, deadline, dispatch_at):
+        with self._lock:
+            if job.running:
+                job.skipped += 1
+                return
+            job.running = True
+        self._executor.submit(self._run_job, job, deadline, dispatch_at)
+
+    def _run_job(self, job, deadline, dispatch_at):
+        started = time.time()
+        lateness = max(0.0, started - deadline)
+        dispatch_lateness = max(0.0, started - dispatch_at)
+        error = None
+        try:
+            job.func()
+        except Exception as e:
+            error = e
+        finally:
+            with self._lock:
+                job.running = False
+                job.runs += 1
+                job.last_lateness = lateness
+                job.max_lateness = max(job.max_lateness, lateness)
+                job.total_lateness += lateness
+                job.max_dispatch_lateness = max(job.max_dispatch_lateness, dispatch_lateness)
+                job.total_dispatch_lateness += dispatch_lateness
+                job.last_duration = time.time() - started
+        if self.on_complete:
+            self.on_complete(job, lateness, error)
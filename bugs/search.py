@@ -0,0 +1,52 @@
+"""全文检索模块 - 把标题和正文切分为 FTS5 可索引的词元
+
+SQLite 自带的分词器按空白和标点切分，一段连续的中文会被当成一个词，无法按词检索。
+这里在写入前先把中文切成相邻两字（bigram），词元之间用空格分隔，交给 FTS5 的
+unicode61 分词器建立索引；英文和数字按单词小写处理。
+
+每段中文的最后一个字额外作为单字词元，这样每个字都是某个词元的开头，
+单字查询可以用前缀匹配实现。
+"""
+
+import re
+
+_TOKEN_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+|[0-9A-Za-z]+")
+_CJK_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+
+
+def _runs(text):
+    for match in _TOKEN_RE.finditer(text or ''):
+        run = match.group()
+        yield run, bool(_CJK_RE.match(run))
+
+
+def text_tokens(text):
+    """标题或正文的索引词元，以空格分隔
+
+    例: '2024年转专业通知' -> '2024 年转 转专 专业 业通 通知 知'
+    """
+    tokens = []
+    for run, cjk in _runs(text):
+        if not cjk:
+            tokens.append(run.lower())
+            continue
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        tokens.append(run[-1])
+    return ' '.join(tokens)
+
+
+def build_match(query):
+    """把用户输入转换为 FTS5 MATCH 表达式，没有可检索内容时返回 None
+
+    空格分隔的每个词都必须出现：中文词转为相邻两字组成的短语，单字用前缀匹配，
+    英文和数字按单词匹配。
+    """
+    terms = []
+    for run, cjk in _runs(query):
+        if not cjk:
+            terms.append(f'"{run.lower()}"')
+        elif len(run) == 1:
+            terms.append(f'"{run}"*')
+        else:
+            terms.append('"' + ' '.join(run[i:i + 2] for i in range(len(run) - 1)) + '"')
+    return ' AND '.join(terms) or None
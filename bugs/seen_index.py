@@ -0,0 +1,116 @@
+"""已见 URL 内存索引模块
+
+在 SQLite 之前拦截绝大多数“已见过”的查询，内存占用随表增长保持紧凑。
+"""
+
+import math
+import struct
+from array import array
+from bisect import bisect_left
+from hashlib import blake2b
+
+
+def _url_hash(url, digest_size=8):
+    """计算 URL 的定长哈希"""
+    return blake2b(url.encode('utf-8'), digest_size=digest_size).digest()
+
+
+class HashedUrlIndex:
+    """64 位 URL 哈希索引
+
+    已有数据保存在有序的 array('q') 中（每条 8 字节），新增数据先放入小集合，
+    积累到一定数量后合并。64 位哈希在百万级数据下的碰撞概率可忽略，
+    因此命中即视为已见，无需再查询数据库。
+    """
+
+    exact = True
+    MERGE_THRESHOLD = 4096
+
+    def __init__(self):
+        self._sorted = array('q')
+        self._recent = set()
+
+    @staticmethod
+    def _key(url):
+        return int.from_bytes(_url_hash(url), 'big', signed=True)
+
+    def load(self, urls):
+        """从 URL 迭代器批量构建索引"""
+        keys = array('q', (self._key(url) for url in urls))
+        self._sorted = array('q', sorted(keys))
+        self._recent = set()
+
+    def add(self, url):
+        self._recent.add(self._key(url))
+        if len(self._recent) >= self.MERGE_THRESHOLD:
+            self._sorted = array('q', sorted(self._sorted + array('q', self._recent)))
+            self._recent = set()
+
+    def might_contain(self, url):
+        key = self._key(url)
+        if key in self._recent:
+            return True
+        pos = bisect_left(self._sorted, key)
+        return pos < len(self._sorted) and self._sorted[pos] == key
+
+    def __len__(self):
+        return len(self._sorted) + len(self._recent)
+
+    def memory_bytes(self):
+        """索引数据本身占用的近似字节数"""
+        return self._sorted.buffer_info()[1] * self._sorted.itemsize + len(self._recent) * 36
+
+
+class BloomFilterIndex:
+    """布隆过滤器索引
+
+    内存固定为约 capacity * 1.44 * log2(1/fp_rate) 位。未命中即确定未见过；
+    命中可能是误判，需要再查询数据库确认。元素数量超过容量时由调用方重建。
+
+    参数:
+        capacity: 预期元素数量
+        fp_rate: 目标误判率
+    """
+
+    exact = False
+
+    def __init__(self, capacity, fp_rate):
+        self.capacity = max(int(capacity), 1)
+        self.fp_rate = fp_rate
+        self.num_bits = max(8, int(-self.capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        # 每个哈希位置取摘要中的 4 字节，blake2b 摘要最长 64 字节
+        self.num_hashes = min(16, max(1, round(self.num_bits / self.capacity * math.log(2))))
+        self._unpack = struct.Struct(f'>{self.num_hashes}I').unpack
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+
+    def _positions(self, url):
+        # 一次计算 4k 字节摘要，拆成 k 个 32 位哈希值
+        digest = _url_hash(url, digest_size=4 * self.num_hashes)
+        num_bits = self.num_bits
+        return [value % num_bits for value in self._unpack(digest)]
+
+    def load(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def add(self, url):
+        for pos in self._positions(url):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self._count += 1
+
+    def might_contain(self, url):
+        bits = self._bits
+        for pos in self._positions(url):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def is_full(self):
+        return self._count > self.capacity
+
+    def __len__(self):
+        return self._count
+
+    def memory_bytes(self):
+        return len(self._bits)
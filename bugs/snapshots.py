@@ -0,0 +1,168 @@
+"""页面快照模块 - 按内容寻址压缩存档抓取到的列表页面，并支持离线重放
+
+每次抓取的原始响应字节按 SHA-256 存为 <目录>/<前两位>/<摘要>.<zst|gz>，
+内容相同的页面只存一份；每次抓取在数据库中记录一条 (URL, 摘要, 抓取时间) 索引。
+安装了 zstandard 时使用 zstd 压缩，否则使用 gzip，两种格式读取时都支持。
+"""
+
+import contextlib
+import gzip
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from .config import SNAPSHOT_COMPRESSION, SNAPSHOT_DIR
+from .encoding import EncodingResolver, parse_html
+
+_EXTENSIONS = {'zstd': '.zst', 'gzip': '.gz'}
+
+
+def _resolve_compression(compression):
+    if compression == 'zstd' and zstandard is None:
+        return 'gzip'
+    if compression not in _EXTENSIONS:
+        raise ValueError(f"不支持的压缩格式: {compression}")
+    return compression
+
+
+class SnapshotStore:
+    """内容寻址的页面快照存档
+
+    参数:
+        db_manager: 数据库管理器实例（快照索引所在数据库）
+        directory: 快照文件目录
+        compression: 'zstd' 或 'gzip'，未安装 zstandard 时 zstd 退回 gzip
+    """
+
+    def __init__(self, db_manager, directory=SNAPSHOT_DIR, compression=SNAPSHOT_COMPRESSION):
+        self.db_manager = db_manager
+        self.directory = directory
+        self.compression = _resolve_compression(compression)
+        self._local = threading.local()
+        self.stored = 0
+        self.deduplicated = 0
+
+    def _path(self, digest, compression):
+        return os.path.join(self.directory, digest[:2], digest + _EXTENSIONS[compression])
+
+    def _compress(self, content):
+        if self.compression == 'zstd':
+            # ZstdCompressor 不能跨线程共享
+            compressor = getattr(self._local, 'compressor', None)
+            if compressor is None:
+                compressor = self._local.compressor = zstandard.ZstdCompressor(level=10)
+            return compressor.compress(content)
+        return gzip.compress(content, compresslevel=6, mtime=0)
+
+    def save(self, url, content, fetched_at=None):
+        """存档一次抓取的原始响应字节，返回内容摘要"""
+        digest = hashlib.sha256(content).hexdigest()
+        if self._exists(digest):
+            self.deduplicated += 1
+        else:
+            path = self._path(digest, self.compression)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 先写临时文件再改名，避免并发写入或中断留下不完整的文件
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self._compress(content))
+            os.replace(tmp_path, path)
+            self.stored += 1
+        self.db_manager.add_snapshot(url, digest, len(content), fetched_at or datetime.now())
+        return digest
+
+    def _exists(self, digest):
+        return any(os.path.exists(self._path(digest, compression)) for compression in _EXTENSIONS)
+
+    def load(self, digest):
+        """读取并解压快照内容"""
+        for compression in _EXTENSIONS:
+            path = self._path(digest, compression)
+            if not os.path.exists(path):
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            if compression == 'gzip':
+                return gzip.decompress(data)
+            if zstandard is None:
+                raise RuntimeError(f"快照 {digest} 为 zstd 格式，需要安装 zstandard")
+            return zstandard.ZstdDecompressor().decompress(data)
+        raise FileNotFoundError(f"快照文件不存在: {digest}")
+
+    def history(self, url, since=None, until=None):
+        """返回目标在时间范围内的快照索引 [(摘要, 抓取时间, 原始大小)]，按时间排列"""
+        return self.db_manager.get_snapshots(url, since, until)
+
+
+def replay_snapshots(store, target, registry, since=None, until=None, verbose=False):
+    """在存档的页面上重新运行 parse_section
+
+    使用临时数据库，不影响正式数据库中的已见记录；与上一个快照内容相同时复用已解析的页面。
+
+    参数:
+        store: SnapshotStore 实例
+        target: 目标配置字典（可替换其中的 XPath 来检验新选择器）
+        registry: 已注册该目标的 TargetRegistry
+        since, until: 抓取时间范围（datetime），None 表示不限
+        verbose: 是否输出 parse_section 的逐条打印
+
+    返回:
+        结果字典：快照数、去重后的页面数、每个快照的条目数和新文章数、耗时
+    """
+    from .crawler import WebCrawler
+    from .database import DatabaseManager
+
+    history = store.history(target['url'], since, until)
+    started = time.perf_counter()
+    distinct = set()
+    last_digest = tree = None
+    snapshots = []
+    # 快照不保存响应头，按页面内的 <meta> 声明确定编码
+    encodings = EncodingResolver()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scratch = DatabaseManager(os.path.join(tmp, 'replay.db'), enable_outbox=False,
+                                  enable_details=False)
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with output:
+            scratch.init_db()
+            crawler = WebCrawler(scratch, registry=registry)
+            list_xpath = registry.xpath(target, 'list_xpath')
+            for digest, fetched_at, size in history:
+                if digest != last_digest:
+                    content = store.load(digest)
+                    tree = parse_html(content, encodings.resolve(target['url'], content))
+                    last_digest = digest
+                    distinct.add(digest)
+                items = list_xpath(tree)
+                extracted = len(crawler._collect_all(items, target))
+                new_articles = crawler.parse_section(tree, target)
+                snapshots.append({
+                    'fetched_at': fetched_at,
+                    'digest': digest[:12],
+                    'bytes': size,
+                    'items': len(items),
+                    'extracted': extracted,
+                    'new_articles': [article['title'] for article in new_articles],
+                })
+        scratch.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        'url': target['url'],
+        'snapshots': len(snapshots),
+        'distinct_pages': len(distinct),
+        'empty_snapshots': sum(1 for snapshot in snapshots if snapshot['items'] == 0),
+        'elapsed_seconds': round(elapsed, 3),
+        'history': snapshots,
+    }
+
@@ -0,0 +1,122 @@
+"""目标注册模块 - 启动时校验目标配置并预编译 XPath"""
+
+import hashlib
+import json
+import os
+import threading
+
+XPATH_KEYS = ('list_xpath', 'title_xpath', 'href_xpath')
+REQUIRED_KEYS = ('college', 'base_url', 'url', 'list_xpath', 'title_xpath')
+DEFAULT_HREF_XPATH = './a/@href'
+
+
+class TargetConfigError(ValueError):
+    """目标配置无效"""
+
+
+class TargetRegistry:
+    """目标注册表
+
+    校验每个目标的必填字段，并把 list_xpath/title_xpath/href_xpath 编译为
+    etree.XPath 对象；相同表达式只编译一次。未注册的表达式在首次使用时编译。
+
+    参数:
+        targets: 目标配置列表
+    """
+
+    def __init__(self, targets=()):
+        self._compiled = {}
+        self._lock = threading.Lock()
+        self.register(targets)
+
+    def register(self, targets):
+        """校验并编译一组目标，任何一个无效都会抛出 TargetConfigError"""
+        for target in targets:
+            missing = [key for key in REQUIRED_KEYS if not target.get(key)]
+            if missing:
+                raise TargetConfigError(
+                    f"目标 '{target.get('college', '?')}' ({target.get('url', '?')}) 缺少字段: {', '.join(missing)}"
+                )
+            for key in XPATH_KEYS:
+                self._compile(target, key)
+
+    def _compile(self, target, key):
+        expression = target.get(key, DEFAULT_HREF_XPATH)
+        compiled = self._compiled.get(expression)
+        if compiled is not None:
+            return compiled
+        # lxml 在首次编译时才导入，单次运行模式没有到期目标时不必加载
+        from lxml import etree
+
+        try:
+            # smart_strings=False: 结果为普通 str，不保留到所在节点的引用
+            compiled = etree.XPath(expression, smart_strings=False)
+        except etree.XPathSyntaxError as e:
+            raise TargetConfigError(
+                f"目标 '{target['college']}' ({target['url']}) 的 {key} 无效: {expression!r} ({e})"
+            ) from e
+        with self._lock:
+            self._compiled[expression] = compiled
+        return compiled
+
+    def xpath(self, target, key):
+        """返回目标某个 XPath 字段的编译结果"""
+        expression = target.get(key, DEFAULT_HREF_XPATH)
+        compiled = self._compiled.get(expression)
+        if compiled is None:
+            compiled = self._compile(target, key)
+        return compiled
+
+    def __len__(self):
+        return len(self._compiled)
+
+
+_default_registry = None
+_default_lock = threading.Lock()
+
+
+def get_target_registry():
+    """获取进程级共享目标注册表"""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = TargetRegistry()
+        return _default_registry
+
+
+def register_targets(targets):
+    """在进程级注册表中校验并编译目标，返回注册表"""
+    registry = get_target_registry()
+    registry.register(targets)
+    return registry
+
+
+def register_targets_cached(targets, stamp_path):
+    """与 register_targets 相同，但目标配置自上次校验通过后没有变化时跳过校验
+
+    校验通过后把配置摘要写入 stamp_path；摘要一致时不再逐个编译，
+    XPath 在首次使用时编译。用于频繁启动的单次运行模式。
+
+    返回: 进程级注册表
+    """
+    import lxml
+
+    payload = json.dumps([targets, lxml.__version__], sort_keys=True, ensure_ascii=False)
+    digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    try:
+        with open(stamp_path, encoding='utf-8') as f:
+            if f.read().strip() == digest:
+                return get_target_registry()
+    except OSError:
+        pass
+
+    registry = register_targets(targets)
+    tmp_path = stamp_path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(digest + '\n')
+        os.replace(tmp_path, stamp_path)
+    except OSError:
+        # 无法写入时下次启动重新校验即可
+        pass
+    return registry
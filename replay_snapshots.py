@@ -0,0 +1,87 @@
+# 文件名: replay_snapshots.py
+"""
+快照重放脚本
+在存档的历史页面上重新运行解析，用于检验修改后的 XPath 或核对某条通知当时是否存在
+不需要网络，也不会修改正式数据库中的已见记录
+需要先在 bugs/config.py 中开启 ENABLE_SNAPSHOTS 积累快照
+
+使用方法:
+    python replay_snapshots.py --college 数学与统计学院
+    python replay_snapshots.py --url https://jwch.fzu.edu.cn/jxtz.htm --since 2024-03-01
+    python replay_snapshots.py --college 化工学院 --list-xpath "//div[@class='list']/ul/li" --json
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime, timedelta
+
+from bugs.config import TARGETS_COLLEGE, TARGET_JWC_PAGE
+from bugs.database import DatabaseManager
+from bugs.snapshots import SnapshotStore, replay_snapshots
+from bugs.targets import TargetRegistry
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d')
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="在存档的页面快照上重放解析")
+    parser.add_argument('--college', help="按学院名称选择目标")
+    parser.add_argument('--url', help="按列表页 URL 选择目标")
+    parser.add_argument('--since', type=_parse_date, help="起始日期 YYYY-MM-DD")
+    parser.add_argument('--until', type=_parse_date, help="结束日期 YYYY-MM-DD（包含当天）")
+    parser.add_argument('--list-xpath', help="替换目标的 list_xpath")
+    parser.add_argument('--title-xpath', help="替换目标的 title_xpath")
+    parser.add_argument('--href-xpath', help="替换目标的 href_xpath")
+    parser.add_argument('--verbose', action='store_true', help="输出逐条解析信息")
+    parser.add_argument('--json', action='store_true', help="以 JSON 输出完整结果")
+    args = parser.parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    if script_dir:
+        os.chdir(script_dir)
+
+    targets = [
+        target for target in TARGET_JWC_PAGE + TARGETS_COLLEGE
+        if (args.college is None or target['college'] == args.college)
+        and (args.url is None or target['url'] == args.url)
+    ]
+    if not targets:
+        parser.error("没有匹配的目标")
+
+    overrides = {key: value for key, value in (('list_xpath', args.list_xpath),
+                                               ('title_xpath', args.title_xpath),
+                                               ('href_xpath', args.href_xpath)) if value}
+    targets = [dict(target, **overrides) for target in targets]
+    registry = TargetRegistry(targets)
+    until = args.until + timedelta(days=1) - timedelta(seconds=1) if args.until else None
+
+    db_manager = DatabaseManager(seen_index_mode=None)
+    store = SnapshotStore(db_manager)
+    results = [replay_snapshots(store, target, registry, args.since, until, args.verbose)
+               for target in targets]
+    db_manager.close()
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    for target, result in zip(targets, results):
+        print(f"{target['college']} {result['url']}")
+        print(f"  快照 {result['snapshots']} 个（不同页面 {result['distinct_pages']} 个），"
+              f"耗时 {result['elapsed_seconds']} 秒")
+        if result['empty_snapshots']:
+            print(f"  警告: {result['empty_snapshots']} 个快照中 list_xpath 没有匹配到条目")
+        for snapshot in result['history']:
+            if snapshot['new_articles']:
+                print(f"  {snapshot['fetched_at']} 列表 {snapshot['items']} 条，"
+                      f"新文章 {len(snapshot['new_articles'])} 篇")
+                for title in snapshot['new_articles']:
+                    print(f"    {title}")
+
+
+if __name__ == "__main__":
+    main()
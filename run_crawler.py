@@ -1,140 +1,387 @@
 """福州大学通知公告监控脚本
 
 用于监控各学院和教务处网站的通知公告更新。
-支持单次执行和持续监控两种模式。
+支持单次执行、快速单次执行（适合 cron）和持续监控三种模式。
 """
 
+import functools
 import os
 import sys
 import time
 import threading
 from datetime import datetime
 
+# 快速单次模式的启动计时起点
+_STARTED = time.perf_counter()
+
 from bugs.config import (
+    DB_NAME,
     TARGETS_COLLEGE,
-    CRAWL_INTERVAL_SECONDS,
     TARGET_JWC_PAGE,
-    JWC_CRAWL_INTERVAL_SECONDS
+    POLL_POLICIES,
+    SCHEDULER_MAX_WORKERS,
+    REQUEST_TIMEOUT,
+    DETAIL_DRAIN_SECONDS,
+    ENABLE_PUSH_SERVER,
+    OUTPUT_SINK,
+    OUTPUT_DIR,
+    FAST_DUE_TOLERANCE_SECONDS,
+    FAST_START_BUDGET_MS,
+    TARGETS_STAMP_FILE
 )
 from bugs.database import DatabaseManager
-from bugs.crawler import WebCrawler
+from bugs.output import create_output_sink, get_output_sink
+from bugs.targets import register_targets, register_targets_cached
+# 其余模块（requests、lxml、asyncio、http.server 等）在用到时才导入，
+# 快速单次模式只加载发出请求所需的部分，没有到期目标时连 requests 也不加载
 
-# 全局锁，用于线程安全的打印和文件操作
+# 控制台打印锁，多个线程的输出不会交错；文件写入由输出目标自己加锁（见 bugs/output.py）
 _print_lock = threading.Lock()
 
 
-def save_articles_to_file(articles, filename=None):
-    """将文章列表保存到文本文件
+def save_articles(articles, sink=None):
+    """将新文章写入输出目标（见 bugs/output.py）
+    
+    写入不占用打印锁，一个监控任务写文件时另一个任务的控制台输出不受影响。
     
     参数:
         articles: 文章信息字典列表
-        filename: 输出文件名，未指定时自动生成
+        sink: 输出目标，未指定时使用 OUTPUT_SINK 配置的进程级实例
         
     返回:
-        保存的文件名，如果没有文章则返回 None
+        写入的文件路径，没有文章或未配置输出时返回 None
     """
-    if not articles:
+    sink = sink or get_output_sink()
+    if not articles or sink is None:
         return None
     
-    if filename is None:
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"new_articles_{timestamp}.txt"
-    
+    path = sink.write(articles)
     with _print_lock:
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(f"福州大学通知爬取结果\n")
-            f.write(f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"共 {len(articles)} 篇新文章\n")
-            f.write("=" * 60 + "\n\n")
-            
-            for article in articles:
-                f.write(f"{article['time']}\n")
-                f.write(f"{article['college']} - {article['category']}\n")
-                f.write(f"{article['title']}\n")
-                f.write(f"{article['url']}\n")
-                f.write("-" * 60 + "\n\n")
-        
-        print(f"新文章已保存: {filename}")
-    
-    return filename
+        print(f"新文章已保存: {path}")
+    return path
+
+
+def _start_notifier(db_manager):
+    """发件箱启用时启动通知投递线程，否则返回 None"""
+    if not db_manager.enable_outbox:
+        return None
+    from bugs.notifier import NotificationWorker
+
+    return NotificationWorker(db_manager, print_lock=_print_lock).start()
+
+
+def _finish_notifier(notifier):
+    """单次运行结束前投递剩余通知，未送达的留待下次运行"""
+    if notifier is None:
+        return
+    if not notifier.drain(REQUEST_TIMEOUT):
+        pending = notifier.db_manager.count_pending_notifications()
+        print(f"{pending} 条通知未能送达，已保留在发件箱中，下次运行时重试")
+    notifier.stop()
+
+
+def _start_details(db_manager):
+    """详情页抓取启用时启动后台抓取线程池，否则返回 None"""
+    if not db_manager.enable_details:
+        return None
+    from bugs.details import DetailFetcher
+
+    return DetailFetcher(db_manager, print_lock=_print_lock).start()
+
+
+def _finish_details(details):
+    """单次运行结束前处理已入队的详情页，未完成的留待下次运行"""
+    if details is None:
+        return
+    if not details.drain(DETAIL_DRAIN_SECONDS):
+        print("部分详情页尚未抓取，已保留在队列中，下次运行时继续")
+    details.stop()
 
 
 def main_once():
     """执行一次爬取任务"""
+    from bugs.crawler import WebCrawler
+
     script_dir = os.path.dirname(os.path.abspath(__file__))
     if script_dir:
         os.chdir(script_dir)
     
+    register_targets(TARGETS_COLLEGE)
     db_manager = DatabaseManager()
     db_manager.init_db()
+    notifier = _start_notifier(db_manager)
+    details = _start_details(db_manager)
     
     crawler = WebCrawler(db_manager)
     new_articles = crawler.crawl_all_targets(TARGETS_COLLEGE)
     
     if new_articles:
-        save_articles_to_file(new_articles)
+        save_articles(new_articles)
     
+    _finish_notifier(notifier)
+    _finish_details(details)
     return new_articles
 
 
-def _run_college_monitor():
-    """学院通知持续监控"""
+def _format_http_stats(http_client):
+    """格式化连接复用统计"""
+    stats = http_client.get_stats()
+    return (f"连接复用 {stats['reused_connections']} 次，新建 {stats['new_connections']} 次，"
+            f"DNS 缓存命中 {stats['dns_hits']} 次")
+
+
+def _format_fingerprint_stats(crawler):
+    """格式化列表指纹命中统计"""
+    stats = crawler.fingerprint_stats
+    return f"列表指纹命中 {stats['hits']} 次，未命中 {stats['misses']} 次"
+
+
+def _format_breaker_stats(crawler):
+    """格式化未恢复主机的熔断状态，全部正常时返回 None"""
+    if crawler.breaker is None:
+        return None
+    states = crawler.breaker.snapshot()
+    if not states:
+        return None
+    parts = []
+    for host, state in sorted(states.items()):
+        if state['state'] == 'open':
+            parts.append(f"{host} 熔断中（{state['retry_at']} 重试，已跳过 {state['skipped']} 次）")
+        else:
+            parts.append(f"{host} 试探中")
+    return "主机熔断: " + "；".join(parts)
+
+
+# 监控组：(策略名, 显示名称, 目标列表)
+MONITOR_GROUPS = [
+    ('jwc', '教务处监控', TARGET_JWC_PAGE),
+    ('college', '学院监控', TARGETS_COLLEGE),
+]
+
+
+def _run_cycle(label, targets, db_manager, http_client, policy, leases=None, sink=None):
+    """执行一轮爬取
+    
+    本轮耗时受轮询策略给出的时间预算限制，预算用完时返回已发现的文章，
+    并记录未检查的目标和预算使用情况。
+    
+    参数:
+        label: 显示名称
+        targets: 本轮要检查的目标列表
+        db_manager: 各任务共享的数据库管理器
+        http_client: 各任务共享的 HTTP 客户端
+        policy: 本任务的轮询策略
+        leases: 分片模式下的 LeaseManager，只检查本进程持有租约的目标
+        sink: 新文章的输出目标，未指定时使用进程级实例
+    """
+    from bugs.budget import CycleBudget
+    from bugs.crawler import WebCrawler
+
+    if leases is not None:
+        targets = [target for target in targets if leases.owns(target['url'])]
+        if not targets:
+            return
+    started_at = datetime.now()
+    budget = CycleBudget(policy.budget_at(started_at.timestamp()))
     with _print_lock:
-        print("[学院监控] 已启动")
+        print(f"\n[{label} {started_at.strftime('%Y-%m-%d %H:%M:%S')}] 开始检查（预算 {budget.seconds:.0f} 秒）")
     
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    if script_dir:
-        os.chdir(script_dir)
+    crawler = WebCrawler(db_manager, _print_lock, http_client)
+    new_articles = crawler.crawl_all_targets(targets, budget=budget)
     
-    db_manager = DatabaseManager()
-    db_manager.init_db()
+    save_articles(new_articles, sink)
     
-    while True:
-        with _print_lock:
-            timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
-            print(f"\n[学院监控 {timestamp}] 开始检查")
-        
-        crawler = WebCrawler(db_manager, _print_lock)
-        new_articles = crawler.crawl_all_targets(TARGETS_COLLEGE)
-        
-        if new_articles:
-            save_articles_to_file(new_articles)
-        
+    elapsed = budget.elapsed()
+    skipped_urls = [target['url'] for target in crawler.skipped_targets]
+    db_manager.record_cycle(label, started_at, budget.seconds, elapsed, len(targets),
+                            skipped_urls, len(new_articles))
+    if crawler.metrics is not None:
+        crawler.metrics.observe_cycle(label, elapsed, bool(skipped_urls) or elapsed > budget.seconds,
+                                      len(skipped_urls))
+    
+    with _print_lock:
+        print(f"[{label}] 检查完成，发现 {len(new_articles)} 篇新文章，"
+              f"耗时 {elapsed:.1f} 秒（预算的 {budget.used_ratio():.0%}）")
+        if skipped_urls:
+            print(f"[{label}] 超出预算，{len(skipped_urls)}/{len(targets)} 个目标未检查")
+        print(f"[{label}] {_format_http_stats(http_client)}")
+        print(f"[{label}] {_format_fingerprint_stats(crawler)}")
+        breaker_stats = _format_breaker_stats(crawler)
+        if breaker_stats:
+            print(f"[{label}] {breaker_stats}")
+
+
+def _start_metrics_server():
+    """指标启用时在本机启动 /metrics 服务，否则返回 None"""
+    from bugs.metrics import MetricsServer, get_metrics
+
+    metrics = get_metrics()
+    if metrics is None:
+        return None
+    try:
+        server = MetricsServer(metrics).start()
+    except OSError as e:
+        print(f"警告: 无法启动指标服务: {e}")
+        return None
+    host, port = server.address[:2]
+    print(f"指标服务已启动: http://{host}:{port}/metrics")
+    return server
+
+
+def _start_push_server(db_manager):
+    """推送启用时在本机启动 /events 服务，否则返回 None"""
+    if not ENABLE_PUSH_SERVER:
+        return None
+    from bugs.push import PushServer
+
+    try:
+        server = PushServer(db_manager).start()
+    except OSError as e:
+        print(f"警告: 无法启动推送服务: {e}")
+        return None
+    host, port = server.address[:2]
+    print(f"推送服务已启动: http://{host}:{port}/events")
+    return server
+
+
+def _build_scheduler(db_manager, http_client, groups=None, policies=None, leases=None, sink=None):
+    """按轮询策略为每个监控组创建调度任务
+    
+    目标可通过 'poll_policy' 键指定 POLL_POLICIES 中的其他策略，此时单独成为一个任务。
+    
+    参数:
+        groups: 监控组列表，默认 MONITOR_GROUPS
+        policies: 轮询策略配置，默认 POLL_POLICIES
+        leases: 分片模式下的 LeaseManager，每轮只检查本进程持有租约的目标
+        sink: 新文章的输出目标，未指定时使用进程级实例
+    """
+    from bugs.scheduler import PollPolicy, Scheduler
+
+    groups = MONITOR_GROUPS if groups is None else groups
+    policies = POLL_POLICIES if policies is None else policies
+    
+    def on_complete(job, lateness, error):
         with _print_lock:
-            interval_min = CRAWL_INTERVAL_SECONDS / 60
-            print(f"[学院监控] 检查完成，{interval_min:.0f}分钟后进行下一轮")
+            if error is not None:
+                print(f"[{job.name}] 本轮出错: {error}")
+            next_run = datetime.fromtimestamp(job.deadline).strftime('%H:%M:%S')
+            print(f"[{job.name}] 延迟 {lateness:.2f} 秒，耗时 {job.last_duration:.1f} 秒，"
+                  f"下一轮 {next_run}，累计跳过 {job.skipped} 轮")
+    
+    scheduler = Scheduler(SCHEDULER_MAX_WORKERS, on_complete=on_complete)
+    for group_policy, label, targets in groups:
+        buckets = {}
+        for target in targets:
+            buckets.setdefault(target.get('poll_policy', group_policy), []).append(target)
         
-        time.sleep(CRAWL_INTERVAL_SECONDS)
+        for policy_name, policy_targets in buckets.items():
+            name = label if policy_name == group_policy else f"{label}/{policy_name}"
+            policy = PollPolicy.from_config(policies[policy_name])
+            scheduler.add_job(
+                name,
+                functools.partial(_run_cycle, name, policy_targets, db_manager, http_client, policy, leases, sink),
+                policy
+            )
+    return scheduler
 
 
-def _run_jwc_monitor():
-    """教务处通知持续监控"""
-    with _print_lock:
-        print("[教务处监控] 已启动")
+def _due_targets(db_manager, now):
+    """按各目标的轮询策略和上次检查时间，返回此刻到期的目标"""
+    from bugs.scheduler import PollPolicy
+
+    policies = {}
+    candidates = []
+    for group_policy, _, targets in MONITOR_GROUPS:
+        for target in targets:
+            name = target.get('poll_policy', group_policy)
+            if name not in policies:
+                policies[name] = PollPolicy.from_config(POLL_POLICIES[name])
+            candidates.append((target, policies[name]))
+    
+    last_checked = db_manager.get_last_checked([target['url'] for target, _ in candidates])
+    return [
+        target for target, policy in candidates
+        if now - last_checked.get(target['url'], 0) >= policy.interval_at(now) - FAST_DUE_TOLERANCE_SECONDS
+    ]
+
+
+def main_fast(argv):
+    """快速单次运行模式，适合由 cron 频繁启动
+    
+    与普通单次运行相比：只导入用到的模块；目标配置未变化时跳过校验；
+    表结构版本一致时跳过建表；不加载已见 URL 内存索引；默认只检查按轮询策略已到期的目标。
+    
+    参数:
+        argv: 命令行参数（不含 --fast）
+        
+    返回:
+        新文章列表
+    """
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='run_crawler.py --fast', description="快速单次运行")
+    parser.add_argument('--all', action='store_true', help="检查全部目标，而不只是到期的目标")
+    parser.add_argument('--dry-run', action='store_true', help="只列出要检查的目标，不发出请求")
+    parser.add_argument('--timing', action='store_true', help="运行结束时输出从启动到发出第一个请求的耗时（--dry-run 不发出请求，不输出）")
+    parser.add_argument('--db', default=DB_NAME, help="数据库文件")
+    parser.add_argument('--output-dir', help="新文章输出目录，默认为 bugs/config.py 中的 OUTPUT_DIR")
+    args = parser.parse_args(argv)
     
     script_dir = os.path.dirname(os.path.abspath(__file__))
     if script_dir:
         os.chdir(script_dir)
-        
-    db_manager = DatabaseManager()
+    
+    all_targets = TARGETS_COLLEGE + TARGET_JWC_PAGE
+    # 校验摘要与数据库放在同一目录
+    register_targets_cached(all_targets, os.path.join(os.path.dirname(os.path.abspath(args.db)), TARGETS_STAMP_FILE))
+    # 单次运行只查询一次已见 URL，全量加载内存索引得不偿失
+    db_manager = DatabaseManager(args.db, seen_index_mode=None)
     db_manager.init_db()
+    now = time.time()
+    targets = all_targets if args.all else _due_targets(db_manager, now)
+    if not targets:
+        print("没有到期的目标")
+        db_manager.close()
+        return []
     
-    while True:
-        with _print_lock:
-            timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
-            print(f"\n[教务处监控 {timestamp}] 开始检查")
-        
-        crawler = WebCrawler(db_manager, _print_lock)
-        new_articles = crawler.crawl_all_targets(TARGET_JWC_PAGE)
-        
-        if new_articles:
-            save_articles_to_file(new_articles)
-        
-        with _print_lock:
-            interval_min = JWC_CRAWL_INTERVAL_SECONDS / 60
-            print(f"[教务处监控] 检查完成，{interval_min:.0f}分钟后进行下一轮")
-        
-        time.sleep(JWC_CRAWL_INTERVAL_SECONDS)
+    from bugs.crawler import WebCrawler
+    
+    # 在爬取之前取得输出目录锁：上一次 cron 运行或 --loop 进程正在写入同一目录时，
+    # 等待或报错都发生在文章被标记为已见之前
+    if args.dry_run:
+        sink = None
+    elif args.output_dir:
+        sink = create_output_sink(directory=args.output_dir)
+    else:
+        sink = get_output_sink()
+    notifier = None if args.dry_run else _start_notifier(db_manager)
+    details = None if args.dry_run else _start_details(db_manager)
+    crawler = WebCrawler(db_manager, _print_lock)
+    if args.dry_run:
+        for target in targets:
+            print(f"{target['college']} - {target['category']}: {target['url']}")
+        db_manager.close()
+        return []
+    
+    new_articles = crawler.crawl_all_targets(targets)
+    # 请求失败或处于熔断状态的目标不算检查过，下次运行时仍然到期
+    db_manager.mark_checked([target['url'] for target in crawler.checked_targets], now)
+    save_articles(new_articles, sink)
+    _finish_notifier(notifier)
+    _finish_details(details)
+    db_manager.close()
+    
+    print(f"检查完成，成功检查 {len(crawler.checked_targets)}/{len(targets)} 个目标，发现 {len(new_articles)} 篇新文章")
+    if args.timing:
+        # 按第一个请求真正发往网络的时刻计算，首次使用时才做的导入和准备工作都计入
+        first_request_at = crawler.http.stats.first_request_at
+        if first_request_at is None:
+            print("未发出请求（目标均处于熔断状态），没有启动耗时")
+        else:
+            startup_ms = (first_request_at - _STARTED) * 1000
+            print(f"启动耗时 {startup_ms:.0f} 毫秒（预算 {FAST_START_BUDGET_MS} 毫秒），"
+                  f"待检查目标 {len(targets)}/{len(all_targets)} 个")
+    return new_articles
 
 
 def main():
@@ -142,30 +389,79 @@ def main():
     
     使用方法:
         python run_crawler.py           # 单次运行模式
+        python run_crawler.py --fast    # 快速单次运行模式，只检查到期的目标（适合 cron）
         python run_crawler.py --loop    # 持续监控模式
+        python run_crawler.py --worker [ID]  # 分片持续监控模式
+    
+    分片模式下可在多个进程或多台机器上同时运行，各进程共享同一个数据库，
+    通过租约表均分目标；某个进程退出或失联后，其目标在 LEASE_TTL_SECONDS 内由其他进程接管。
     """
-    if len(sys.argv) > 1 and sys.argv[1] == '--loop':
-        college_thread = threading.Thread(
-            target=_run_college_monitor,
-            name="CollegeMonitor",
-            daemon=True
-        )
-        jwc_thread = threading.Thread(
-            target=_run_jwc_monitor,
-            name="JWCMonitor",
-            daemon=True
-        )
+    if len(sys.argv) > 1 and sys.argv[1] == '--fast':
+        return main_fast(sys.argv[2:])
+    
+    # 启动时校验所有目标并预编译 XPath，配置错误立即报出目标名称
+    register_targets(TARGETS_COLLEGE + TARGET_JWC_PAGE)
+    
+    if len(sys.argv) > 1 and sys.argv[1] in ('--loop', '--worker'):
+        from bugs.http_client import HttpClient
+        from bugs.leases import LeaseManager
         
-        college_thread.start()
-        jwc_thread.start()
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        if script_dir:
+            os.chdir(script_dir)
+        
+        # 所有调度任务共享数据库管理器：读操作并发，写操作经由同一个写线程
+        db_manager = DatabaseManager()
+        db_manager.init_db()
+        # 启动时就取得输出目录锁，其他进程正在写入同一目录时立即报错，而不是在第一次发现新文章时
+        sink = get_output_sink() if sys.argv[1] == '--loop' else None
+        http_client = HttpClient()
+        notifier = _start_notifier(db_manager)
+        details = _start_details(db_manager)
+        metrics_server = _start_metrics_server()
+        push_server = _start_push_server(db_manager)
+        started_at = datetime.now()
+        leases = None
+        if sys.argv[1] == '--worker':
+            worker_id = sys.argv[2] if len(sys.argv) > 2 else None
+            all_urls = [target['url'] for target in TARGETS_COLLEGE + TARGET_JWC_PAGE]
+            leases = LeaseManager(db_manager, all_urls, worker_id, print_lock=_print_lock).start()
+            # 输出序号只在单个进程内递增，各工作进程写入各自的子目录
+            if OUTPUT_SINK is not None:
+                sink = create_output_sink(directory=os.path.join(OUTPUT_DIR, leases.worker_id))
+        scheduler = _build_scheduler(db_manager, http_client, leases=leases, sink=sink)
+        
+        with _print_lock:
+            for job in scheduler.jobs:
+                print(f"[{job.name}] 已启动")
         
         try:
-            college_thread.join()
-            jwc_thread.join()
+            scheduler.run_forever()
         except KeyboardInterrupt:
+            scheduler.stop()
+            if leases is not None:
+                leases.stop()
+            if notifier is not None:
+                notifier.stop(timeout=1)
+            if details is not None:
+                details.stop(timeout=1)
+            if metrics_server is not None:
+                metrics_server.stop()
+            if push_server is not None:
+                push_server.stop()
             print("\n程序已中断")
+            for stats in scheduler.report():
+                print(f"[{stats['name']}] 共 {stats['runs']} 轮，平均延迟 {stats['avg_lateness']} 秒，"
+                      f"最大延迟 {stats['max_lateness']} 秒（其中调度排队平均 {stats['avg_dispatch_lateness']} 秒，"
+                      f"最大 {stats['max_dispatch_lateness']} 秒），跳过 {stats['skipped']} 轮")
+            cycle_summary = db_manager.get_cycle_summary(since=started_at)
+            for name, summary in cycle_summary.items():
+                print(f"[{name}] 平均耗时 {summary['avg_elapsed']} 秒，最长 {summary['max_elapsed']} 秒，"
+                      f"平均使用预算 {summary['avg_used_ratio']:.0%}，超出预算 {summary['overruns']} 轮")
             sys.exit(0)
     else:
+        from bugs.crawler import WebCrawler
+        
         print("开始单次检查...")
         all_targets = TARGETS_COLLEGE + TARGET_JWC_PAGE
         
@@ -175,12 +471,19 @@ def main():
         
         db_manager = DatabaseManager()
         db_manager.init_db()
+        # 在爬取之前取得输出目录锁，取不到时文章还没有被标记为已见
+        sink = get_output_sink()
+        notifier = _start_notifier(db_manager)
+        details = _start_details(db_manager)
         crawler = WebCrawler(db_manager)
         
         new_articles = crawler.crawl_all_targets(all_targets)
         
         if new_articles:
-            save_articles_to_file(new_articles)
+            save_articles(new_articles, sink)
+        
+        _finish_notifier(notifier)
+        _finish_details(details)
         
         print(f"检查完成，发现 {len(new_articles)} 篇新文章")
         print("提示: 使用 'python run_crawler.py --loop' 启动持续监控模式")
@@ -0,0 +1,84 @@
+# 文件名: search_announcements.py
+"""
+通知检索脚本
+在已记录的通知标题和已抓取的详情页正文中全文检索，结果按相关度排序（标题中命中的排在前面）
+中文按相邻两字建立索引，检索词中的每个词都须出现在标题或正文中
+没有开启详情页抓取（ENABLE_DETAIL_FETCH）时只能检索标题
+
+使用方法:
+    python search_announcements.py 转专业
+    python search_announcements.py 转专业 --since 2023-09-01 --college 数学与统计学院
+    python search_announcements.py 奖学金 公示 --category 通知公告 --page 2 --json
+    python search_announcements.py 通知 --sort recent
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from bugs.database import DatabaseManager
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d')
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="检索通知标题和正文")
+    parser.add_argument('query', nargs='+', help="检索词，多个词须同时出现")
+    parser.add_argument('--college', help="只看某个学院（完整名称）")
+    parser.add_argument('--category', help="只看某个栏目（完整名称）")
+    parser.add_argument('--since', type=_parse_date, help="首次发现日期不早于 YYYY-MM-DD")
+    parser.add_argument('--until', type=_parse_date, help="首次发现日期不晚于 YYYY-MM-DD（包含当天）")
+    parser.add_argument('--sort', choices=('relevance', 'recent'), default='relevance',
+                        help="排序：相关度或首次发现时间（由新到旧）")
+    parser.add_argument('--page', type=int, default=1, help="页码，从 1 开始")
+    parser.add_argument('--per-page', type=int, default=20, help="每页条数")
+    parser.add_argument('--json', action='store_true', help="以 JSON 输出")
+    args = parser.parse_args()
+    if args.page < 1 or args.per_page < 1:
+        parser.error("页码和每页条数须为正整数")
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    if script_dir:
+        os.chdir(script_dir)
+
+    until = args.until + timedelta(days=1) - timedelta(seconds=1) if args.until else None
+    db_manager = DatabaseManager(seen_index_mode=None)
+    if not db_manager.enable_search:
+        parser.error("bugs/config.py 中未开启 ENABLE_TITLE_SEARCH")
+    # 索引由爬虫启动时（init_db）建立和补齐，入库时同步更新；检索本身只读，
+    # 只有升级前的数据库还没有索引时才在这里建立一次
+    if not db_manager.has_search_index():
+        db_manager.init_search()
+    if not db_manager.enable_search:
+        parser.error("当前 SQLite 不支持 FTS5")
+
+    started = time.perf_counter()
+    total, results = db_manager.search_titles(
+        ' '.join(args.query), college=args.college, category=args.category,
+        since=args.since, until=until, limit=args.per_page, offset=(args.page - 1) * args.per_page,
+        order=args.sort
+    )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    db_manager.close()
+
+    if args.json:
+        print(json.dumps({'total': total, 'page': args.page, 'per_page': args.per_page,
+                          'elapsed_ms': round(elapsed_ms, 2), 'results': results},
+                         ensure_ascii=False, indent=2))
+        return
+
+    pages = (total + args.per_page - 1) // args.per_page
+    print(f"共 {total} 条结果，第 {args.page}/{max(pages, 1)} 页，耗时 {elapsed_ms:.1f} 毫秒")
+    for i, article in enumerate(results, (args.page - 1) * args.per_page + 1):
+        print(f"{i}. 【{article['first_seen_at']}】【{article['college']}】-【{article['category']}】")
+        print(f"   {article['title']}")
+        print(f"   {article['url']}")
+
+
+if __name__ == "__main__":
+    main()